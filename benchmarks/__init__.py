@@ -0,0 +1,4 @@
+"""
+Benchmarks dos caminhos de ingestão e consulta do pipeline RAG.
+Execute com `python -m benchmarks --help`.
+"""
@@ -0,0 +1,67 @@
+"""
+Linha de comando dos benchmarks.
+
+Exemplos:
+    python -m benchmarks --documents 40 --mix txt=2,csv=1 --queries 100
+    python -m benchmarks --output benchmarks/results/latest.json --baseline benchmarks/baseline.json
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+"""
+
+import sys
+import logging
+import argparse
+from benchmarks.corpus import parse_mix
+from benchmarks.harness import compare, format_report, load_results, run_benchmark, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de ingestão e consulta do pipeline RAG.")
+    parser.add_argument("--documents", type=int, default=20, help="Número de arquivos do corpus sintético")
+    parser.add_argument("--mix", default="txt=1,pdf=1,csv=1,xlsx=1", help="Proporção dos formatos, ex.: txt=2,csv=1")
+    parser.add_argument("--queries", type=int, default=50, help="Número de perguntas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--paragraphs", type=int, default=20, help="Parágrafos por documento de texto")
+    parser.add_argument("--rows", type=int, default=200, help="Linhas por tabela")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Segundos até o primeiro token do LLM falso")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Segundos entre tokens do LLM falso")
+    parser.add_argument("--concurrency", type=int, help="Chamadas simultâneas ao LLM em answer_many")
+    parser.add_argument("--real-embeddings", action="store_true", help="Usa o modelo FastEmbed configurado")
+    parser.add_argument("--output", help="Salva os resultados em JSON neste caminho")
+    parser.add_argument("--baseline", help="Compara com os resultados JSON deste caminho")
+    parser.add_argument("--save-baseline", help="Salva os resultados como nova linha de base neste caminho")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Piora relativa tolerada (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    # Configura o logging antes do pipeline para que os logs por pergunta não poluam o relatório
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    embeddings = None
+    if args.real_embeddings:
+        from langchain_community.embeddings import FastEmbedEmbeddings
+        from config import config
+        embeddings = FastEmbedEmbeddings(model_name=config.EMBEDDING_MODEL)
+
+    results = run_benchmark(
+        documents=args.documents, mix=parse_mix(args.mix), queries=args.queries, seed=args.seed,
+        paragraphs=args.paragraphs, rows=args.rows, llm_latency=args.llm_latency,
+        token_delay=args.token_delay, concurrency=args.concurrency, embeddings=embeddings,
+    )
+
+    comparisons = None
+    if args.baseline:
+        comparisons = compare(results, load_results(args.baseline), args.tolerance)
+    print(format_report(results, comparisons))
+
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.save_baseline)
+
+    regressions = [c for c in comparisons or [] if c.regression]
+    if regressions:
+        print(f"\n{len(regressions)} métrica(s) pioraram mais que {args.tolerance:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
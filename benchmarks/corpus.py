@@ -0,0 +1,144 @@
+"""
+Corpora sintéticos e determinísticos para os benchmarks.
+Os arquivos são gerados a partir de uma semente, então duas execuções com os
+mesmos parâmetros produzem exatamente o mesmo corpus.
+"""
+
+import os
+import random
+from typing import Dict, List
+import pandas as pd
+
+SUPPORTED_FORMATS = ("txt", "pdf", "csv", "xlsx")
+
+_WORDS = (
+    "contrato prazo entrega fornecedor pagamento fatura pedido cliente produto estoque "
+    "relatorio vendas trimestre meta custo margem receita despesa auditoria processo "
+    "qualidade garantia suporte chamado servico equipe projeto cronograma risco orcamento "
+    "logistica transporte armazem inventario compra cotacao proposta aprovacao revisao"
+).split()
+
+_QUESTION_TEMPLATES = (
+    "Qual o prazo de {0} do {1}?",
+    "Quem aprovou a {0} do {1}?",
+    "Qual o valor da {0} no {1}?",
+    "Como funciona o processo de {0} para {1}?",
+    "Quais riscos existem na {0} do {1}?",
+)
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Converte "txt=2,csv=1" em pesos por formato."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato não suportado no benchmark: '{name}'. Use: {', '.join(SUPPORTED_FORMATS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(8, 18))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> List[str]:
+    return [" ".join(_sentence(rng) for _ in range(rng.randint(3, 7))) for _ in range(count)]
+
+
+def _table(rng: random.Random, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "pedido": [f"PED-{rng.randint(1000, 9999)}" for _ in range(rows)],
+        "cliente": [rng.choice(_WORDS).capitalize() for _ in range(rows)],
+        "valor": [round(rng.uniform(10, 10000), 2) for _ in range(rows)],
+        "status": [rng.choice(("aprovado", "pendente", "cancelado")) for _ in range(rows)],
+        "descricao": [_sentence(rng) for _ in range(rows)],
+    })
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, lines: List[str], lines_per_page: int = 45):
+    """Escreve um PDF mínimo de texto (Helvetica), sem dependências externas."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        commands = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        commands += [f"({_pdf_escape(line)}) Tj T*" for line in page_lines]
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1", errors="replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def generate_corpus(directory: str, documents: int, mix: Dict[str, int], seed: int = 42,
+                    paragraphs: int = 20, rows: int = 200) -> List[str]:
+    """Gera `documents` arquivos em `directory` na proporção de `mix`.
+
+    Args:
+        directory: Diretório de saída (criado se necessário)
+        documents: Número total de arquivos
+        mix: Peso de cada formato, ex.: {"txt": 2, "csv": 1}
+        seed: Semente do gerador
+        paragraphs: Parágrafos por documento de texto (txt, pdf)
+        rows: Linhas por tabela (csv, xlsx)
+
+    Returns:
+        Caminhos dos arquivos gerados
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    formats = [name for name, weight in mix.items() for _ in range(weight)]
+    file_paths = []
+    for index in range(documents):
+        file_format = formats[index % len(formats)]
+        path = os.path.join(directory, f"doc_{index:05d}.{file_format}")
+        if file_format == "txt":
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n\n".join(_paragraphs(rng, paragraphs)))
+        elif file_format == "pdf":
+            lines = []
+            for paragraph in _paragraphs(rng, paragraphs):
+                words = paragraph.split()
+                lines += [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)] + [""]
+            write_pdf(path, lines)
+        elif file_format == "csv":
+            _table(rng, rows).to_csv(path, index=False)
+        else:
+            _table(rng, rows).to_excel(path, index=False, sheet_name="Pedidos")
+        file_paths.append(path)
+    return file_paths
+
+
+def generate_questions(count: int, seed: int = 42) -> List[str]:
+    """Gera perguntas distintas com o vocabulário do corpus."""
+    rng = random.Random(seed)
+    questions = []
+    for index in range(count):
+        template = _QUESTION_TEMPLATES[index % len(_QUESTION_TEMPLATES)]
+        first, second = rng.sample(_WORDS, 2)
+        questions.append(f"{template.format(first, second)} (#{index})")
+    return questions
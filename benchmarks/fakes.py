@@ -0,0 +1,83 @@
+"""
+Substitutos locais e determinísticos para os serviços externos do pipeline.
+- FakeChatModel: LLM que responde sem rede, com latência simulada.
+- build_pipeline: RAGPipeline sobre um Qdrant em memória.
+"""
+
+import time
+import asyncio
+from typing import Any, Iterator, List, Optional
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models import SimpleChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from qdrant_client import QdrantClient
+from embedding_models import embedding_dimension
+from hashing import text_sha256
+
+
+class FakeChatModel(SimpleChatModel):
+    """Modelo de chat determinístico: a resposta depende apenas do prompt.
+
+    `latency` simula o tempo até o primeiro token e `token_delay` o intervalo
+    entre tokens, inclusive nas chamadas assíncronas (sem ocupar threads).
+    """
+
+    latency: float = 0.0
+    token_delay: float = 0.0
+    answer_words: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-deterministic"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        digest = text_sha256(str(messages[-1].content))
+        words = [f"resposta-{digest[i % 56:i % 56 + 8]}" for i in range(self.answer_words)]
+        return [words[0]] + [f" {word}" for word in words[1:]]
+
+    def _duration(self, tokens: List[str]) -> float:
+        return self.latency + self.token_delay * len(tokens)
+
+    def _call(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+              run_manager: Any = None, **kwargs: Any) -> str:
+        tokens = self._tokens(messages)
+        time.sleep(self._duration(tokens))
+        return "".join(tokens)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for token in self._tokens(messages):
+            time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self._duration(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+
+def fake_embeddings(model_name: str) -> Embeddings:
+    """Embeddings determinísticos com a mesma dimensão do modelo configurado."""
+    return DeterministicFakeEmbedding(size=embedding_dimension(model_name) or 384)
+
+
+def build_pipeline(embeddings: Optional[Embeddings] = None, llm_latency: float = 0.0,
+                   token_delay: float = 0.0):
+    """Cria um RAGPipeline com Qdrant em memória, LLM falso e os embeddings informados.
+
+    Args:
+        embeddings: Modelo de embeddings (padrão: embeddings determinísticos falsos)
+        llm_latency: Segundos até o primeiro token do LLM falso
+        token_delay: Segundos entre tokens do LLM falso
+    """
+    from config import config
+    from rag_pipeline import RAGPipeline
+
+    return RAGPipeline(
+        client=QdrantClient(":memory:"),
+        embeddings=embeddings or fake_embeddings(config.EMBEDDING_MODEL),
+        llm=FakeChatModel(latency=llm_latency, token_delay=token_delay),
+    )
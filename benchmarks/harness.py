@@ -0,0 +1,259 @@
+"""
+Execução dos estágios do benchmark, coleta de métricas e comparação com uma linha de base.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+from benchmarks.corpus import generate_corpus, generate_questions
+
+# Métricas em que valores maiores são melhores; nas demais, menores são melhores
+_HIGHER_IS_BETTER_SUFFIXES = ("_per_s",)
+# Métricas informativas, que não entram na comparação
+_INFORMATIVE = ("files", "chunks", "queries", "failed_files")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil `q` (0-100) com interpolação linear."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class PeakRSSSampler:
+    """Amostra a memória residente do processo numa thread e guarda o pico.
+
+    Sem /proc (ex.: macOS) usa o pico do processo inteiro via getrusage, que
+    não é reiniciado entre estágios. Processos de carregamento não entram na conta.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, _current_rss_bytes() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if _current_rss_bytes() is not None:
+            self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak_bytes = max(self.peak_bytes, _current_rss_bytes() or 0)
+        else:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak_bytes = max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak_bytes / (1024 * 1024)
+
+
+@contextmanager
+def _config_overrides(**values):
+    """Altera atributos do Config durante o benchmark e os restaura ao final."""
+    previous = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+
+def _latency_metrics(latencies: List[float], prefix: str = "latency") -> Dict[str, float]:
+    milliseconds = [latency * 1000 for latency in latencies]
+    return {
+        f"{prefix}_p50_ms": percentile(milliseconds, 50),
+        f"{prefix}_p95_ms": percentile(milliseconds, 95),
+        f"{prefix}_p99_ms": percentile(milliseconds, 99),
+    }
+
+
+def _timed_stage(function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Executa um estágio medindo duração e pico de memória."""
+    with PeakRSSSampler() as sampler:
+        started_at = time.perf_counter()
+        metrics = function()
+        duration = time.perf_counter() - started_at
+    return {"duration_s": duration, **metrics, "peak_rss_mb": sampler.peak_mb}
+
+
+def run_benchmark(documents: int = 20, mix: Optional[Dict[str, int]] = None, queries: int = 50,
+                  seed: int = 42, paragraphs: int = 20, rows: int = 200, llm_latency: float = 0.0,
+                  token_delay: float = 0.0, concurrency: Optional[int] = None, embeddings=None,
+                  corpus_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Executa os estágios de ingestão e consulta e retorna os resultados.
+
+    Estágios: ingest (corpus novo), reingest (corpus inalterado), query (answer
+    sequencial), query_stream (tempo até o primeiro token) e query_batch (answer_many).
+    Os caches de embeddings e de respostas ficam desativados para medir o caminho completo.
+    """
+    from benchmarks.fakes import build_pipeline
+
+    mix = mix or {"txt": 1, "pdf": 1, "csv": 1, "xlsx": 1}
+    parameters = {
+        "documents": documents, "mix": mix, "queries": queries, "seed": seed, "paragraphs": paragraphs,
+        "rows": rows, "llm_latency": llm_latency, "token_delay": token_delay, "concurrency": concurrency,
+        "embeddings": type(embeddings).__name__ if embeddings is not None else "DeterministicFakeEmbedding",
+    }
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    with tempfile.TemporaryDirectory(prefix="rag-benchmark-") as temporary_dir, \
+         _config_overrides(EMBEDDING_CACHE_ENABLED=False, ANSWER_CACHE_MAX_ENTRIES=0,
+                           COLLECTION_NAME="benchmark"):
+        file_paths = generate_corpus(corpus_dir or temporary_dir, documents, mix, seed, paragraphs, rows)
+        questions = generate_questions(queries, seed)
+        pipeline = build_pipeline(embeddings, llm_latency, token_delay)
+
+        def _ingest() -> Dict[str, Any]:
+            pipeline.add_documents(file_paths)
+            return {}
+
+        stages["ingest"] = _timed_stage(_ingest)
+        chunks = pipeline.client.count(pipeline.collection_name, exact=True).count
+        indexed = len(pipeline.get_filter_values("source"))
+        stages["ingest"].update({
+            "files": len(file_paths),
+            "failed_files": len(file_paths) - indexed,
+            "chunks": chunks,
+            "docs_per_s": indexed / stages["ingest"]["duration_s"],
+            "chunks_per_s": chunks / stages["ingest"]["duration_s"],
+        })
+
+        stages["reingest"] = _timed_stage(_ingest)
+        stages["reingest"]["docs_per_s"] = len(file_paths) / stages["reingest"]["duration_s"]
+
+        def _query() -> Dict[str, Any]:
+            latencies = []
+            for question in questions:
+                started_at = time.perf_counter()
+                pipeline.answer(question)
+                latencies.append(time.perf_counter() - started_at)
+            return {"queries": len(questions), **_latency_metrics(latencies)}
+
+        def _query_stream() -> Dict[str, Any]:
+            first_tokens = []
+            for question in questions:
+                stream = pipeline.answer_stream(question)
+                for _ in stream:
+                    pass
+                first_tokens.append(stream.time_to_first_token or 0.0)
+            return {"queries": len(questions), **_latency_metrics(first_tokens, prefix="ttft")}
+
+        def _query_batch() -> Dict[str, Any]:
+            pipeline.answer_many(questions, concurrency=concurrency)
+            return {"queries": len(questions)}
+
+        stages["query"] = _timed_stage(_query)
+        stages["query"]["queries_per_s"] = len(questions) / stages["query"]["duration_s"]
+        stages["query_stream"] = _timed_stage(_query_stream)
+        stages["query_batch"] = _timed_stage(_query_batch)
+        stages["query_batch"]["queries_per_s"] = len(questions) / stages["query_batch"]["duration_s"]
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "parameters": parameters,
+        },
+        "stages": stages,
+    }
+
+
+@dataclass
+class Comparison:
+    """Variação de uma métrica em relação à linha de base."""
+    stage: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # variação relativa; positiva = piora
+    regression: bool
+
+
+def _is_compared(metric: str) -> bool:
+    return metric not in _INFORMATIVE
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.10) -> List[Comparison]:
+    """Compara as métricas de `results` com `baseline`.
+
+    Uma métrica regride quando piora mais que `tolerance` (fração) em relação à base:
+    throughput (`*_per_s`) menor, ou duração, latência e memória maiores.
+    """
+    comparisons = []
+    for stage, metrics in results["stages"].items():
+        baseline_metrics = baseline.get("stages", {}).get(stage, {})
+        for metric, current in metrics.items():
+            reference = baseline_metrics.get(metric)
+            if not _is_compared(metric) or not isinstance(reference, (int, float)) or not reference:
+                continue
+            change = (current - reference) / reference
+            if metric.endswith(_HIGHER_IS_BETTER_SUFFIXES):
+                change = -change
+            comparisons.append(Comparison(stage, metric, reference, current, change, change > tolerance))
+    return comparisons
+
+
+def format_report(results: Dict[str, Any], comparisons: Optional[List[Comparison]] = None) -> str:
+    """Formata os resultados (e a comparação, se houver) como texto."""
+    lines = ["Variação em relação à linha de base: positiva = pior."] if comparisons else []
+    changes = {(c.stage, c.metric): c for c in comparisons or []}
+    for stage, metrics in results["stages"].items():
+        lines.append(f"[{stage}]")
+        for metric, value in metrics.items():
+            line = f"  {metric:<20} {value:>12.3f}" if isinstance(value, float) else f"  {metric:<20} {value:>12}"
+            comparison = changes.get((stage, metric))
+            if comparison is not None:
+                flag = "  REGRESSÃO" if comparison.regression else ""
+                line += f"   base {comparison.baseline:>12.3f}  ({comparison.change:+.1%}){flag}"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def save_results(results: Dict[str, Any], path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,152 @@
+"""
+Divisão dos documentos em chunks conforme o tipo da fonte (metadata["type"]).
+
+- Tabelas (CSV/Excel): linhas consecutivas da mesma planilha são agrupadas num único
+  chunk de até config.TABLE_CHUNK_TOKENS tokens, precedido de um cabeçalho com o
+  arquivo, a planilha e o intervalo de linhas, em vez de um vetor por linha.
+- Transcrições (áudio/vídeo): segmentos consecutivos são unidos até
+  config.CHUNK_TOKENS tokens, cortando sempre entre segmentos; um segmento maior que
+  o limite é dividido entre frases, com `start`/`end` proporcionais.
+- Demais documentos: RecursiveCharacterTextSplitter medido em tokens
+  (config.CHUNK_TOKENS, sobreposição de config.CHUNK_OVERLAP_TOKENS).
+"""
+
+import os
+import re
+import logging
+from typing import Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from config import config
+from context_packing import Tokenizer, get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+TABLE_TYPES = {"csv", "excel"}
+TRANSCRIPT_TYPES = {"audio", "video"}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+class _Pack:
+    """Documentos consecutivos que formarão um único chunk."""
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.documents: List[Document] = []
+        self.tokens = 0
+
+    def add(self, document: Document, tokens: int):
+        self.documents.append(document)
+        self.tokens += tokens
+
+
+class DocumentChunker:
+    """Splitter que escolhe a estratégia de divisão pelo tipo do documento.
+
+    Args:
+        chunk_tokens: Tamanho máximo dos chunks de texto e transcrição (padrão: config.CHUNK_TOKENS)
+        chunk_overlap_tokens: Sobreposição entre chunks de texto (padrão: config.CHUNK_OVERLAP_TOKENS)
+        table_chunk_tokens: Tamanho máximo dos chunks de tabela (padrão: config.TABLE_CHUNK_TOKENS)
+        tokenizer: Contador de tokens (padrão: get_tokenizer())
+    """
+
+    def __init__(self, chunk_tokens: Optional[int] = None, chunk_overlap_tokens: Optional[int] = None,
+                 table_chunk_tokens: Optional[int] = None, tokenizer: Optional[Tokenizer] = None):
+        self.chunk_tokens = chunk_tokens or config.CHUNK_TOKENS
+        self.chunk_overlap_tokens = config.CHUNK_OVERLAP_TOKENS if chunk_overlap_tokens is None else chunk_overlap_tokens
+        self.table_chunk_tokens = table_chunk_tokens or config.TABLE_CHUNK_TOKENS
+        self.tokenizer = tokenizer or get_tokenizer()
+        self._text_splitter = None
+
+    @property
+    def text_splitter(self):
+        if self._text_splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            # start_index permite unir chunks vizinhos ao montar o contexto (ver context_packing)
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_tokens,
+                chunk_overlap=min(self.chunk_overlap_tokens, self.chunk_tokens // 2),
+                length_function=self.tokenizer.count,
+                add_start_index=True,
+            )
+        return self._text_splitter
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return list(self.iter_chunks(documents))
+
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Gera os chunks na ordem dos documentos; tabelas e transcrições são agrupadas
+        enquanto chegam, então `documents` pode ser um gerador (ex.: `lazy_load`)."""
+        pack: Optional[_Pack] = None
+        for document in documents:
+            doc_type = document.metadata.get("type")
+            if doc_type not in TABLE_TYPES and doc_type not in TRANSCRIPT_TYPES:
+                if pack is not None:
+                    yield from self._flush(pack)
+                    pack = None
+                yield from self.text_splitter.split_documents([document])
+                continue
+
+            key = (document.metadata.get("source"), doc_type, document.metadata.get("sheet"))
+            limit = self.table_chunk_tokens if doc_type in TABLE_TYPES else self.chunk_tokens
+            tokens = self.tokenizer.count(document.page_content) + 1  # separador
+            if pack is not None and (pack.key != key or pack.tokens + tokens > limit):
+                yield from self._flush(pack)
+                pack = None
+            if pack is None:
+                pack = _Pack(key)
+            pack.add(document, tokens)
+
+        if pack is not None:
+            yield from self._flush(pack)
+
+    def _flush(self, pack: _Pack) -> Iterator[Document]:
+        if pack.key[1] in TABLE_TYPES:
+            yield self._table_chunk(pack.documents)
+        else:
+            yield from self._transcript_chunks(pack.documents)
+
+    @staticmethod
+    def _table_chunk(rows: List[Document]) -> Document:
+        first, last = rows[0].metadata, rows[-1].metadata
+        header = os.path.basename(str(first.get("source", "")))
+        if first.get("sheet") is not None:
+            header += f" | planilha {first['sheet']}"
+        header += f" | linhas {first.get('row')} a {last.get('row')}"
+        metadata = {**first, "row_end": last.get("row")}
+        text = "\n\n".join([header] + [row.page_content for row in rows])
+        return Document(page_content=text, metadata=metadata)
+
+    def _transcript_chunks(self, segments: List[Document]) -> Iterator[Document]:
+        if len(segments) == 1 and self.tokenizer.count(segments[0].page_content) > self.chunk_tokens:
+            yield from self._split_segment(segments[0])
+            return
+        metadata = {**segments[0].metadata, "end": segments[-1].metadata.get("end")}
+        yield Document(page_content=" ".join(s.page_content for s in segments), metadata=metadata)
+
+    def _split_segment(self, segment: Document) -> Iterator[Document]:
+        """Divide um segmento longo entre frases, estimando o tempo de cada parte pela posição no texto."""
+        text = segment.page_content
+        start, end = segment.metadata.get("start"), segment.metadata.get("end")
+        sentences = [s for s in _SENTENCE_END.split(text) if s]
+
+        parts, current, tokens = [], [], 0
+        for sentence in sentences:
+            sentence_tokens = self.tokenizer.count(sentence) + 1
+            if current and tokens + sentence_tokens > self.chunk_tokens:
+                parts.append(" ".join(current))
+                current, tokens = [], 0
+            current.append(sentence)
+            tokens += sentence_tokens
+        if current:
+            parts.append(" ".join(current))
+
+        total = sum(len(part) for part in parts)
+        offset = 0
+        for part in parts:
+            metadata = dict(segment.metadata)
+            if start is not None and end is not None:
+                metadata["start"] = start + (end - start) * offset / total
+                metadata["end"] = start + (end - start) * (offset + len(part)) / total
+            offset += len(part)
+            yield Document(page_content=part, metadata=metadata)
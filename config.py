@@ -12,22 +12,118 @@ class Config:
     
     # Caminhos e Nomes
     QDRANT_PATH = os.getenv("QDRANT_PATH", "qdrant_db")
+    QDRANT_URL = os.getenv("QDRANT_URL")  # servidor Qdrant; vazio = banco local em QDRANT_PATH
+    QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
     COLLECTION_NAME = os.getenv("COLLECTION_NAME", "rag_documents")
     DATA_DIR = os.getenv("DATA_DIR", "data")
     
     # Configurações do Modelo
     MODEL_NAME = os.getenv("MODEL_NAME", "llama-3.3-70b-versatile")
     
+    # Configurações de Embeddings
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+    EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "0"))  # 0 = tabela de modelos conhecidos
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache/embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+    
+    # Configurações do Índice Vetorial (aplicadas na criação da coleção; ver vector_index.py)
+    QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"  # vetores originais em memmap
+    QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()  # none, scalar, binary
+    QDRANT_QUANTIZATION_QUANTILE = float(os.getenv("QDRANT_QUANTIZATION_QUANTILE", "0.99"))
+    QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+    QDRANT_RESCORE = os.getenv("QDRANT_RESCORE", "true").lower() == "true"
+    QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+    QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+    QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+    QDRANT_HNSW_EF = int(os.getenv("QDRANT_HNSW_EF", "128"))  # candidatos na busca
+    QDRANT_HNSW_ON_DISK = os.getenv("QDRANT_HNSW_ON_DISK", "false").lower() == "true"
+    QDRANT_INDEXING_THRESHOLD = int(os.getenv("QDRANT_INDEXING_THRESHOLD", "20000"))  # KB
+    QDRANT_MEMMAP_THRESHOLD = int(os.getenv("QDRANT_MEMMAP_THRESHOLD", "0"))  # KB; 0 = padrão do Qdrant
+    
+    # Configurações de Consulta
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()  # dense, hybrid (denso + BM25 com RRF)
+    HYBRID_PREFETCH_K = int(os.getenv("HYBRID_PREFETCH_K", "20"))  # candidatos de cada busca antes da fusão
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))  # 0 desativa o cache
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # similaridade de cosseno
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    
+    # Configurações de Concorrência do LLM
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))  # 0 = sem limite
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    
     # Configurações de Chunking
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "type_aware")  # type_aware ou characters (CHUNK_SIZE/CHUNK_OVERLAP)
+    CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "256"))  # texto e transcrições
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+    TABLE_CHUNK_TOKENS = int(os.getenv("TABLE_CHUNK_TOKENS", "400"))  # linhas de CSV/Excel agrupadas por chunk
+    
+    # Configurações de Carregamento
+    LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", str(os.cpu_count() or 1)))
+    LOADER_TIMEOUT_SECONDS = int(os.getenv("LOADER_TIMEOUT_SECONDS", "900"))
+    CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "50000"))
+    
+    # Configurações de Parsing dos documentos de texto (auto, fast ou unstructured)
+    PARSING_STRATEGY = os.getenv("PARSING_STRATEGY", "auto")
+    PARSING_STRATEGY_OVERRIDES = os.getenv("PARSING_STRATEGY_OVERRIDES", "")  # ex.: "pdf=unstructured,docx=fast"
+    PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", str(os.cpu_count() or 1)))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))  # PDFs menores são lidos em sequência
+    PDF_MIN_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_CHARS_PER_PAGE", "20"))  # abaixo disso a página conta como digitalizada
+    
+    # Configurações de Ingestão em fluxo
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))  # chunks por lote de embedding
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))  # lotes prontos aguardando embedding
+    INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))  # jobs de ingestão simultâneos
+    INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "50"))  # jobs concluídos mantidos para consulta
+    INGEST_JOB_POLL_SECONDS = float(os.getenv("INGEST_JOB_POLL_SECONDS", "2"))  # atualização do progresso na interface
+    
+    # Snapshots da coleção (ver snapshots.py)
+    SNAPSHOT_RESTORE_PATH = os.getenv("SNAPSHOT_RESTORE_PATH", "")  # importado na inicialização (server.py, main.py) se a coleção estiver vazia
+    
+    # Configurações de Reranking (cross-encoder local sobre os candidatos da busca)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "Xenova/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # candidatos buscados; os RETRIEVAL_K melhores seguem
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    RERANK_TIMEOUT_MS = int(os.getenv("RERANK_TIMEOUT_MS", "500"))  # acima disso mantém a ordem da busca; 0 = sem limite
+    RERANK_CACHE_MAX_ENTRIES = int(os.getenv("RERANK_CACHE_MAX_ENTRIES", "10000"))  # scores (pergunta, chunk) em cache
+    
+    # Configurações do Contexto enviado ao LLM
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))  # 0 = sem limite
+    CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")  # codificação do tiktoken
+    CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.9"))  # trechos quase idênticos são descartados
+    
+    # Configurações de Inicialização
+    WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "true").lower() == "true"  # carrega modelos em segundo plano
+    
+    # Configurações do Servidor HTTP
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))  # processos; mais de 1 exige QDRANT_URL e desativa /ingest
+    
+    # Configurações de Métricas e Perfil
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "false").lower() == "true"  # uma linha JSON por estágio
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"  # permite perfilar perguntas na interface
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
     
     # Configurações de Upload
     MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", "200"))
+    UPLOAD_MAX_AGE_HOURS = float(os.getenv("UPLOAD_MAX_AGE_HOURS", "168"))  # uploads sem uso são removidos; 0 = nunca
+    UPLOAD_QUOTA_MB = int(os.getenv("UPLOAD_QUOTA_MB", "10240"))  # espaço máximo dos uploads; 0 = sem limite
     
     # Configurações de Áudio/Vídeo
     WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")  # tiny, base, small, medium, large
     USE_LOCAL_WHISPER = os.getenv("USE_LOCAL_WHISPER", "true").lower() == "true"
+    WHISPER_DEVICE = os.getenv("WHISPER_DEVICE")  # cpu, cuda; vazio = automático
+    WHISPER_CACHE_MAX_MB = int(os.getenv("WHISPER_CACHE_MAX_MB", "4096"))
+    MEDIA_SEGMENT_SECONDS = int(os.getenv("MEDIA_SEGMENT_SECONDS", "30"))
+    MEDIA_TRANSCRIBE_WORKERS = int(os.getenv("MEDIA_TRANSCRIBE_WORKERS", "2"))
 
     @classmethod
     def validate(cls):
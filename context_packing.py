@@ -0,0 +1,235 @@
+"""
+Empacotamento do contexto recuperado antes da chamada ao LLM.
+Os chunks recuperados são agrupados por trecho de origem, chunks sobrepostos ou
+adjacentes são unidos (a sobreposição repete texto entre vizinhos), quase
+duplicatas são descartadas e o resultado é cortado num orçamento de tokens.
+Cada trecho é precedido de um rótulo curto da fonte, ex.: "[1] contrato.pdf p.3".
+"""
+
+import os
+import re
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from config import config
+from metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Metadados que variam entre chunks do mesmo trecho e não identificam a origem
+_CHUNK_KEYS = {"chunk_hash", "file_hash", "start_index"}
+# Sobreposição mínima (em caracteres) para unir chunks sem posição conhecida
+_MIN_TEXT_OVERLAP = 20
+# Orçamento mínimo para incluir um trecho truncado em vez de descartá-lo
+_MIN_TRUNCATED_TOKENS = 32
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+class Tokenizer:
+    """Conta e trunca tokens com o tiktoken, ou pela estimativa de 4 caracteres por token.
+
+    A codificação é carregada no primeiro uso; se o tiktoken não estiver disponível ou
+    não conseguir obter a codificação (ex.: sem rede), usa a estimativa.
+    """
+
+    def __init__(self, encoding_name: Optional[str] = None):
+        self.encoding_name = encoding_name or config.CONTEXT_TOKENIZER
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        logger.warning(f"Tokenizador '{self.encoding_name}' indisponível ({e}); usando estimativa de tokens.")
+                    self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:max_tokens * 4]
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max_tokens])
+
+
+_default_tokenizer: Optional[Tokenizer] = None
+
+
+def get_tokenizer() -> Tokenizer:
+    """Tokenizador compartilhado do processo (config.CONTEXT_TOKENIZER)."""
+    global _default_tokenizer
+    if _default_tokenizer is None or _default_tokenizer.encoding_name != config.CONTEXT_TOKENIZER:
+        _default_tokenizer = Tokenizer()
+    return _default_tokenizer
+
+
+@dataclass
+class _Passage:
+    """Trecho contínuo de uma fonte, formado por um ou mais chunks."""
+    text: str
+    metadata: Dict[str, Any]
+    rank: int  # melhor posição entre os chunks na ordem da recuperação
+    start: Optional[int] = None
+    chunks: int = 1
+
+
+@dataclass
+class PackedContext:
+    """Contexto pronto para o prompt."""
+    text: str
+    tokens: int
+    passages: List[Document] = field(default_factory=list)
+    dropped: int = 0  # trechos descartados por duplicidade ou orçamento
+
+
+def source_label(metadata: Dict[str, Any]) -> str:
+    """Rótulo curto da fonte: arquivo e, se houver, página, planilha, linha ou tempo."""
+    parts = [os.path.basename(str(metadata.get("source", "?")))]
+    if "page_number" in metadata or "page" in metadata:
+        parts.append(f"p.{metadata.get('page_number', metadata.get('page'))}")
+    if "sheet" in metadata:
+        parts.append(str(metadata["sheet"]))
+    if "row" in metadata:
+        row_end = metadata.get("row_end", metadata["row"])
+        parts.append(f"l.{metadata['row']}" if row_end == metadata["row"] else f"l.{metadata['row']}-{row_end}")
+    if "start" in metadata:
+        seconds = int(metadata["start"])
+        parts.append(f"{seconds // 60:02d}:{seconds % 60:02d}")
+    return " ".join(parts)
+
+
+def _group_key(metadata: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((key, str(value)) for key, value in metadata.items() if key not in _CHUNK_KEYS))
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Tamanho do maior sufixo de `left` que é prefixo de `right` (0 se menor que o mínimo)."""
+    for size in range(min(len(left), len(right)), _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_by_offset(left: _Passage, right: _Passage) -> Optional[_Passage]:
+    """Une pelos `start_index`, desde que o texto na região sobreposta coincida."""
+    if right.start < left.start:
+        left, right = right, left
+    end = left.start + len(left.text)
+    if right.start > end:
+        return None
+    overlap = end - right.start
+    # Offsets de outra versão do arquivo não descrevem o texto atual
+    if overlap and not left.text.endswith(right.text[:overlap]):
+        return None
+    return _Passage(left.text + right.text[overlap:], left.metadata, min(left.rank, right.rank),
+                    left.start, left.chunks + right.chunks)
+
+
+def _merge(left: _Passage, right: _Passage) -> Optional[_Passage]:
+    """Une dois trechos da mesma fonte se forem sobrepostos ou adjacentes."""
+    if left.start is not None and right.start is not None:
+        return _merge_by_offset(left, right)
+    overlap = _text_overlap(left.text, right.text)
+    if not overlap:
+        overlap = _text_overlap(right.text, left.text)
+        if not overlap:
+            return None
+        left, right = right, left
+    text = left.text + right.text[overlap:]
+    return _Passage(text, left.metadata, min(left.rank, right.rank), left.start, left.chunks + right.chunks)
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORDS.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _is_near_duplicate(shingles: set, kept: List[set], threshold: float) -> bool:
+    for other in kept:
+        intersection = len(shingles & other)
+        # Contido em outro trecho, ou quase igual a ele
+        if intersection >= threshold * len(shingles) or intersection >= threshold * len(shingles | other):
+            return True
+    return False
+
+
+def merge_passages(documents: List[Document]) -> List[_Passage]:
+    """Une os chunks sobrepostos ou adjacentes de cada fonte, na ordem da recuperação."""
+    groups: Dict[Tuple, List[_Passage]] = {}
+    for rank, doc in enumerate(documents):
+        passage = _Passage(doc.page_content, doc.metadata, rank, doc.metadata.get("start_index"))
+        passages = groups.setdefault(_group_key(doc.metadata), [])
+        # Um chunk novo pode ligar dois trechos já existentes, então repete até estabilizar
+        merged = True
+        while merged:
+            merged = False
+            for i, other in enumerate(passages):
+                combined = _merge(other, passage)
+                if combined is not None:
+                    passage = combined
+                    del passages[i]
+                    merged = True
+                    break
+        passages.append(passage)
+    return sorted((p for passages in groups.values() for p in passages), key=lambda p: p.rank)
+
+
+def pack_context(documents: List[Document], max_tokens: Optional[int] = None,
+                 tokenizer: Optional[Tokenizer] = None,
+                 dedup_threshold: Optional[float] = None) -> PackedContext:
+    """Monta o contexto do prompt a partir dos documentos recuperados.
+
+    Args:
+        documents: Chunks na ordem da recuperação (mais relevantes primeiro)
+        max_tokens: Orçamento de tokens do contexto (padrão: config.CONTEXT_MAX_TOKENS; 0 = sem limite)
+        tokenizer: Contador de tokens (padrão: get_tokenizer())
+        dedup_threshold: Fração de 3-gramas em comum acima da qual um trecho é
+            considerado duplicado (padrão: config.CONTEXT_DEDUP_THRESHOLD)
+    """
+    max_tokens = config.CONTEXT_MAX_TOKENS if max_tokens is None else max_tokens
+    dedup_threshold = config.CONTEXT_DEDUP_THRESHOLD if dedup_threshold is None else dedup_threshold
+    tokenizer = tokenizer or get_tokenizer()
+
+    blocks, passages, kept_shingles = [], [], []
+    used_tokens, dropped = 0, 0
+    for passage in merge_passages(documents):
+        shingles = _shingles(passage.text)
+        if _is_near_duplicate(shingles, kept_shingles, dedup_threshold):
+            dropped += 1
+            continue
+
+        text = passage.text.strip()
+        block = f"[{len(blocks) + 1}] {source_label(passage.metadata)}\n{text}"
+        tokens = tokenizer.count(block) + 1  # separador entre blocos
+        if max_tokens and used_tokens + tokens > max_tokens:
+            remaining = max_tokens - used_tokens - (tokens - tokenizer.count(text))
+            if remaining < _MIN_TRUNCATED_TOKENS:
+                dropped += 1
+                continue
+            text = tokenizer.truncate(text, remaining)
+            block = f"[{len(blocks) + 1}] {source_label(passage.metadata)}\n{text}"
+            tokens = tokenizer.count(block) + 1
+
+        blocks.append(block)
+        kept_shingles.append(shingles)
+        passages.append(Document(page_content=text, metadata=passage.metadata))
+        used_tokens += tokens
+
+    return PackedContext(text="\n\n".join(blocks), tokens=used_tokens, passages=passages, dropped=dropped)
@@ -4,206 +4,360 @@ Suporta: TXT, PDF, MD, DOCX, HTML, CSV, XLSX, áudio e vídeo.
 """
 
 import os
+import math
+import time
+import signal
 import logging
-from typing import List, Optional
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 from langchain.schema import Document
 from langchain_community.document_loaders import UnstructuredFileLoader
+from config import config
+from ingestion import IngestionCancelled
+from media_streaming import iter_audio_segments, transcribe_segments
+from metrics import count, record_stage, timed_iter
 
 logger = logging.getLogger(__name__)
 
 
+def _rows_to_texts(df) -> List[str]:
+    """Monta o texto "coluna: valor" de cada linha operando coluna a coluna.
+    
+    Equivale a formatar cada linha com `iterrows`, mas usa operações vetorizadas
+    de string do pandas em vez de um laço Python por linha.
+    """
+    if df.empty or len(df.columns) == 0:
+        return [""] * len(df)
+    
+    text = None
+    for position, column in enumerate(df.columns):
+        column_values = df.iloc[:, position]
+        # Células vazias viram "nan", como no texto de iterrows; a máscara vem antes do
+        # astype(str) porque, conforme a versão do pandas, o cast mantém o NaN
+        values = column_values.astype(str).where(column_values.notna(), "nan")
+        part = f"{column}: " + values
+        text = part if text is None else text + "\n" + part
+    return text.tolist()
+
+
 class CSVLoader:
-    """Loader para arquivos CSV."""
+    """Loader para arquivos CSV, lido em blocos de linhas."""
     
-    def __init__(self, file_path: str, encoding: str = 'utf-8'):
+    def __init__(self, file_path: str, encoding: str = 'utf-8', chunksize: Optional[int] = None):
         self.file_path = file_path
         self.encoding = encoding
+        self.chunksize = chunksize or config.CSV_CHUNK_ROWS
+    
+    def lazy_load(self) -> Iterator[Document]:
+        """Gera um documento por linha, mantendo em memória apenas um bloco do arquivo."""
+        import pandas as pd
+        
+        total_rows = 0
+        with pd.read_csv(self.file_path, encoding=self.encoding, chunksize=self.chunksize) as reader:
+            for chunk in reader:
+                for idx, content in zip(chunk.index.tolist(), _rows_to_texts(chunk)):
+                    metadata = {
+                        "source": self.file_path,
+                        "row": idx,
+                        "type": "csv"
+                    }
+                    yield Document(page_content=content, metadata=metadata)
+                total_rows += len(chunk)
+        
+        logger.info(f"CSV carregado: {total_rows} linhas de {self.file_path}")
     
     def load(self) -> List[Document]:
         """Carrega e processa arquivo CSV."""
         try:
-            import pandas as pd
-            
-            df = pd.read_csv(self.file_path, encoding=self.encoding)
-            
-            # Converte cada linha em um documento
-            documents = []
-            for idx, row in df.iterrows():
-                # Cria texto formatado da linha
-                content = "\n".join([f"{col}: {val}" for col, val in row.items()])
-                
-                metadata = {
-                    "source": self.file_path,
-                    "row": idx,
-                    "type": "csv"
-                }
-                
-                documents.append(Document(page_content=content, metadata=metadata))
-            
-            logger.info(f"CSV carregado: {len(documents)} linhas de {self.file_path}")
-            return documents
-            
+            return list(self.lazy_load())
         except Exception as e:
             logger.error(f"Erro ao carregar CSV {self.file_path}: {e}")
             raise
 
 
 class ExcelLoader:
-    """Loader para arquivos Excel (XLSX)."""
+    """Loader para arquivos Excel (XLSX), lido uma planilha por vez."""
     
     def __init__(self, file_path: str, sheet_name: Optional[str] = None):
         self.file_path = file_path
         self.sheet_name = sheet_name  # None = todas as planilhas
     
-    def load(self) -> List[Document]:
-        """Carrega e processa arquivo Excel."""
-        try:
-            import pandas as pd
-            
+    def lazy_load(self) -> Iterator[Document]:
+        """Gera um documento por linha, mantendo em memória apenas a planilha atual."""
+        import pandas as pd
+        
+        total_rows = 0
+        with pd.ExcelFile(self.file_path) as workbook:
             # Lê todas as planilhas ou uma específica
-            if self.sheet_name:
-                dfs = {self.sheet_name: pd.read_excel(self.file_path, sheet_name=self.sheet_name)}
-            else:
-                dfs = pd.read_excel(self.file_path, sheet_name=None)
+            sheet_names = [self.sheet_name] if self.sheet_name else workbook.sheet_names
             
-            documents = []
-            
-            for sheet_name, df in dfs.items():
-                for idx, row in df.iterrows():
-                    # Cria texto formatado da linha
-                    content = "\n".join([f"{col}: {val}" for col, val in row.items()])
-                    
+            for sheet_name in sheet_names:
+                df = workbook.parse(sheet_name)
+                for idx, content in zip(df.index.tolist(), _rows_to_texts(df)):
                     metadata = {
                         "source": self.file_path,
                         "sheet": sheet_name,
                         "row": idx,
                         "type": "excel"
                     }
-                    
-                    documents.append(Document(page_content=content, metadata=metadata))
-            
-            logger.info(f"Excel carregado: {len(documents)} linhas de {len(dfs)} planilha(s) de {self.file_path}")
-            return documents
-            
+                    yield Document(page_content=content, metadata=metadata)
+                total_rows += len(df)
+        
+        logger.info(f"Excel carregado: {total_rows} linhas de {len(sheet_names)} planilha(s) de {self.file_path}")
+    
+    def load(self) -> List[Document]:
+        """Carrega e processa arquivo Excel."""
+        try:
+            return list(self.lazy_load())
         except Exception as e:
             logger.error(f"Erro ao carregar Excel {self.file_path}: {e}")
             raise
 
 
-class AudioLoader:
-    """Loader para arquivos de áudio (MP3, WAV, M4A)."""
+class _MediaLoader:
+    """Base dos loaders de mídia: transcreve o áudio em segmentos com o Whisper.
     
-    def __init__(self, file_path: str, model_size: str = "base"):
+    Gera um Document por segmento com `start`/`end` (em segundos) nos metadados.
+    Se `cancel_event` for sinalizado, a transcrição para entre dois segmentos.
+    """
+    
+    media_type = "audio"
+    language: Optional[str] = None
+    
+    def __init__(self, file_path: str, model_size: Optional[str] = None,
+                 cancel_event: Optional[threading.Event] = None):
         self.file_path = file_path
-        self.model_size = model_size  # tiny, base, small, medium, large
+        self.model_size = model_size or config.WHISPER_MODEL  # tiny, base, small, medium, large
+        self.cancel_event = cancel_event
     
-    def load(self) -> List[Document]:
-        """Transcreve áudio usando Whisper."""
-        try:
-            import whisper
-            
-            logger.info(f"Carregando modelo Whisper '{self.model_size}'...")
-            model = whisper.load_model(self.model_size)
-            
-            logger.info(f"Transcrevendo áudio: {self.file_path}")
-            result = model.transcribe(self.file_path)
+    def _transcribe(self) -> List[Document]:
+        options = {"language": self.language} if self.language else {}
+        segments = iter_audio_segments(self.file_path)
+        
+        documents = []
+        transcribed = timed_iter(
+            transcribe_segments(segments, model_size=self.model_size, cancel_event=self.cancel_event, **options),
+            "transcription", media=self.media_type,
+        )
+        for segment, result in transcribed:
+            count("rag_audio_seconds_total", segment.end - segment.start, media=self.media_type)
+            text = result["text"].strip()
+            if not text:
+                continue
             
             metadata = {
                 "source": self.file_path,
-                "type": "audio",
-                "language": result.get("language", "unknown")
+                "type": self.media_type,
+                "language": result.get("language", "unknown"),
+                "segment": segment.index,
+                "start": segment.start,
+                "end": segment.end,
             }
+            documents.append(Document(page_content=text, metadata=metadata))
+        return documents
+
+
+class AudioLoader(_MediaLoader):
+    """Loader para arquivos de áudio (MP3, WAV, M4A)."""
+    
+    media_type = "audio"
+    
+    def load(self) -> List[Document]:
+        """Transcreve áudio usando Whisper."""
+        try:
+            logger.info(f"Transcrevendo áudio: {self.file_path}")
+            documents = self._transcribe()
             
-            document = Document(page_content=result["text"], metadata=metadata)
-            
-            logger.info(f"Áudio transcrito com sucesso: {len(result['text'])} caracteres")
-            return [document]
+            logger.info(f"Áudio transcrito com sucesso: {len(documents)} segmento(s) com fala")
+            return documents
             
+        except IngestionCancelled:
+            raise
         except Exception as e:
             logger.error(f"Erro ao transcrever áudio {self.file_path}: {e}")
             raise
 
 
-class VideoLoader:
+class VideoLoader(_MediaLoader):
     """Loader para arquivos de vídeo (MP4, AVI, MOV)."""
     
-    def __init__(self, file_path: str, model_size: str = "base"):
-        self.file_path = file_path
-        self.model_size = model_size
+    media_type = "video"
+    language = "pt"
     
     def load(self) -> List[Document]:
-        """Extrai áudio do vídeo e transcreve."""
+        """Extrai o áudio do vídeo em segmentos e transcreve, sem arquivo temporário."""
         try:
-            import whisper
-            from moviepy import VideoFileClip  # MoviePy 2.x usa import direto
-            import tempfile
-            
-            # Extrai áudio do vídeo
-            logger.info(f"Extraindo áudio do vídeo: {self.file_path}")
-            video = VideoFileClip(self.file_path)
-            
-            # Verifica se o vídeo tem áudio
-            if video.audio is None:
-                video.close()
-                error_msg = f"O vídeo {self.file_path} não possui faixa de áudio."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
+            logger.info(f"Transcrevendo áudio do vídeo: {self.file_path}")
+            documents = self._transcribe()
             
-            # Salva áudio temporariamente
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio:
-                temp_audio_path = temp_audio.name
-            
-            logger.info(f"Salvando áudio temporário em: {temp_audio_path}")
-            video.audio.write_audiofile(temp_audio_path, logger=None)
-            video.close()
-            
-            # Transcreve o áudio
-            logger.info(f"Carregando modelo Whisper '{self.model_size}'...")
-            model = whisper.load_model(self.model_size)
-            
-            logger.info(f"Transcrevendo áudio do vídeo...")
-            result = model.transcribe(temp_audio_path, language='pt')
-            
-            # Remove arquivo temporário
-            try:
-                os.unlink(temp_audio_path)
-                logger.info(f"Arquivo temporário removido: {temp_audio_path}")
-            except Exception as e:
-                logger.warning(f"Não foi possível remover arquivo temporário {temp_audio_path}: {e}")
-            
-            metadata = {
-                "source": self.file_path,
-                "type": "video",
-                "language": result.get("language", "unknown")
-            }
-            
-            transcription_text = result["text"].strip()
-            
-            if not transcription_text:
+            if not documents:
                 logger.warning(f"Transcrição do vídeo {self.file_path} resultou em texto vazio.")
-                transcription_text = "[Vídeo sem fala detectada]"
-            
-            document = Document(page_content=transcription_text, metadata=metadata)
+                metadata = {
+                    "source": self.file_path,
+                    "type": self.media_type,
+                    "language": self.language,
+                }
+                documents = [Document(page_content="[Vídeo sem fala detectada]", metadata=metadata)]
             
-            logger.info(f"Vídeo transcrito com sucesso: {len(transcription_text)} caracteres")
-            return [document]
+            logger.info(f"Vídeo transcrito com sucesso: {len(documents)} segmento(s)")
+            return documents
             
+        except IngestionCancelled:
+            raise
         except Exception as e:
             logger.error(f"Erro ao processar vídeo {self.file_path}: {e}", exc_info=True)
             raise
 
 
+# Estratégias de parsing dos documentos de texto (config.PARSING_STRATEGY)
+PARSING_STRATEGIES = ("auto", "fast", "unstructured")
+
+# Fração de páginas sem camada de texto a partir da qual o PDF é tratado como digitalizado
+_SCANNED_PAGE_RATIO = 0.2
+
+
+def _pdf_page_count(file_path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Texto das páginas [start, end) do PDF; roda também nos processos do pool."""
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Divide as páginas em até `parts` intervalos contíguos de tamanho parecido."""
+    size = math.ceil(page_count / max(1, parts)) if page_count else 0
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size or 1)]
+
+
+def _markitdown_convert(file_path: str) -> str:
+    from markitdown import MarkItDown
+    return MarkItDown().convert(file_path).text_content
+
+
+class _NeedsFallback(Exception):
+    """A extração rápida não serve para o arquivo (ex.: PDF digitalizado)."""
+
+
+class TextDocumentLoader:
+    """Loader para documentos de texto (TXT, MD, PDF, DOCX, HTML) com estratégia por extensão.
+    
+    Estratégias:
+        fast: apenas a camada de texto — leitura direta de TXT/MD, pypdf por página
+            para PDF (páginas em paralelo nos PDFs grandes) e markitdown para DOCX/HTML
+        auto: como fast, mas recorre ao Unstructured em PDFs digitalizados ou quando a
+            extração rápida falha ou não encontra texto
+        unstructured: sempre o Unstructured (layout e OCR, bem mais lento)
+    
+    A estratégia vem de config.PARSING_STRATEGY, com exceções por extensão em
+    config.PARSING_STRATEGY_OVERRIDES; o parser usado fica no metadado `parser`.
+    """
+    
+    def __init__(self, file_path: str, strategy: Optional[str] = None):
+        self.file_path = file_path
+        self.extension = Path(file_path).suffix.lower().lstrip(".")
+        self.strategy = strategy or self.strategy_for(file_path)
+        if self.strategy not in PARSING_STRATEGIES:
+            raise ValueError(f"Estratégia de parsing inválida: {self.strategy}")
+    
+    @staticmethod
+    def strategy_for(file_path: str) -> str:
+        """Estratégia configurada para a extensão do arquivo."""
+        extension = Path(file_path).suffix.lower().lstrip(".")
+        for item in config.PARSING_STRATEGY_OVERRIDES.split(","):
+            key, _, value = item.partition("=")
+            if key.strip().lower().lstrip(".") == extension and value.strip():
+                return value.strip().lower()
+        return config.PARSING_STRATEGY.lower()
+    
+    def _document(self, text: str, parser: str, **metadata) -> Document:
+        metadata = {"source": self.file_path, "type": self.extension, "parser": parser, **metadata}
+        return Document(page_content=text, metadata=metadata)
+    
+    def _load_unstructured(self) -> List[Document]:
+        documents = UnstructuredFileLoader(self.file_path).load()
+        for document in documents:
+            document.metadata.update({"type": self.extension, "parser": "unstructured"})
+        return documents
+    
+    def _pdf_pages(self) -> List[str]:
+        """Extrai o texto de cada página, dividindo PDFs grandes entre processos.
+        
+        Dentro de um worker do pool de carregamento as páginas são lidas em sequência:
+        nesse caso o paralelismo já acontece entre arquivos.
+        """
+        page_count = _pdf_page_count(self.file_path)
+        workers = min(config.PDF_PAGE_WORKERS, page_count)
+        if workers <= 1 or page_count < config.PDF_PARALLEL_MIN_PAGES or multiprocessing.parent_process() is not None:
+            return _extract_pdf_pages(self.file_path, 0, page_count)
+        
+        logger.info(f"Extraindo {page_count} páginas de {self.file_path} com {workers} processos...")
+        executor = _create_executor(workers)
+        try:
+            futures = [executor.submit(_extract_pdf_pages, self.file_path, start, end)
+                       for start, end in _page_ranges(page_count, workers)]
+            return [text for future in futures for text in future.result()]
+        finally:
+            executor.shutdown(cancel_futures=True)
+    
+    def _load_pdf(self) -> List[Document]:
+        pages = self._pdf_pages()
+        empty = sum(1 for text in pages if len(text.strip()) < config.PDF_MIN_CHARS_PER_PAGE)
+        if self.strategy == "auto" and (not pages or empty / len(pages) > _SCANNED_PAGE_RATIO):
+            raise _NeedsFallback(f"{empty} de {len(pages)} página(s) sem camada de texto")
+        return [
+            self._document(text, "pypdf", page_number=number)
+            for number, text in enumerate(pages, start=1) if text.strip()
+        ]
+    
+    def _load_fast(self) -> List[Document]:
+        if self.extension == "pdf":
+            return self._load_pdf()
+        if self.extension in ("txt", "md"):
+            with open(self.file_path, encoding="utf-8", errors="replace") as f:
+                text, parser = f.read(), "text"
+        else:
+            text, parser = _markitdown_convert(self.file_path), "markitdown"
+        if self.strategy == "auto" and not text.strip():
+            raise _NeedsFallback("nenhum texto extraído")
+        return [self._document(text, parser)]
+    
+    def load(self) -> List[Document]:
+        """Carrega o documento com a estratégia configurada."""
+        if self.strategy == "unstructured":
+            return self._load_unstructured()
+        if self.strategy == "fast":
+            return self._load_fast()
+        
+        try:
+            return self._load_fast()
+        except _NeedsFallback as e:
+            reason = str(e)
+        except Exception as e:
+            reason = f"falha na extração rápida: {e}"
+        logger.info(f"Usando Unstructured para {self.file_path} ({reason}).")
+        return self._load_unstructured()
+
+
 class DocumentLoaderFactory:
     """Factory para selecionar o loader apropriado baseado na extensão do arquivo."""
     
     SUPPORTED_EXTENSIONS = {
         # Documentos de texto
-        '.txt': UnstructuredFileLoader,
-        '.pdf': UnstructuredFileLoader,
-        '.md': UnstructuredFileLoader,
-        '.docx': UnstructuredFileLoader,
-        '.html': UnstructuredFileLoader,
+        '.txt': TextDocumentLoader,
+        '.pdf': TextDocumentLoader,
+        '.md': TextDocumentLoader,
+        '.docx': TextDocumentLoader,
+        '.html': TextDocumentLoader,
         
         # Dados estruturados
         '.csv': CSVLoader,
@@ -221,17 +375,43 @@ class DocumentLoaderFactory:
         '.mov': VideoLoader,
     }
     
+    # Loaders que usam o whisper_registry rodam no processo principal para compartilhar o modelo
+    IN_PROCESS_LOADERS = (AudioLoader, VideoLoader)
+    
+    # Loaders com lazy_load, consumidos como gerador em iter_load_documents
+    LAZY_LOADERS = (CSVLoader, ExcelLoader)
+    
     @classmethod
-    def get_loader(cls, file_path: str):
-        """Retorna o loader apropriado para o arquivo."""
+    def get_loader_class(cls, file_path: str):
+        """Retorna a classe do loader apropriado para o arquivo."""
         extension = Path(file_path).suffix.lower()
         
         if extension not in cls.SUPPORTED_EXTENSIONS:
             raise ValueError(f"Formato de arquivo não suportado: {extension}")
         
-        loader_class = cls.SUPPORTED_EXTENSIONS[extension]
+        return cls.SUPPORTED_EXTENSIONS[extension]
+    
+    @classmethod
+    def get_loader(cls, file_path: str, cancel_event: Optional[threading.Event] = None):
+        """Retorna o loader apropriado para o arquivo.
+        
+        `cancel_event` é repassado aos loaders de mídia, que o verificam entre os segmentos.
+        """
+        loader_class = cls.get_loader_class(file_path)
+        if cancel_event is not None and loader_class in cls.IN_PROCESS_LOADERS:
+            return loader_class(file_path, cancel_event=cancel_event)
         return loader_class(file_path)
     
+    @classmethod
+    def runs_in_process(cls, file_path: str) -> bool:
+        """Indica se o arquivo deve ser carregado no processo principal."""
+        return cls.is_supported(file_path) and cls.get_loader_class(file_path) in cls.IN_PROCESS_LOADERS
+    
+    @classmethod
+    def supports_lazy_load(cls, file_path: str) -> bool:
+        """Indica se o arquivo pode ser lido de forma incremental com lazy_load."""
+        return cls.is_supported(file_path) and cls.get_loader_class(file_path) in cls.LAZY_LOADERS
+    
     @classmethod
     def is_supported(cls, file_path: str) -> bool:
         """Verifica se o formato do arquivo é suportado."""
@@ -242,3 +422,201 @@ class DocumentLoaderFactory:
     def get_supported_extensions(cls) -> List[str]:
         """Retorna lista de extensões suportadas."""
         return list(cls.SUPPORTED_EXTENSIONS.keys())
+
+
+@dataclass
+class LoadResult:
+    """Resultado do carregamento de um arquivo.
+    
+    Em `iter_load_documents`, `documents` pode ser um gerador (loaders com `lazy_load`).
+    """
+    file_path: str
+    documents: Iterable[Document] = field(default_factory=list)
+    error: Optional[str] = None
+    duration: Optional[float] = None  # segundos de carregamento (loaders sem lazy_load)
+
+
+_TIMEOUT_ERROR = "Tempo limite excedido"
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Interrompe o bloco com TimeoutError após `seconds` segundos.
+    
+    Usa SIGALRM, disponível apenas na thread principal de sistemas Unix;
+    nos demais casos o bloco executa sem limite de tempo.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def _on_timeout(signum, frame):
+        raise TimeoutError(f"Tempo limite de {seconds}s excedido")
+    
+    previous_handler = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _load_file(file_path: str, timeout: Optional[float] = None,
+               cancel_event: Optional[threading.Event] = None) -> LoadResult:
+    """Carrega um único arquivo isolando qualquer erro no resultado, exceto o cancelamento."""
+    started_at = time.perf_counter()
+    try:
+        logger.info(f"Carregando arquivo: {file_path}")
+        with _time_limit(timeout):
+            loader = DocumentLoaderFactory.get_loader(file_path, cancel_event=cancel_event)
+            documents = loader.load()
+        return LoadResult(file_path=file_path, documents=documents, duration=time.perf_counter() - started_at)
+    except IngestionCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao carregar o arquivo {file_path}: {e}")
+        return LoadResult(file_path=file_path, error=str(e) or type(e).__name__, duration=time.perf_counter() - started_at)
+
+
+def _load_file_with_deadline(file_path: str, timeout: Optional[float]) -> LoadResult:
+    """Carrega um arquivo fora do pool respeitando o tempo limite.
+
+    Fora da thread principal o SIGALRM de `_time_limit` não funciona; o arquivo é então
+    carregado numa thread auxiliar e, se passar de `timeout`, é abandonado com erro de
+    tempo limite (a thread termina sozinha em segundo plano).
+    """
+    if not timeout or threading.current_thread() is threading.main_thread():
+        return _load_file(file_path, timeout)
+
+    future: Future = Future()
+
+    def _run():
+        try:
+            future.set_result(_load_file(file_path))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, name="loader-deadline", daemon=True).start()
+    return _wait_result(future, file_path, timeout)
+
+
+def _loader_name(file_path: str) -> str:
+    try:
+        loader_class = DocumentLoaderFactory.get_loader_class(file_path)
+        return getattr(loader_class, "__name__", type(loader_class).__name__)
+    except ValueError:
+        return "unsupported"
+
+
+def _record_load(result: LoadResult) -> LoadResult:
+    """Registra as métricas de um arquivo carregado no processo atual.
+    
+    O tempo é medido em `_load_file`, inclusive nos workers do pool, e registrado aqui
+    porque as métricas dos processos filhos não chegam ao processo principal.
+    """
+    loader = _loader_name(result.file_path)
+    if result.duration is not None:
+        record_stage("load", result.duration, loader=loader)
+    if result.error:
+        count("rag_errors_total", stage="load")
+        return result
+    try:
+        count("rag_loader_bytes_total", os.path.getsize(result.file_path), loader=loader)
+    except OSError:
+        pass
+    if isinstance(result.documents, list):
+        count("rag_documents_total", len(result.documents), loader=loader)
+    return result
+
+
+def _count_documents(documents: Iterable[Document], loader: str) -> Iterator[Document]:
+    for document in documents:
+        count("rag_documents_total", loader=loader)
+        yield document
+
+
+def _wait_result(future, file_path: str, timeout: Optional[float]) -> LoadResult:
+    """Aguarda o resultado de um arquivo enviado ao pool, convertendo falhas em LoadResult."""
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.error(f"Tempo limite excedido ao carregar o arquivo {file_path}")
+        return LoadResult(file_path=file_path, error=_TIMEOUT_ERROR)
+    except Exception as e:
+        logger.error(f"Erro ao carregar o arquivo {file_path}: {e}")
+        return LoadResult(file_path=file_path, error=str(e) or type(e).__name__)
+
+
+def _create_executor(workers: int) -> ProcessPoolExecutor:
+    # "spawn" evita herdar locks de threads do processo pai (ex.: Streamlit)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_load_documents(file_paths: List[str], max_workers: Optional[int] = None,
+                        timeout: Optional[float] = None,
+                        cancel_event: Optional[threading.Event] = None) -> Iterator[LoadResult]:
+    """Carrega arquivos em paralelo e gera os resultados na ordem de file_paths.
+    
+    Os demais arquivos vão para um pool de processos, com no máximo 2 por worker
+    carregados à frente do consumidor; sem pool (1 worker ou 1 arquivo), o tempo
+    limite é aplicado por `_load_file_with_deadline`. Arquivos de mídia rodam no processo atual e
+    loaders com `lazy_load` (CSV/Excel) devolvem `documents` como gerador, lido sob
+    demanda; erros durante essa leitura são levantados ao consumir o gerador.
+    
+    Args:
+        file_paths: Lista de caminhos dos arquivos a serem carregados
+        max_workers: Número de processos (padrão: config.LOADER_WORKERS)
+        timeout: Tempo limite por arquivo em segundos (padrão: config.LOADER_TIMEOUT_SECONDS)
+        cancel_event: Repassado aos loaders de mídia do processo atual, que lançam
+            `IngestionCancelled` entre dois segmentos quando sinalizado
+    """
+    max_workers = max_workers or config.LOADER_WORKERS
+    timeout = timeout if timeout is not None else config.LOADER_TIMEOUT_SECONDS
+    
+    pooled = [
+        i for i, path in enumerate(file_paths)
+        if not DocumentLoaderFactory.runs_in_process(path) and not DocumentLoaderFactory.supports_lazy_load(path)
+    ]
+    workers = min(max_workers, len(pooled))
+    executor = _create_executor(workers) if workers > 1 else None
+    window = workers * 2
+    to_submit = iter(pooled)
+    futures = {}
+    
+    def _fill_window():
+        while executor is not None and len(futures) < window:
+            i = next(to_submit, None)
+            if i is None:
+                return
+            futures[i] = executor.submit(_load_file, file_paths[i], timeout)
+    
+    timed_out = False
+    try:
+        _fill_window()
+        for i, file_path in enumerate(file_paths):
+            if i in futures:
+                future = futures.pop(i)
+                _fill_window()
+                # Salvaguarda para loaders presos em código nativo que ignoram o sinal do worker
+                backstop = timeout * (math.ceil(window / workers) + 1) if timeout else None
+                result = _wait_result(future, file_path, backstop)
+                timed_out = timed_out or result.error == _TIMEOUT_ERROR
+                yield _record_load(result)
+            elif DocumentLoaderFactory.supports_lazy_load(file_path):
+                logger.info(f"Carregando arquivo: {file_path}")
+                # O tempo de leitura é medido enquanto o gerador é consumido
+                loader = _loader_name(file_path)
+                documents = DocumentLoaderFactory.get_loader(file_path).lazy_load()
+                yield _record_load(LoadResult(
+                    file_path=file_path,
+                    documents=_count_documents(timed_iter(documents, "load", loader=loader), loader),
+                ))
+            elif DocumentLoaderFactory.runs_in_process(file_path):
+                yield _record_load(_load_file(file_path, timeout, cancel_event))
+            else:
+                # Sem pool (1 worker ou 1 arquivo) o tempo limite é aplicado aqui
+                yield _record_load(_load_file_with_deadline(file_path, timeout))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
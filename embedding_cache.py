@@ -0,0 +1,199 @@
+"""
+Cache persistente de embeddings em SQLite.
+Os vetores são indexados por (nome do modelo, hash do texto), de modo que textos
+já vistos em ingestões anteriores não precisam ser recalculados.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from config import config
+from embedding_models import LazyEmbeddings
+from hashing import text_sha256
+
+logger = logging.getLogger(__name__)
+
+# Limite de variáveis por consulta do SQLite
+_SQLITE_BATCH = 500
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Envolve um modelo de embeddings com um cache persistente em disco.
+
+    Apenas `embed_documents` usa o cache; consultas passam direto ao modelo.
+    Quando o arquivo excede `max_size_mb`, as entradas acessadas há mais tempo
+    são removidas.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: Optional[str] = None,
+                 max_size_mb: Optional[int] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = path or config.EMBEDDING_CACHE_PATH
+        self.max_size_mb = max_size_mb if max_size_mb is not None else config.EMBEDDING_CACHE_MAX_MB
+        self.hits = 0
+        self.misses = 0
+        self._size_bytes = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre o banco na primeira utilização."""
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL,"
+                " PRIMARY KEY (model, key)) WITHOUT ROWID"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+            # Tamanho inicial pelo número de páginas do arquivo, sem percorrer a tabela;
+            # depois o contador é ajustado a cada gravação e remoção
+            page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+            page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            self._size_bytes = page_count * page_size
+            self._connection = connection
+        return self._connection
+
+    def _stored_bytes(self, keys: List[str]) -> int:
+        """Bytes já ocupados pelos vetores de `keys` deste modelo."""
+        total = 0
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            total += self._connection.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                [self.model_name, *batch],
+            ).fetchone()[0]
+        return total
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        connection = self._connect()
+        found = {}
+        for start in range(0, len(keys), _SQLITE_BATCH):
+            batch = keys[start:start + _SQLITE_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                [self.model_name, *batch],
+            ).fetchall()
+            found.update((key, _unpack(blob)) for key, blob in rows)
+
+        if found:
+            now = time.time()
+            connection.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND key = ?",
+                [(now, self.model_name, key) for key in found],
+            )
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        connection = self._connect()
+        now = time.time()
+        rows = [(self.model_name, key, _pack(vector), now) for key, vector in vectors.items()]
+        # Outro processo pode ter gravado as mesmas chaves desde a consulta: o REPLACE
+        # substitui essas linhas, então o tamanho delas sai da conta
+        replaced_bytes = self._stored_bytes(list(vectors))
+        connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+        self._size_bytes += sum(len(row[2]) for row in rows) - replaced_bytes
+        self._evict()
+
+    def _evict(self):
+        """Remove as entradas menos acessadas até ficar abaixo de 90% do limite."""
+        max_bytes = self.max_size_mb * 1024 * 1024
+        if self._size_bytes <= max_bytes:
+            return
+
+        connection = self._connection
+        target = int(max_bytes * 0.9)
+        removed = 0
+        while self._size_bytes > target:
+            rows = connection.execute(
+                "SELECT model, key, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT ?",
+                (_SQLITE_BATCH,),
+            ).fetchall()
+            if not rows:
+                # Tabela vazia: descarta a parte da estimativa inicial que era só estrutura do arquivo
+                self._size_bytes = 0
+                break
+            connection.executemany("DELETE FROM embeddings WHERE model = ? AND key = ?", [row[:2] for row in rows])
+            self._size_bytes -= sum(row[2] for row in rows)
+            removed += len(rows)
+        logger.info(f"Cache de embeddings: {removed} entradas antigas removidas.")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Retorna os embeddings dos textos, calculando apenas os ausentes do cache."""
+        keys = [text_sha256(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(list(set(keys)))
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in cached:
+                    missing.setdefault(key, text)
+
+            if missing:
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+                computed = dict(zip(missing.keys(), vectors))
+                self._store(computed)
+                cached.update(computed)
+
+            self._connection.commit()
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    @property
+    def stats(self) -> dict:
+        """Estatísticas de uso do cache."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size_mb": self._size_bytes / (1024 * 1024),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Calcula os embeddings de várias consultas, numa única chamada ao modelo FastEmbed quando possível."""
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    if isinstance(embeddings, LazyEmbeddings):
+        embeddings = embeddings.instance
+
+    model = getattr(embeddings, "model", None)
+    if model is not None and hasattr(model, "query_embed"):
+        batch_size = getattr(embeddings, "batch_size", 256)
+        return [vector.tolist() for vector in model.query_embed(texts, batch_size=batch_size)]
+    return [embeddings.embed_query(text) for text in texts]
@@ -0,0 +1,76 @@
+"""
+Metadados dos modelos de embeddings e carregamento sob demanda.
+A dimensão dos vetores vem de uma tabela de modelos conhecidos, para que a
+coleção possa ser criada sem carregar o modelo só para medir um embedding.
+"""
+
+import logging
+import threading
+from typing import Callable, List, Optional
+from langchain_core.embeddings import Embeddings
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Dimensão dos vetores dos modelos suportados pelo FastEmbed
+EMBEDDING_DIMENSIONS = {
+    "BAAI/bge-small-en-v1.5": 384,
+    "BAAI/bge-small-en": 384,
+    "BAAI/bge-base-en-v1.5": 768,
+    "BAAI/bge-base-en": 768,
+    "BAAI/bge-large-en-v1.5": 1024,
+    "BAAI/bge-small-zh-v1.5": 512,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2": 384,
+    "sentence-transformers/paraphrase-multilingual-mpnet-base-v2": 768,
+    "intfloat/multilingual-e5-large": 1024,
+    "nomic-ai/nomic-embed-text-v1": 768,
+    "nomic-ai/nomic-embed-text-v1.5": 768,
+    "thenlper/gte-base": 768,
+    "thenlper/gte-large": 1024,
+    "mixedbread-ai/mxbai-embed-large-v1": 1024,
+    "snowflake/snowflake-arctic-embed-s": 384,
+    "snowflake/snowflake-arctic-embed-m": 768,
+    "snowflake/snowflake-arctic-embed-l": 1024,
+    "jinaai/jina-embeddings-v2-small-en": 512,
+    "jinaai/jina-embeddings-v2-base-en": 768,
+}
+
+
+def embedding_dimension(model_name: str) -> Optional[int]:
+    """Dimensão dos vetores do modelo: config.EMBEDDING_DIMENSION, a tabela, ou None se desconhecida."""
+    if config.EMBEDDING_DIMENSION > 0:
+        return config.EMBEDDING_DIMENSION
+    return EMBEDDING_DIMENSIONS.get(model_name)
+
+
+class LazyEmbeddings(Embeddings):
+    """Adia a criação do modelo de embeddings até o primeiro uso.
+
+    `factory` é chamada uma única vez, na primeira chamada de embedding ou ao
+    acessar `instance` (ex.: num aquecimento em segundo plano).
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings]):
+        self._factory = factory
+        self._instance: Optional[Embeddings] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def instance(self) -> Embeddings:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    logger.info("Carregando o modelo de embeddings...")
+                    self._instance = self._factory()
+        return self._instance
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.instance.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.instance.embed_query(text)
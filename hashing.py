@@ -0,0 +1,37 @@
+"""
+Funções de hash de conteúdo usadas na ingestão incremental.
+Geram identificadores determinísticos para arquivos, chunks e pontos do Qdrant.
+"""
+
+import hashlib
+import uuid
+
+# Namespace fixo para que o mesmo chunk gere sempre o mesmo ID de ponto
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1c9e-8d5a-4b7e-9a3e-2f4b7c1d9e10")
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo lendo em blocos."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    """Calcula o SHA-256 de um texto (UTF-8)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(source: str, chunk_hash: str, occurrence: int = 0) -> str:
+    """Gera o ID determinístico (UUID) do ponto de um chunk.
+
+    Args:
+        source: Caminho do arquivo de origem do chunk
+        chunk_hash: Hash do conteúdo do chunk
+        occurrence: Ordem do chunk entre chunks idênticos do mesmo arquivo
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}\x00{chunk_hash}\x00{occurrence}"))
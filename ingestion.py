@@ -0,0 +1,193 @@
+"""
+Estágios da ingestão em fluxo: carregamento → divisão → embedding → upsert.
+Cada estágio é um gerador; `prefetch` executa os estágios anteriores numa
+thread com fila limitada, sobrepondo o carregamento de um lote ao embedding
+do anterior sem acumular o corpus inteiro em memória.
+"""
+
+import time
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from hashing import chunk_point_id, text_sha256
+from metrics import count, record_stage
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionCancelled(Exception):
+    """A ingestão foi cancelada antes de terminar."""
+
+
+@dataclass
+class ChunkBatch:
+    """Lote de chunks de um arquivo, com os IDs determinísticos dos pontos."""
+    file_path: str
+    file_hash: str
+    chunks: List[Document]
+    ids: List[str]
+
+
+@dataclass
+class FileCompleted:
+    """Todos os chunks do arquivo foram emitidos."""
+    file_path: str
+    file_hash: str
+
+
+@dataclass
+class FileFailed:
+    """O carregamento ou a divisão do arquivo falhou."""
+    file_path: str
+    error: str
+
+
+def assign_chunk_id(file_path: str, file_hash: str, chunk: Document, occurrences: Dict[str, int]) -> str:
+    """Anota o chunk com seus hashes e retorna o ID determinístico do ponto.
+
+    Args:
+        occurrences: Contagem de chunks idênticos já vistos no arquivo (atualizada in-place)
+    """
+    chunk_hash = text_sha256(chunk.page_content)
+    occurrence = occurrences.get(chunk_hash, 0)
+    occurrences[chunk_hash] = occurrence + 1
+    chunk.metadata["file_hash"] = file_hash
+    chunk.metadata["chunk_hash"] = chunk_hash
+    return chunk_point_id(file_path, chunk_hash, occurrence)
+
+
+def _iter_split(text_splitter, documents: Iterable[Document]) -> Iterator[Document]:
+    """Chunks de um arquivo. Splitters com `iter_chunks` recebem o fluxo inteiro e podem
+    agrupar documentos consecutivos (ex.: linhas de tabela); os demais dividem um a um."""
+    if hasattr(text_splitter, "iter_chunks"):
+        return text_splitter.iter_chunks(documents)
+    return (chunk for document in documents for chunk in text_splitter.split_documents([document]))
+
+
+class _ElapsedIter:
+    """Itera `iterable` acumulando em `seconds` o tempo gasto para obter cada item."""
+
+    def __init__(self, iterable: Iterable[Any]):
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started_at = time.perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - started_at
+
+
+def iter_chunk_batches(load_results: Iterable[Any], file_hashes: Dict[str, str], text_splitter,
+                       batch_size: int) -> Iterator[Any]:
+    """Divide os documentos carregados e gera eventos de ingestão por arquivo.
+
+    Para cada arquivo gera um ou mais `ChunkBatch` seguidos de `FileCompleted`, ou
+    `FileFailed` se o carregamento falhar (inclusive no meio de um `lazy_load`).
+
+    Args:
+        load_results: LoadResults na ordem dos arquivos (ver `iter_load_documents`)
+        file_hashes: Hash do conteúdo de cada arquivo
+        text_splitter: Splitter com `iter_chunks` (ver chunking.DocumentChunker) ou `split_documents`
+        batch_size: Número máximo de chunks por lote
+    """
+    for result in load_results:
+        if result.error:
+            yield FileFailed(result.file_path, result.error)
+            continue
+
+        file_hash = file_hashes[result.file_path]
+        occurrences: Dict[str, int] = {}
+        chunks, ids = [], []
+        # O tempo de divisão desconta a leitura dos documentos, que num lazy_load
+        # acontece enquanto o splitter consome o gerador
+        documents = _ElapsedIter(result.documents)
+        split = _ElapsedIter(_iter_split(text_splitter, documents))
+        split_chunks = 0
+        try:
+            for chunk in split:
+                split_chunks += 1
+                ids.append(assign_chunk_id(result.file_path, file_hash, chunk, occurrences))
+                chunks.append(chunk)
+                if len(chunks) >= batch_size:
+                    yield ChunkBatch(result.file_path, file_hash, chunks, ids)
+                    chunks, ids = [], []
+        except Exception as e:
+            logger.error(f"Erro ao carregar o arquivo {result.file_path}: {e}")
+            yield FileFailed(result.file_path, str(e) or type(e).__name__)
+            continue
+        finally:
+            record_stage("split", max(0.0, split.seconds - documents.seconds))
+            count("rag_chunks_total", split_chunks, stage="split")
+
+        if chunks:
+            yield ChunkBatch(result.file_path, file_hash, chunks, ids)
+        yield FileCompleted(result.file_path, file_hash)
+
+
+_END = object()
+
+# Espera máxima na fila entre as verificações de parada e de cancelamento
+_POLL_SECONDS = 0.1
+
+
+def prefetch(iterable: Iterable[Any], maxsize: int = 1,
+             cancel_event: Optional[threading.Event] = None) -> Iterator[Any]:
+    """Consome `iterable` numa thread em segundo plano com uma fila limitada.
+
+    A fila aplica backpressure: o produtor fica no máximo `maxsize` itens à frente
+    do consumidor. Exceções do produtor são relançadas no consumidor, e encerrar o
+    gerador interrompe o produtor no próximo item. Enquanto espera pela fila, o
+    consumidor verifica `cancel_event` e lança `IngestionCancelled` assim que for
+    sinalizado, sem aguardar o próximo item do produtor.
+    """
+    items: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not _put((item, None)):
+                    break
+            _put((_END, None))
+        except BaseException as e:
+            _put((_END, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=_produce, name="ingestion-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise IngestionCancelled("Ingestão cancelada.")
+                continue
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
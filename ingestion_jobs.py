@@ -0,0 +1,195 @@
+"""
+Fila de jobs de ingestão em segundo plano.
+Cada job executa `RAGPipeline.add_documents` num pool limitado de threads, com
+status e progresso por arquivo e cancelamento. A fila é compartilhada pelo processo,
+então ingestões de usuários diferentes não disputam o banco vetorial embutido.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from config import config
+from ingestion import IngestionCancelled
+
+logger = logging.getLogger(__name__)
+
+# Status dos jobs e dos arquivos
+QUEUED = "queued"
+RUNNING = "running"
+PARSING = "parsing"
+EMBEDDING = "embedding"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class FileProgress:
+    """Progresso de um arquivo dentro de um job."""
+    file_path: str
+    status: str = QUEUED
+    chunks: int = 0  # chunks novos inseridos
+
+
+@dataclass
+class IngestionJob:
+    """Job de ingestão de um conjunto de arquivos."""
+    id: str
+    file_paths: List[str]
+    clear_existing: bool = False
+    remove_missing: bool = False
+    status: str = QUEUED
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    files: Dict[str, FileProgress] = field(default_factory=dict)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        self.files = {file_path: FileProgress(file_path) for file_path in self.file_paths}
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        """Fração dos arquivos já concluídos (com sucesso ou não), entre 0 e 1."""
+        if not self.files:
+            return 1.0 if self.finished else 0.0
+        with self._lock:
+            finished = sum(progress.status in FINISHED_STATUSES for progress in self.files.values())
+        return finished / len(self.files)
+
+    def file_progress(self) -> List[FileProgress]:
+        """Cópia do progresso dos arquivos, na ordem em que foram enviados."""
+        with self._lock:
+            return [FileProgress(p.file_path, p.status, p.chunks) for p in self.files.values()]
+
+    def update_file(self, file_path: str, status: str, chunks: int = 0):
+        """Callback de progresso passado para `add_documents` (chamado de outras threads)."""
+        with self._lock:
+            progress = self.files.setdefault(file_path, FileProgress(file_path))
+            progress.status = status
+            progress.chunks = max(progress.chunks, chunks)
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            # Arquivos que não chegaram ao fim herdam o status final do job
+            for progress in self.files.values():
+                if progress.status not in FINISHED_STATUSES:
+                    progress.status = CANCELLED if status == CANCELLED else FAILED
+
+
+class IngestionJobQueue:
+    """Fila de jobs de ingestão com um pool limitado de workers.
+
+    Args:
+        pipeline: RAGPipeline usado por todos os jobs
+        max_workers: Jobs executados ao mesmo tempo (padrão: config.INGEST_JOB_WORKERS)
+        history: Jobs concluídos mantidos para consulta (padrão: config.INGEST_JOB_HISTORY)
+    """
+
+    def __init__(self, pipeline, max_workers: Optional[int] = None, history: Optional[int] = None):
+        self.pipeline = pipeline
+        self.history = history if history is not None else config.INGEST_JOB_HISTORY
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers or config.INGEST_JOB_WORKERS),
+            thread_name_prefix="ingestion-job",
+        )
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_paths: List[str], clear_existing: bool = False, remove_missing: bool = False) -> IngestionJob:
+        """Enfileira a ingestão de `file_paths` e retorna o job imediatamente."""
+        job = IngestionJob(
+            id=uuid.uuid4().hex,
+            file_paths=list(file_paths),
+            clear_existing=clear_existing,
+            remove_missing=remove_missing,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            self._futures[job.id] = self._executor.submit(self._run, job)
+        logger.info(f"Job de ingestão {job.id} enfileirado com {len(job.file_paths)} arquivo(s).")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestionJob]:
+        """Jobs conhecidos, do mais antigo ao mais recente."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancela um job: na fila, ele nem começa; em execução, para entre dois lotes.
+
+        Returns:
+            False se o job não existe ou já terminou.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.finished:
+            return False
+
+        job.cancel_event.set()
+        if future is not None and future.cancel():
+            job._finish(CANCELLED)
+            logger.info(f"Job de ingestão {job.id} cancelado antes de iniciar.")
+        return True
+
+    def shutdown(self, wait: bool = True):
+        """Cancela os jobs pendentes e encerra o pool."""
+        for job in self.jobs():
+            if not job.finished:
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def _run(self, job: IngestionJob):
+        if job.cancel_event.is_set():
+            job._finish(CANCELLED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        logger.info(f"Job de ingestão {job.id} iniciado.")
+        try:
+            self.pipeline.add_documents(
+                job.file_paths,
+                clear_existing=job.clear_existing,
+                remove_missing=job.remove_missing,
+                progress=job.update_file,
+                cancel_event=job.cancel_event,
+            )
+        except IngestionCancelled:
+            job._finish(CANCELLED)
+            logger.info(f"Job de ingestão {job.id} cancelado.")
+        except Exception as e:
+            job._finish(FAILED, str(e) or type(e).__name__)
+            logger.error(f"Job de ingestão {job.id} falhou: {e}")
+        else:
+            job._finish(DONE)
+            logger.info(f"Job de ingestão {job.id} concluído em {job.finished_at - job.started_at:.1f}s.")
@@ -1,12 +1,105 @@
 import streamlit as st
 import os
+from contextlib import nullcontext
 from rag_pipeline import RAGPipeline
 from config import config
+from ingestion_jobs import CANCELLED, DONE, EMBEDDING, FAILED, FINISHED_STATUSES, PARSING, QUEUED, IngestionJobQueue
+from metrics import profile
+from upload_store import UploadStore
 
 @st.cache_resource
 def get_pipeline():
-    """Cria e retorna uma única instância do RAGPipeline (cached)."""
-    return RAGPipeline()
+    """Cria e retorna uma única instância do RAGPipeline (cached).
+    
+    Os modelos são carregados em segundo plano para que a página apareça imediatamente.
+    """
+    pipeline = RAGPipeline()
+    pipeline.restore_snapshot_if_empty()
+    if config.WARM_UP_ON_START:
+        pipeline.start_warm_up()
+    return pipeline
+
+@st.cache_resource
+def get_upload_store():
+    """Armazenamento de uploads compartilhado; grava cada arquivo uma única vez."""
+    return UploadStore()
+
+@st.cache_resource
+def get_job_queue():
+    """Fila de ingestão compartilhada por todas as sessões (um único pool de workers)."""
+    return IngestionJobQueue(get_pipeline())
+
+FILE_STATUS_LABELS = {
+    QUEUED: "⏳ na fila",
+    PARSING: "📄 lendo",
+    EMBEDDING: "🧮 gerando embeddings",
+    DONE: "✅ concluído",
+    FAILED: "❌ falhou",
+    CANCELLED: "🚫 cancelado",
+}
+
+@st.fragment(run_every=config.INGEST_JOB_POLL_SECONDS)
+def ingestion_status(job_queue):
+    """Mostra o progresso do job de ingestão da sessão, atualizado periodicamente."""
+    job_id = st.session_state.get("ingestion_job_id")
+    job = job_queue.get(job_id) if job_id else None
+    if job is None:
+        return
+
+    files = job.file_progress()
+    finished = sum(progress.status in FINISHED_STATUSES for progress in files)
+    st.progress(job.progress, text=f"Ingestão: {finished}/{len(files)} arquivo(s)")
+    for progress in files:
+        chunks = f" · {progress.chunks} chunks" if progress.chunks else ""
+        st.caption(f"{os.path.basename(progress.file_path)}: {FILE_STATUS_LABELS.get(progress.status, progress.status)}{chunks}")
+
+    if not job.finished:
+        if st.button("Cancelar processamento"):
+            job_queue.cancel(job.id)
+        return
+
+    if job.status == DONE:
+        st.success("✅ Documentos processados e indexados com sucesso!")
+    elif job.status == CANCELLED:
+        st.warning("Processamento cancelado. Os arquivos já concluídos continuam indexados.")
+    else:
+        st.error(f"Erro ao processar documentos: {job.error}")
+
+    # Recarrega a página uma vez para atualizar os filtros com os novos documentos
+    if st.session_state.get("ingestion_job_reported") != job.id:
+        st.session_state["ingestion_job_reported"] = job.id
+        st.rerun()
+
+def format_source(metadata: dict) -> str:
+    """Formata a origem de um trecho recuperado para exibição."""
+    label = os.path.basename(metadata.get("source", "desconhecido"))
+    if "sheet" in metadata:
+        label += f" · planilha {metadata['sheet']}"
+    if "row" in metadata:
+        label += f" · linha {metadata['row']}"
+    if "start" in metadata:
+        label += f" · {int(metadata['start']) // 60:02d}:{int(metadata['start']) % 60:02d}"
+    return label
+
+def filter_sidebar(pipeline) -> dict:
+    """Exibe na barra lateral os filtros de metadados e retorna os selecionados."""
+    st.sidebar.divider()
+    st.sidebar.title("🔎 Filtros da Busca")
+    try:
+        sources = pipeline.get_filter_values("source")
+        types = pipeline.get_filter_values("type")
+        sheets = pipeline.get_filter_values("sheet")
+    except Exception as e:
+        st.sidebar.warning(f"Não foi possível carregar os filtros: {e}")
+        return {}
+
+    filters = {
+        "source": st.sidebar.multiselect("Arquivos", sources, format_func=os.path.basename),
+        "type": st.sidebar.multiselect("Tipos", types),
+    }
+    if sheets:
+        filters["sheet"] = st.sidebar.multiselect("Planilhas", sheets)
+    return {field: values for field, values in filters.items() if values}
 
 def main():
     st.set_page_config(page_title="Pipeline RAG", page_icon="🤖")
@@ -40,8 +133,7 @@ def main():
 
     if uploaded_files:
         file_paths = []
-        # Garante que o diretório 'data' exista usando a config
-        os.makedirs(config.DATA_DIR, exist_ok=True)
+        upload_store = get_upload_store()
         
         # Valida tamanho dos arquivos
         max_size_bytes = config.MAX_FILE_SIZE_MB * 1024 * 1024
@@ -52,34 +144,52 @@ def main():
                 st.sidebar.warning(f"⚠️ Arquivo {uploaded_file.name} excede o limite de {config.MAX_FILE_SIZE_MB}MB e foi ignorado.")
                 continue
             
-            file_path = os.path.join(config.DATA_DIR, uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            file_paths.append(file_path)
+            # Gravado só no primeiro rerun após o upload; depois o caminho vem da memória
+            file_paths.append(upload_store.save_upload(uploaded_file))
         
         if file_paths:
             st.sidebar.success(f"{len(file_paths)} documento(s) salvo(s) temporariamente.")
 
             if st.sidebar.button("Processar Documentos"):
-                with st.spinner("Processando documentos e gerando embeddings..."):
-                    try:
-                        pipeline.add_documents(file_paths)
-                        st.sidebar.success("✅ Documentos processados e indexados com sucesso!")
-                    except Exception as e:
-                        st.sidebar.error(f"Erro ao processar documentos: {e}")
+                # A ingestão roda em segundo plano; perguntas continuam disponíveis
+                job_queue = get_job_queue()
+                in_use = [path for job in job_queue.jobs() if not job.finished for path in job.file_paths]
+                upload_store.cleanup(keep=file_paths + in_use)
+                job = job_queue.submit(file_paths, remove_missing=True)
+                st.session_state["ingestion_job_id"] = job.id
+
+    with st.sidebar:
+        ingestion_status(get_job_queue())
+
+    filters = filter_sidebar(pipeline)
 
     st.divider()
     st.header("💬 Faça uma pergunta")
     question = st.text_input("Sobre o que você quer saber?")
+    profiling = config.PROFILING_ENABLED and st.checkbox("Perfilar esta pergunta")
 
     if st.button("Obter Resposta", type="primary"):
         if not question:
             st.warning("⚠️ Por favor, digite uma pergunta.")
         else:
-            with st.spinner("🧠 Pensando na resposta..."):
-                answer = pipeline.answer(question)
+            with (profile("cprofile", name="pergunta") if profiling else nullcontext()) as profile_result:
+                with st.spinner("🔎 Buscando trechos relevantes..."):
+                    stream = pipeline.answer_stream(question, filters=filters)
+                
+                if stream.sources:
+                    with st.expander(f"📚 Fontes ({len(stream.sources)})"):
+                        for doc in stream.sources:
+                            st.markdown(f"- {format_source(doc.metadata)}")
+                
                 st.success("Resposta:")
-                st.markdown(answer)
+                st.write_stream(stream)
+                if stream.time_to_first_token is not None:
+                    st.caption(f"⏱️ Primeiro token em {stream.time_to_first_token:.2f}s")
+            
+            if profile_result is not None:
+                st.caption(f"🧪 Perfil salvo em {profile_result.path}")
+                with st.expander("Funções mais caras"):
+                    st.code(profile_result.summary)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+"""
+Decodificação e transcrição de áudio em segmentos.
+O áudio é lido do ffmpeg direto para a memória em trechos de tamanho fixo,
+sem arquivo temporário, e cada trecho é transcrito separadamente pelo Whisper.
+"""
+
+import logging
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Queue
+from typing import Any, Iterable, Iterator, Optional, Tuple
+from config import config
+from ingestion import IngestionCancelled
+from whisper_registry import whisper_registry
+
+logger = logging.getLogger(__name__)
+
+# Taxa de amostragem esperada pelo Whisper (mono, 16 kHz)
+SAMPLE_RATE = 16000
+_BYTES_PER_SAMPLE = 2  # PCM s16le
+
+
+@dataclass
+class AudioSegment:
+    """Trecho de áudio decodificado, com posição em segundos no arquivo original."""
+    index: int
+    start: float
+    end: float
+    samples: Any  # numpy.ndarray float32
+
+
+def _ffmpeg_executable() -> str:
+    """Retorna o ffmpeg empacotado pelo imageio-ffmpeg (dependência do moviepy) ou o do sistema."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def _read_exact(stream, size: int) -> bytes:
+    """Lê até `size` bytes do stream, parando apenas no fim dos dados."""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        data = stream.read(remaining)
+        if not data:
+            break
+        chunks.append(data)
+        remaining -= len(data)
+    return b"".join(chunks)
+
+
+def iter_audio_segments(file_path: str, segment_seconds: Optional[int] = None) -> Iterator[AudioSegment]:
+    """Decodifica o áudio de um arquivo de mídia em segmentos de tamanho fixo.
+
+    Apenas um segmento fica em memória por vez, independentemente da duração do arquivo.
+
+    Args:
+        file_path: Caminho do arquivo de áudio ou vídeo
+        segment_seconds: Duração de cada segmento (padrão: config.MEDIA_SEGMENT_SECONDS)
+    """
+    import numpy as np
+
+    segment_seconds = segment_seconds or config.MEDIA_SEGMENT_SECONDS
+    segment_bytes = segment_seconds * SAMPLE_RATE * _BYTES_PER_SAMPLE
+    command = [
+        _ffmpeg_executable(), "-nostdin", "-loglevel", "error",
+        "-i", file_path, "-vn", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+
+    # stderr vai para um arquivo temporário: um pipe não lido até o fim de stdout
+    # encheria com avisos do ffmpeg e travaria a decodificação
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file)
+        index = 0
+        try:
+            while True:
+                data = _read_exact(process.stdout, segment_bytes)
+                # Descarta um eventual byte incompleto no final do stream
+                data = data[: len(data) - len(data) % _BYTES_PER_SAMPLE]
+                if not data:
+                    break
+
+                samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+                start = index * segment_seconds
+                yield AudioSegment(index=index, start=start, end=start + len(samples) / SAMPLE_RATE, samples=samples)
+                index += 1
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            returncode = process.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode("utf-8", errors="replace").strip()
+
+    if index == 0 and returncode != 0:
+        raise ValueError(f"Não foi possível decodificar o áudio de {file_path}: {stderr}")
+
+
+def transcribe_segments(segments: Iterable[AudioSegment], model_size: Optional[str] = None,
+                        workers: Optional[int] = None, cancel_event: Optional[threading.Event] = None,
+                        **options) -> Iterator[Tuple[AudioSegment, dict]]:
+    """Transcreve segmentos em paralelo, devolvendo os resultados na ordem dos segmentos.
+
+    Cada worker usa sua própria réplica do modelo no `whisper_registry`, limitadas às
+    que cabem em config.WHISPER_CACHE_MAX_MB, e no máximo 2 segmentos por worker ficam
+    pendentes, mantendo o uso de memória constante.
+
+    Args:
+        segments: Segmentos de áudio, normalmente de `iter_audio_segments`
+        model_size: Tamanho do modelo Whisper (padrão: config.WHISPER_MODEL)
+        workers: Número de transcrições simultâneas (padrão: config.MEDIA_TRANSCRIBE_WORKERS)
+        cancel_event: Quando sinalizado, nenhum segmento novo é transcrito e
+            `IngestionCancelled` é lançada
+        **options: Opções repassadas a `model.transcribe` (ex.: language)
+    """
+    workers = max(1, workers or config.MEDIA_TRANSCRIBE_WORKERS)
+    if workers > 1:
+        # Réplicas acima do limite do cache se descartariam umas às outras
+        workers = min(workers, whisper_registry.max_replicas(model_size))
+
+    def _check_cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            raise IngestionCancelled("Transcrição cancelada.")
+
+    if workers == 1:
+        for segment in segments:
+            _check_cancelled()
+            yield segment, whisper_registry.transcribe(segment.samples, model_size=model_size, **options)
+        return
+
+    free_replicas: Queue = Queue()
+    for replica in range(workers):
+        free_replicas.put(replica)
+
+    def _transcribe(segment: AudioSegment) -> Tuple[AudioSegment, dict]:
+        replica = free_replicas.get()
+        try:
+            return segment, whisper_registry.transcribe(
+                segment.samples, model_size=model_size, replica=replica, **options
+            )
+        finally:
+            free_replicas.put(replica)
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for segment in segments:
+                _check_cancelled()
+                pending.append(executor.submit(_transcribe, segment))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                _check_cancelled()
+                yield pending.popleft().result()
+        finally:
+            # Segmentos ainda não iniciados são descartados em vez de transcritos
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,281 @@
+"""
+Instrumentação do pipeline: tempos por estágio, contadores e histogramas.
+Os dados ficam num registro em memória do processo e podem ser exportados no
+formato texto do Prometheus ou como JSON. Com config.METRICS_JSON_LOGS, cada
+estágio também é registrado como uma linha de log JSON.
+
+Uso:
+    with timer("embedding"):
+        vectors = embeddings.embed_documents(texts)
+    count("rag_chunks_total", len(texts), stage="embedding")
+
+    with profile("cprofile") as result:   # perfila uma única requisição
+        pipeline.answer(pergunta)
+"""
+
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_DURATION = "rag_stage_duration_seconds"
+
+_HELP = {
+    STAGE_DURATION: "Duração de cada estágio do pipeline.",
+    "rag_documents_total": "Documentos produzidos pelos loaders.",
+    "rag_loader_bytes_total": "Bytes de arquivos lidos pelos loaders.",
+    "rag_audio_seconds_total": "Segundos de áudio transcritos.",
+    "rag_chunks_total": "Chunks processados por estágio.",
+    "rag_retrieved_chunks_total": "Chunks recuperados nas buscas.",
+    "rag_llm_tokens_total": "Tokens enviados e gerados pelo LLM (estimativa de 4 caracteres por token).",
+    "rag_rerank_fallbacks_total": "Reordenações abandonadas por timeout ou erro do modelo.",
+    "rag_errors_total": "Falhas por estágio.",
+    "rag_http_requests_total": "Requisições HTTP por rota, método e status.",
+}
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class _Histogram:
+    buckets: Tuple[float, ...]
+    counts: List[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _label_key(labels: Dict[str, Any]) -> _Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: _Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """Registro de contadores e histogramas, seguro para uso entre threads."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Incrementa um contador."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Registra uma observação num histograma."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Exporta as métricas no formato texto do Prometheus."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna as métricas como um dicionário serializável em JSON."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(zip((f"{bound:g}" for bound in histogram.buckets), histogram.counts)),
+                    }
+                    for labels, histogram in sorted(series.items())
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+
+# Registro global do processo
+metrics = MetricsRegistry()
+
+# Spans do estágio coletados por profile("trace") no contexto atual
+_active_trace: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar("rag_trace", default=None)
+
+
+def record_stage(stage: str, duration: float, **labels):
+    """Registra a duração de um estágio no histograma, no trace ativo e no log JSON."""
+    if not config.METRICS_ENABLED:
+        return
+    metrics.observe(STAGE_DURATION, duration, stage=stage, **labels)
+
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.append({"stage": stage, "end": time.perf_counter(), "duration_ms": duration * 1000, **labels})
+
+    if config.METRICS_JSON_LOGS:
+        logger.info(json.dumps(
+            {"event": "stage", "stage": stage, "duration_ms": round(duration * 1000, 3), **labels},
+            ensure_ascii=False, default=str,
+        ))
+
+
+def count(name: str, value: float = 1.0, **labels):
+    """Incrementa um contador, se as métricas estiverem ativas."""
+    if config.METRICS_ENABLED and value:
+        metrics.inc(name, value, **labels)
+
+
+@contextmanager
+def timer(stage: str, **labels):
+    """Mede a duração do bloco como um estágio; falhas também contam em rag_errors_total."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        count("rag_errors_total", stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started_at, **labels)
+
+
+def timed_iter(iterable: Iterable[Any], stage: str, **labels) -> Iterator[Any]:
+    """Repassa os itens de `iterable` medindo apenas o tempo gasto para produzi-los.
+
+    Útil para geradores (ex.: `lazy_load`) cujo trabalho acontece enquanto são consumidos.
+    """
+    elapsed = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started_at = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - started_at
+                return
+            elapsed += time.perf_counter() - started_at
+            yield item
+    finally:
+        record_stage(stage, elapsed, **labels)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata do número de tokens (cerca de 4 caracteres por token)."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class ProfileResult:
+    """Resultado de profile(): arquivo .prof, resumo das funções mais caras ou spans do trace."""
+    mode: str
+    path: Optional[str] = None
+    summary: str = ""
+    spans: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@contextmanager
+def profile(mode: str = "cprofile", name: str = "request", top: int = 25):
+    """Perfila um único bloco (ex.: uma pergunta) sem afetar as demais requisições.
+
+    Modos:
+        cprofile: cProfile da thread atual; salva `<PROFILE_DIR>/<name>-<timestamp>.prof`
+            (abra com `python -m pstats` ou snakeviz) e registra as `top` funções no log.
+        trace: registra a sequência de estágios medidos por `timer` no contexto atual,
+            com início relativo e duração de cada um, e a grava no log como JSON.
+    """
+    result = ProfileResult(mode=mode)
+    if mode == "trace":
+        spans: List[Dict[str, Any]] = []
+        token = _active_trace.set(spans)
+        started_at = time.perf_counter()
+        try:
+            yield result
+        finally:
+            _active_trace.reset(token)
+            for span in spans:
+                end = span.pop("end")
+                span["start_ms"] = round((end - started_at) * 1000 - span["duration_ms"], 3)
+                span["duration_ms"] = round(span["duration_ms"], 3)
+            result.spans = sorted(spans, key=lambda span: span["start_ms"])
+            logger.info(json.dumps({"event": "trace", "name": name, "spans": result.spans}, ensure_ascii=False, default=str))
+        return
+
+    if mode != "cprofile":
+        raise ValueError(f"Modo de perfil desconhecido: '{mode}'. Use 'cprofile' ou 'trace'.")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        result.path = os.path.join(config.PROFILE_DIR, f"{name}-{int(time.time() * 1000)}.prof")
+        profiler.dump_stats(result.path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+        result.summary = output.getvalue()
+        logger.info(f"Perfil salvo em {result.path}\n{result.summary}")
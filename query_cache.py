@@ -0,0 +1,122 @@
+"""
+Caches do caminho de consulta.
+- QueryEmbeddingCache: LRU em memória dos embeddings de perguntas.
+- SemanticAnswerCache: reaproveita respostas de perguntas semanticamente
+  equivalentes, desde que o contexto recuperado seja o mesmo.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+import numpy as np
+from config import config
+
+
+class QueryEmbeddingCache:
+    """Cache LRU de embeddings de consultas, indexado pelo texto da pergunta."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else config.QUERY_EMBEDDING_CACHE_SIZE
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many_or_compute(self, questions: List[str],
+                            compute_many: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Retorna os embeddings em cache, calculando numa única chamada os ausentes."""
+        with self._lock:
+            found = {}
+            for question in questions:
+                if question in self._entries:
+                    self._entries.move_to_end(question)
+                    found[question] = self._entries[question]
+
+        missing = list(dict.fromkeys(q for q in questions if q not in found))
+        if missing:
+            computed = dict(zip(missing, compute_many(missing)))
+            found.update(computed)
+            if self.max_entries > 0:
+                with self._lock:
+                    self._entries.update(computed)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return [found[question] for question in questions]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass
+class _CachedAnswer:
+    vector: np.ndarray
+    context_key: str
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Cache de respostas por similaridade de cosseno entre perguntas.
+
+    Uma resposta só é reaproveitada se a pergunta nova estiver a pelo menos
+    `threshold` de similaridade de uma pergunta em cache, dentro do TTL, e se o
+    contexto recuperado (`context_key`) for idêntico ao da resposta armazenada.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.threshold = threshold if threshold is not None else config.ANSWER_CACHE_THRESHOLD
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.ANSWER_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else config.ANSWER_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[int, _CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _expire(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, vector: List[float], context_key: str) -> Optional[str]:
+        """Retorna a resposta em cache mais similar, ou None."""
+        query = self._normalize(vector)
+        with self._lock:
+            self._expire(time.time())
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry.context_key == context_key]
+            if not candidates:
+                return None
+
+            matrix = np.stack([entry.vector for _, entry in candidates])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            return entry.answer
+
+    def store(self, vector: List[float], context_key: str, answer: str):
+        """Armazena a resposta, descartando as menos usadas acima do limite."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[self._next_id] = _CachedAnswer(self._normalize(vector), context_key, answer, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Invalida todas as respostas (ex.: após alterações na coleção)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,75 +1,213 @@
-import os
+import time
+import asyncio
 import logging
-from typing import List, Optional
-from langchain_community.document_loaders import UnstructuredFileLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import FastEmbedEmbeddings
-from langchain_qdrant import Qdrant
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
-import qdrant_client
+import threading
+import importlib
+from operator import itemgetter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from chunking import DocumentChunker
 from config import config
+from context_packing import PackedContext, get_tokenizer, pack_context
+from embedding_cache import CachedEmbeddings, embed_queries
+from embedding_models import LazyEmbeddings, embedding_dimension
+from hashing import file_sha256, text_sha256
+from metrics import count, estimate_tokens, record_stage, timer
+from ingestion import ChunkBatch, FileFailed, IngestionCancelled, iter_chunk_batches, prefetch
+from query_cache import QueryEmbeddingCache, SemanticAnswerCache
+from rate_limit import AsyncRateLimiter, call_with_rate_limit_retry
+from reranking import Reranker
+from snapshots import export_snapshot, import_snapshot, restore_if_empty
+from sparse_encoder import BM25SparseEncoder
+from vector_index import (
+    DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, build_filter, create_client, create_collection, delete_collection,
+    ensure_payload_indexes, facet_values, rebuild_collection, search_params,
+)
+
+# Dependências pesadas, importadas apenas no primeiro uso para acelerar a inicialização.
+# Continuam acessíveis como atributos do módulo (ex.: rag_pipeline.ChatGroq).
+_LAZY_IMPORTS = {
+    "RecursiveCharacterTextSplitter": ("langchain.text_splitter", "RecursiveCharacterTextSplitter"),
+    "FastEmbedEmbeddings": ("langchain_community.embeddings", "FastEmbedEmbeddings"),
+    "ChatGroq": ("langchain_groq", "ChatGroq"),
+    "ChatPromptTemplate": ("langchain_core.prompts", "ChatPromptTemplate"),
+    "StrOutputParser": ("langchain_core.output_parsers", "StrOutputParser"),
+    "qdrant_client": ("qdrant_client", None),
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name)
+    value = getattr(module, attribute) if attribute else module
+    globals()[name] = value
+    return value
+
+
+def _lazy_import(name: str):
+    """Retorna uma dependência de _LAZY_IMPORTS, importando-a se necessário."""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+# Chaves do payload (compatíveis com o vector store do LangChain)
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+# Callback de progresso da ingestão: (arquivo, status, chunks inseridos do arquivo)
+ProgressCallback = Callable[[str, str, int], None]
 
 # Configuração de Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@dataclass
+class _FileSyncState:
+    """Estado da sincronização de um arquivo durante a ingestão."""
+    file_path: str
+    file_hash: str
+    existing_ids: set
+    existing_metadata: Dict[str, dict] = field(default_factory=dict)
+    seen_ids: set = field(default_factory=set)
+    added_ids: List[str] = field(default_factory=list)
+
+
+def _chunk_payload(chunk: Document) -> dict:
+    """Payload gravado para um chunk. O hash do arquivo só é gravado em `_finalize_file`,
+    onde marca o arquivo como completo."""
+    metadata = {key: value for key, value in chunk.metadata.items() if key != "file_hash"}
+    return {CONTENT_KEY: chunk.page_content, METADATA_KEY: metadata}
+
+
+def _count_llm_tokens(question: str, context: PackedContext, response: str):
+    """Registra a estimativa de tokens do prompt (pergunta + contexto) e da resposta."""
+    count("rag_llm_tokens_total", estimate_tokens(question) + context.tokens, kind="prompt")
+    count("rag_llm_tokens_total", estimate_tokens(response), kind="completion")
+
+
+class AnswerStream:
+    """Resposta em streaming de uma pergunta.
+    
+    Itere para receber os tokens à medida que o LLM os gera. As fontes recuperadas
+    (`sources`) ficam disponíveis antes do primeiro token, e `time_to_first_token`
+    mede o tempo, em segundos, entre a pergunta e o primeiro token.
+    """
+    
+    def __init__(self, question: str, sources: List[Document], tokens: Iterator[str], started_at: float):
+        self.question = question
+        self.sources = sources
+        self.answer = ""
+        self.time_to_first_token: Optional[float] = None
+        self._tokens = tokens
+        self._started_at = started_at
+    
+    def __iter__(self) -> Iterator[str]:
+        for token in self._tokens:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - self._started_at
+                record_stage("time_to_first_token", self.time_to_first_token)
+                logger.info(f"Tempo até o primeiro token: {self.time_to_first_token:.3f}s")
+            self.answer += token
+            yield token
+
+
 class RAGPipeline:
-    def __init__(self):
-        # Valida configurações antes de iniciar
-        try:
-            config.validate()
-        except ValueError as e:
-            logger.error(f"Erro de configuração: {e}")
-            raise
+    def __init__(self, client=None, embeddings=None, llm=None):
+        """
+        Args:
+            client: Cliente Qdrant já criado (padrão: vector_index.create_client())
+            embeddings: Modelo de embeddings (padrão: FastEmbed com config.EMBEDDING_MODEL); só usa o
+                cache de embeddings se tiver `model_name`
+            llm: Modelo de chat (padrão: ChatGroq com config.MODEL_NAME)
+        """
+        # Valida configurações antes de iniciar (a chave da Groq só é necessária sem um llm próprio)
+        if llm is None:
+            try:
+                config.validate()
+            except ValueError as e:
+                logger.error(f"Erro de configuração: {e}")
+                raise
 
         self.db_path = config.QDRANT_PATH
         self.collection_name = config.COLLECTION_NAME
-        self.embeddings = FastEmbedEmbeddings()
-        
-        # Garante que o diretório do banco de dados exista
-        os.makedirs(self.db_path, exist_ok=True)
+        self._llm = llm
+        # A dimensão do modelo padrão vem da tabela; embeddings próprios são medidos (ver _create_collection)
+        self._embedding_dimension = None
+        if embeddings is None:
+            # O modelo só é carregado no primeiro embedding (ou no aquecimento, ver start_warm_up)
+            embeddings = LazyEmbeddings(
+                lambda: _lazy_import("FastEmbedEmbeddings")(model_name=config.EMBEDDING_MODEL)
+            )
+            self._embedding_dimension = embedding_dimension(config.EMBEDDING_MODEL)
+            self.embedding_model = config.EMBEDDING_MODEL
+        else:
+            # Embeddings próprios só usam o cache sob o nome do seu modelo, nunca o de config
+            self.embedding_model = getattr(embeddings, "model_name", None)
+        self.embeddings = embeddings
+        if config.EMBEDDING_CACHE_ENABLED and self.embedding_model:
+            self.embeddings = CachedEmbeddings(self.embeddings, model_name=self.embedding_model)
         
         try:
-            self.client = qdrant_client.QdrantClient(path=self.db_path)
+            self.client = client if client is not None else create_client()
             
-            # Verifica se a coleção existe, se não, cria uma vazia
-            collections = self.client.get_collections().collections
-            collection_names = [col.name for col in collections]
+            # Verifica se a coleção (ou o alias criado por um snapshot) existe, se não, cria uma vazia
+            if not self.client.collection_exists(self.collection_name):
+                self._create_collection()
+            else:
+                ensure_payload_indexes(self.client, self.collection_name)
             
-            if self.collection_name not in collection_names:
-                logger.info(f"Criando coleção '{self.collection_name}'...")
-                # Cria a coleção diretamente usando o client
-                from qdrant_client.models import Distance, VectorParams
-                
-                # Obtém a dimensão dos embeddings
-                sample_embedding = self.embeddings.embed_query("test")
-                vector_size = len(sample_embedding)
-                
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-                )
-                logger.info(f"Coleção '{self.collection_name}' criada com sucesso.")
-            
-            self.vector_store = Qdrant(
-                client=self.client,
-                collection_name=self.collection_name,
-                embeddings=self.embeddings,
-            )
-            self.retriever = self.vector_store.as_retriever()
-            self.rag_chain = self._create_rag_chain()
+            self.sparse_encoder = BM25SparseEncoder()
+            self._load_collection_schema()
+            self._rag_chain = None
+            self._lazy_lock = threading.Lock()
+            self.query_embedding_cache = QueryEmbeddingCache()
+            self.answer_cache = SemanticAnswerCache()
+            self.reranker = Reranker() if config.RERANK_ENABLED else None
+            self.llm_rate_limiter = AsyncRateLimiter(config.LLM_REQUESTS_PER_MINUTE)
             logger.info(f"Pipeline RAG inicializado com sucesso. DB: {self.db_path}, Coleção: {self.collection_name}")
         except Exception as e:
             logger.critical(f"Falha ao inicializar o Pipeline RAG: {e}")
             raise
 
+    @property
+    def rag_chain(self):
+        """Chain do LLM, criada no primeiro uso."""
+        if self._rag_chain is None:
+            with self._lazy_lock:
+                if self._rag_chain is None:
+                    self._rag_chain = self._create_rag_chain()
+        return self._rag_chain
+
+    @rag_chain.setter
+    def rag_chain(self, rag_chain):
+        self._rag_chain = rag_chain
+
+    def warm_up(self):
+        """Carrega o modelo de embeddings e a chain do LLM antes da primeira pergunta."""
+        started_at = time.perf_counter()
+        try:
+            self.embeddings.embed_query("warm-up")
+            get_tokenizer().count("warm-up")
+            if self.reranker is not None:
+                self.reranker.warm_up()
+            self.rag_chain
+            logger.info(f"Aquecimento concluído em {time.perf_counter() - started_at:.2f}s.")
+        except Exception as e:
+            logger.warning(f"Falha no aquecimento do pipeline: {e}")
+
+    def start_warm_up(self) -> threading.Thread:
+        """Executa warm_up() numa thread em segundo plano, sem bloquear a interface."""
+        thread = threading.Thread(target=self.warm_up, name="rag-warm-up", daemon=True)
+        thread.start()
+        return thread
+
     def _create_rag_chain(self):
         template = """
         Você é um assistente que responde a perguntas de forma útil.
         Use os seguintes trechos de contexto recuperado para responder à pergunta.
+        Cada trecho começa com um número e a fonte entre colchetes.
         Se você não sabe a resposta, apenas diga que não sabe, não tente inventar uma resposta.
         Use no máximo cinco sentenças. Mantenha a resposta concisa e em português.
 
@@ -77,95 +215,669 @@ class RAGPipeline:
         Pergunta: {question}
         Resposta útil:
         """
-        prompt = ChatPromptTemplate.from_template(template)
-        llm = ChatGroq(model=config.MODEL_NAME, api_key=config.GROQ_API_KEY)
+        prompt = _lazy_import("ChatPromptTemplate").from_template(template)
+        llm = self._llm or _lazy_import("ChatGroq")(model=config.MODEL_NAME, api_key=config.GROQ_API_KEY)
 
+        # O contexto é recuperado e empacotado antes da chain (ver _retrieve e _pack_context)
+        # para permitir o cache de respostas
         rag_chain = (
-            {"context": self.retriever, "question": RunnablePassthrough()}
+            {"context": itemgetter("context"), "question": itemgetter("question")}
             | prompt
             | llm
-            | StrOutputParser()
+            | _lazy_import("StrOutputParser")()
         )
         return rag_chain
 
-    def add_documents(self, file_paths: List[str], clear_existing: bool = True):
-        """Carrega, processa e adiciona documentos ao vector store.
+    def _create_collection(self):
+        """Cria a coleção vazia no Qdrant com a dimensão dos embeddings.
+        
+        No modo híbrido a coleção tem um vetor denso e um esparso (BM25) nomeados.
+        Quantização, HNSW e armazenamento em disco seguem o Config (ver vector_index).
+        """
+        logger.info(f"Criando coleção '{self.collection_name}'...")
+        # A dimensão vem da tabela de modelos; só modelos desconhecidos exigem carregar o modelo
+        vector_size = self._embedding_dimension
+        if vector_size is None:
+            vector_size = len(self.embeddings.embed_query("test"))
+        create_collection(self.client, self.collection_name, vector_size, hybrid=config.RETRIEVAL_MODE == "hybrid")
+        logger.info(f"Coleção '{self.collection_name}' criada com sucesso.")
+
+    def rebuild_collection(self) -> int:
+        """Reconstrói a coleção com os parâmetros de índice e o modo de busca atuais do Config.
+        
+        Os embeddings já armazenados são reaproveitados. Retorna o número de pontos migrados.
+        """
+        migrated = rebuild_collection(self.client, self.collection_name)
+        self._load_collection_schema()
+        self.answer_cache.clear()
+        return migrated
+
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """Exporta a coleção (vetores, payloads e configuração) para um arquivo de snapshot.
+        
+        Retorna o manifesto gravado (ver snapshots.export_snapshot).
+        """
+        return export_snapshot(self.client, self.collection_name, path, embedding_model=self.embedding_model)
+
+    def _snapshot_dimension(self) -> int:
+        if self._embedding_dimension is not None:
+            return self._embedding_dimension
+        vectors = self.client.get_collection(self.collection_name).config.params.vectors
+        return (vectors[DENSE_VECTOR_NAME] if isinstance(vectors, dict) else vectors).size
+
+    def _snapshot_loaded(self, imported: int) -> int:
+        if imported:
+            self._load_collection_schema()
+            self.answer_cache.clear()
+        return imported
+
+    def import_snapshot(self, path: str) -> int:
+        """Substitui a coleção pelo conteúdo de um snapshot, sem recalcular embeddings.
+        
+        Snapshots de outro modelo de embeddings são recusados com IncompatibleSnapshotError.
+        Retorna o número de pontos importados.
+        """
+        return self._snapshot_loaded(
+            import_snapshot(self.client, self.collection_name, path, embedding_model=self.embedding_model,
+                            dimension=self._snapshot_dimension())
+        )
+
+    def restore_snapshot_if_empty(self) -> int:
+        """Importa config.SNAPSHOT_RESTORE_PATH se a coleção estiver vazia (ex.: réplica nova)."""
+        return self._snapshot_loaded(
+            restore_if_empty(self.client, self.collection_name, embedding_model=self.embedding_model,
+                             dimension=self._snapshot_dimension())
+        )
+
+    def _load_collection_schema(self):
+        """Lê da coleção existente os nomes dos vetores e se a busca híbrida é possível."""
+        params = self.client.get_collection(self.collection_name).config.params
+        self.dense_vector_name = DENSE_VECTOR_NAME if isinstance(params.vectors, dict) else None
+        has_sparse = isinstance(params.sparse_vectors, dict) and SPARSE_VECTOR_NAME in params.sparse_vectors
+        
+        self.hybrid = config.RETRIEVAL_MODE == "hybrid" and has_sparse
+        if config.RETRIEVAL_MODE == "hybrid" and not has_sparse:
+            logger.warning(
+                f"A coleção '{self.collection_name}' não possui vetores esparsos; usando busca apenas densa. "
+                f"Execute `python vector_index.py` para reconstruir a coleção e habilitar a busca híbrida."
+            )
+
+    @staticmethod
+    def _source_filter(file_path: str):
+        """Filtro Qdrant que seleciona os pontos de um arquivo de origem."""
+        from qdrant_client.models import FieldCondition, Filter, MatchValue
+        return Filter(must=[FieldCondition(key="metadata.source", match=MatchValue(value=file_path))])
+
+    def _is_indexed(self, file_path: str, file_hash: str) -> bool:
+        """Verifica se o arquivo já está indexado por completo exatamente com este hash.
+        
+        Pontos sem o hash (ingestão interrompida, ver _finalize_file) contam como desatualizados.
+        """
+        from qdrant_client.models import FieldCondition, MatchValue
+        
+        hash_condition = FieldCondition(key="metadata.file_hash", match=MatchValue(value=file_hash))
+        current = self._source_filter(file_path)
+        current.must.append(hash_condition)
+        stale = self._source_filter(file_path)
+        stale.must_not = [hash_condition]
+        
+        indexed = self.client.count(self.collection_name, count_filter=current, exact=True).count
+        outdated = self.client.count(self.collection_name, count_filter=stale, exact=True).count
+        return indexed > 0 and outdated == 0
+
+    def _get_point_metadata(self, file_path: str) -> Dict[str, dict]:
+        """Retorna os metadados dos pontos já indexados para um arquivo, por ID."""
+        points = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._source_filter(file_path),
+                limit=1024,
+                offset=offset,
+                with_payload=[METADATA_KEY],
+                with_vectors=False,
+            )
+            points.update((str(record.id), (record.payload or {}).get(METADATA_KEY) or {}) for record in records)
+            if offset is None:
+                return points
+
+    def _remove_missing_sources(self, file_paths: List[str]):
+        """Remove da coleção os pontos de arquivos que não estão em file_paths."""
+        from qdrant_client.models import FieldCondition, Filter, FilterSelector, MatchAny
+        
+        missing_filter = Filter(must_not=[FieldCondition(key="metadata.source", match=MatchAny(any=list(file_paths)))])
+        removed = self.client.count(self.collection_name, count_filter=missing_filter, exact=True).count
+        if removed:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=missing_filter),
+            )
+            logger.info(f"{removed} chunks de arquivos removidos foram excluídos da coleção.")
+
+    def _upsert_chunks(self, chunks: List[Document], ids: List[str]):
+        """Gera os embeddings dos chunks e grava os pontos (denso e, no modo híbrido, esparso)."""
+        from qdrant_client.models import PointStruct, SparseVector
+        
+        texts = [chunk.page_content for chunk in chunks]
+        with timer("embedding"):
+            dense_vectors = self.embeddings.embed_documents(texts)
+        count("rag_chunks_total", len(texts), stage="embedding")
+        
+        points = []
+        for point_id, chunk, dense_vector in zip(ids, chunks, dense_vectors):
+            vector = {self.dense_vector_name: dense_vector} if self.dense_vector_name else dense_vector
+            if self.hybrid:
+                indices, values = self.sparse_encoder.encode_document(chunk.page_content)
+                vector[SPARSE_VECTOR_NAME] = SparseVector(indices=indices, values=values)
+            points.append(PointStruct(id=point_id, vector=vector, payload=_chunk_payload(chunk)))
+        
+        with timer("upsert"):
+            self.client.upsert(collection_name=self.collection_name, points=points)
+        count("rag_chunks_total", len(points), stage="upsert")
+
+    def _upsert_batch(self, batch: ChunkBatch, state: "_FileSyncState") -> int:
+        """Gera embeddings e insere os chunks do lote que ainda não estão na coleção."""
+        new_chunks = []
+        new_ids = []
+        refreshed = {}
+        for chunk, point_id in zip(batch.chunks, batch.ids):
+            state.seen_ids.add(point_id)
+            if point_id not in state.existing_ids:
+                new_chunks.append(chunk)
+                new_ids.append(point_id)
+                continue
+            # Chunk mantido, mas os metadados (ex.: start_index depois de uma edição acima
+            # dele) podem ter mudado: o payload é atualizado sem recalcular o embedding
+            payload = _chunk_payload(chunk)
+            stored = {key: value for key, value in state.existing_metadata.get(point_id, {}).items() if key != "file_hash"}
+            if stored != payload[METADATA_KEY]:
+                refreshed[point_id] = payload
+        
+        if refreshed:
+            self._overwrite_payloads(refreshed)
+        if new_chunks:
+            self._upsert_chunks(new_chunks, new_ids)
+            state.added_ids.extend(new_ids)
+        return len(new_chunks)
+
+    def _overwrite_payloads(self, payloads: Dict[str, dict]):
+        """Substitui o payload de pontos existentes numa única requisição."""
+        from qdrant_client.models import OverwritePayloadOperation, SetPayload
+        
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=[
+                OverwritePayloadOperation(overwrite_payload=SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in payloads.items()
+            ],
+        )
+
+    def _finalize_file(self, state: "_FileSyncState"):
+        """Exclui os pontos que deixaram de existir e grava o hash do arquivo em todos os pontos.
+        
+        O hash é a marca de conclusão usada por `_is_indexed`: pontos de uma ingestão
+        interrompida ficam sem ele e o arquivo é processado de novo na próxima execução.
+        """
+        from qdrant_client.models import PointIdsList
+        
+        stale_ids = state.existing_ids - state.seen_ids
+        if stale_ids:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=list(stale_ids)),
+            )
+        
+        kept_ids = state.existing_ids & state.seen_ids
+        if state.seen_ids:
+            self.client.set_payload(
+                collection_name=self.collection_name,
+                payload={"file_hash": state.file_hash},
+                points=self._source_filter(state.file_path),
+                key="metadata",
+            )
+        
+        logger.info(
+            f"{state.file_path}: {len(state.added_ids)} chunks novos, {len(kept_ids)} mantidos, "
+            f"{len(stale_ids)} removidos."
+        )
+
+    def _discard_file(self, state: "_FileSyncState"):
+        """Desfaz a inserção parcial de um arquivo cuja ingestão falhou ou foi cancelada no meio."""
+        from qdrant_client.models import PointIdsList
+        
+        if state.added_ids:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=state.added_ids),
+            )
+
+    def _ingest(self, events: Iterable, progress: Optional[ProgressCallback] = None,
+                cancel_event: Optional[threading.Event] = None) -> int:
+        """Consome os eventos de ingestão, sincronizando cada arquivo com a coleção.
+        
+        O cancelamento é verificado entre os eventos, e `events` também pode lançar
+        `IngestionCancelled` enquanto espera (ver `prefetch`); em ambos os casos o arquivo
+        em andamento é desfeito. Arquivos já concluídos permanecem indexados.
+        
+        Retorna o número de chunks inseridos.
+        """
+        progress = progress or (lambda file_path, status, chunks=0: None)
+        total_chunks = 0
+        state = None
+        try:
+            for event in events:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise IngestionCancelled("Ingestão cancelada.")
+                
+                if state is None or state.file_path != event.file_path:
+                    state = None
+                    if not isinstance(event, FileFailed):
+                        existing = self._get_point_metadata(event.file_path)
+                        state = _FileSyncState(event.file_path, event.file_hash, set(existing), existing)
+                
+                if isinstance(event, FileFailed):
+                    if state is not None:
+                        self._discard_file(state)
+                        state = None
+                    progress(event.file_path, "failed", 0)
+                    continue
+                
+                try:
+                    if isinstance(event, ChunkBatch):
+                        total_chunks += self._upsert_batch(event, state)
+                        progress(event.file_path, "embedding", len(state.added_ids))
+                    else:
+                        self._finalize_file(state)
+                        progress(event.file_path, "done", len(state.added_ids))
+                        state = None
+                except Exception:
+                    # Falha no embedding ou no banco: desfaz o que o arquivo já inseriu
+                    self._discard_file(state)
+                    progress(state.file_path, "failed", 0)
+                    raise
+        except IngestionCancelled:
+            if state is not None:
+                self._discard_file(state)
+                progress(state.file_path, "cancelled", 0)
+            raise
+        return total_chunks
+
+    def add_documents(self, file_paths: List[str], clear_existing: bool = False, remove_missing: bool = False,
+                      progress: Optional[ProgressCallback] = None, cancel_event: Optional[threading.Event] = None):
+        """Carrega, processa e adiciona documentos ao vector store de forma incremental.
+        
+        Cada arquivo é identificado pelo hash do seu conteúdo: arquivos já indexados com o
+        mesmo hash são ignorados, e de arquivos alterados apenas os chunks novos são
+        enviados para embedding. Os IDs dos pontos são derivados do hash de cada chunk.
+        Os chunks são inseridos em lotes de config.INGEST_BATCH_SIZE à medida que ficam
+        prontos, então os primeiros já podem ser consultados antes do fim da ingestão.
         
         Args:
             file_paths: Lista de caminhos dos arquivos a serem processados
             clear_existing: Se True, remove todos os documentos existentes antes de adicionar novos
+            remove_missing: Se True, remove da coleção os arquivos que não estão em file_paths
+            progress: Chamada a cada mudança de status de um arquivo: "parsing", "embedding",
+                "done", "failed" ou "cancelled" (pode vir de outra thread)
+            cancel_event: Quando sinalizado, interrompe a ingestão com IngestionCancelled
         """
+        from document_loaders import DocumentLoaderFactory, iter_load_documents
+        
         # Limpa documentos existentes se solicitado
         if clear_existing:
             try:
                 logger.info(f"Limpando documentos existentes da coleção '{self.collection_name}'...")
-                self.client.delete_collection(collection_name=self.collection_name)
+                delete_collection(self.client, self.collection_name)
                 
                 # Recria a coleção vazia
-                from qdrant_client.models import Distance, VectorParams
-                sample_embedding = self.embeddings.embed_query("test")
-                vector_size = len(sample_embedding)
-                
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-                )
-                
-                # Recria o vector store
-                self.vector_store = Qdrant(
-                    client=self.client,
-                    collection_name=self.collection_name,
-                    embeddings=self.embeddings,
-                )
-                self.retriever = self.vector_store.as_retriever()
+                self._create_collection()
+                self._load_collection_schema()
                 logger.info("Coleção limpa e recriada com sucesso.")
             except Exception as e:
                 logger.warning(f"Erro ao limpar coleção: {e}")
+        elif remove_missing:
+            try:
+                self._remove_missing_sources(file_paths)
+            except Exception as e:
+                logger.warning(f"Erro ao remover arquivos ausentes da coleção: {e}")
+        
+        if config.CHUNKING_STRATEGY == "characters":
+            # start_index permite unir chunks vizinhos ao montar o contexto (ver context_packing)
+            text_splitter = _lazy_import("RecursiveCharacterTextSplitter")(
+                chunk_size=config.CHUNK_SIZE, 
+                chunk_overlap=config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+        else:
+            text_splitter = DocumentChunker()
+        
+        report = progress or (lambda file_path, status, chunks=0: None)
         
-        documents = []
+        # Seleciona apenas arquivos novos ou alterados
+        pending = {}
         for file_path in file_paths:
             try:
-                logger.info(f"Carregando arquivo: {file_path}")
-                
-                # Usa DocumentLoaderFactory para selecionar o loader apropriado
-                from document_loaders import DocumentLoaderFactory
-                
                 if not DocumentLoaderFactory.is_supported(file_path):
                     logger.warning(f"Formato não suportado: {file_path}")
+                    report(file_path, "failed", 0)
                     continue
                 
-                loader = DocumentLoaderFactory.get_loader(file_path)
-                loaded_docs = loader.load()
-                documents.extend(loaded_docs)
+                file_hash = file_sha256(file_path)
+                if self._is_indexed(file_path, file_hash):
+                    logger.info(f"Arquivo inalterado, já indexado: {file_path}")
+                    report(file_path, "done", 0)
+                    continue
+                pending[file_path] = file_hash
             except Exception as e:
                 logger.error(f"Erro ao carregar o arquivo {file_path}: {e}")
+                report(file_path, "failed", 0)
                 continue
-
-        if not documents:
-            logger.warning("Nenhum documento foi carregado com sucesso.")
-            return
-
+        
+        def _reporting(results):
+            for result in results:
+                if not result.error:
+                    report(result.file_path, "parsing", 0)
+                yield result
+        
+        # Carregamento, divisão e embedding em fluxo: enquanto um lote é enviado ao
+        # banco vetorial, a thread de prefetch já carrega e divide os próximos
+        load_results = _reporting(iter_load_documents(list(pending), cancel_event=cancel_event))
+        events = prefetch(
+            iter_chunk_batches(load_results, pending, text_splitter, config.INGEST_BATCH_SIZE),
+            maxsize=config.INGEST_QUEUE_SIZE,
+            cancel_event=cancel_event,
+        )
+        
         try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=config.CHUNK_SIZE, 
-                chunk_overlap=config.CHUNK_OVERLAP
-            )
-            text_chunks = text_splitter.split_documents(documents)
-            
-            self.vector_store.add_documents(text_chunks)
-            logger.info(f"{len(text_chunks)} chunks de texto adicionados à coleção '{self.collection_name}'.")
+            with timer("ingest"):
+                total_chunks = self._ingest(events, progress, cancel_event)
+        except IngestionCancelled:
+            logger.warning(f"Ingestão cancelada na coleção '{self.collection_name}'.")
+            self.answer_cache.clear()
+            raise
         except Exception as e:
             logger.error(f"Erro ao processar e adicionar documentos ao banco vetorial: {e}")
             raise
+        finally:
+            events.close()
+
+        # Respostas em cache podem ter sido geradas com o conteúdo anterior da coleção
+        if clear_existing or remove_missing or pending:
+            self.answer_cache.clear()
+
+        logger.info(f"{total_chunks} chunks de texto adicionados à coleção '{self.collection_name}'.")
+        if isinstance(self.embeddings, CachedEmbeddings):
+            logger.info(f"Cache de embeddings: {self.embeddings.stats}")
+
+    def _retrieve(self, question: str, filters: Optional[Dict[str, Any]] = None):
+        """Recupera os chunks mais similares à pergunta.
+        
+        Args:
+            question: Pergunta
+            filters: Filtros de metadados (ver vector_index.build_filter)
+        
+        Returns:
+            Tupla (embedding da pergunta, documentos recuperados)
+        """
+        return self._retrieve_many([question], filters)[0]
+
+    def _query_request(self, question: str, vector: List[float], query_filter):
+        """Monta a consulta ao Qdrant: densa, ou híbrida com fusão por RRF.
+        
+        No modo híbrido as buscas densa e esparsa rodam como prefetch numa única
+        consulta e os resultados são combinados por reciprocal rank fusion.
+        Com reranking, a busca traz config.RERANK_CANDIDATES candidatos em vez de RETRIEVAL_K.
+        """
+        from qdrant_client.models import Fusion, FusionQuery, Prefetch, QueryRequest, SparseVector
+        
+        limit = config.RERANK_CANDIDATES if self.reranker is not None else config.RETRIEVAL_K
+        params = search_params()
+        if not self.hybrid:
+            return QueryRequest(
+                query=vector,
+                using=self.dense_vector_name,
+                filter=query_filter,
+                params=params,
+                limit=limit,
+                with_payload=True,
+            )
+        
+        indices, values = self.sparse_encoder.encode_query(question)
+        prefetch = [Prefetch(
+            query=vector,
+            using=self.dense_vector_name,
+            filter=query_filter,
+            params=params,
+            limit=max(config.HYBRID_PREFETCH_K, limit),
+        )]
+        if indices:
+            prefetch.append(Prefetch(
+                query=SparseVector(indices=indices, values=values),
+                using=SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=max(config.HYBRID_PREFETCH_K, limit),
+            ))
+        return QueryRequest(
+            prefetch=prefetch,
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=limit,
+            with_payload=True,
+        )
 
-    def answer(self, question: str) -> str:
-        """Recebe uma pergunta e retorna uma resposta."""
+    def _retrieve_many(self, questions: List[str], filters: Optional[Dict[str, Any]] = None):
+        """Versão em lote de _retrieve: um único cálculo de embeddings e uma única busca no Qdrant.
+        
+        Returns:
+            Lista de tuplas (embedding da pergunta, documentos recuperados)
+        """
+        query_filter = build_filter(filters)
+        with timer("query_embedding"):
+            vectors = self.query_embedding_cache.get_many_or_compute(
+                questions, lambda texts: embed_queries(self.embeddings, texts)
+            )
+        with timer("retrieval"):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(question, vector, query_filter)
+                    for question, vector in zip(questions, vectors)
+                ],
+            )
+        count("rag_retrieved_chunks_total", sum(len(response.points) for response in responses))
+        results = [
+            (vector, [self._to_document(point) for point in response.points])
+            for vector, response in zip(vectors, responses)
+        ]
+        if self.reranker is not None:
+            with timer("rerank"):
+                results = [
+                    (vector, self.reranker.rerank(question, documents, config.RETRIEVAL_K))
+                    for question, (vector, documents) in zip(questions, results)
+                ]
+        return results
+
+    def get_filter_values(self, field: str) -> List[Any]:
+        """Valores distintos de um metadado filtrável (ex.: "source", "type") na coleção."""
+        return facet_values(self.client, self.collection_name, field)
+
+    @staticmethod
+    def _to_document(point) -> Document:
+        """Converte um ponto do Qdrant no Document gravado pelo vector store."""
+        payload = point.payload or {}
+        return Document(
+            page_content=payload.get(CONTENT_KEY, ""),
+            metadata=payload.get(METADATA_KEY) or {},
+        )
+
+    @staticmethod
+    def _pack_context(documents: List[Document]) -> PackedContext:
+        """Une chunks sobrepostos, remove duplicatas e ajusta o contexto a config.CONTEXT_MAX_TOKENS."""
+        with timer("context_packing"):
+            packed = pack_context(documents)
+        logger.info(f"Contexto: {len(documents)} chunks → {len(packed.passages)} trechos, {packed.tokens} tokens.")
+        return packed
+
+    @staticmethod
+    def _context_key(documents: List[Document]) -> str:
+        """Identifica o contexto recuperado pelo hash dos chunks, na ordem."""
+        chunk_hashes = [doc.metadata.get("chunk_hash") or text_sha256(doc.page_content) for doc in documents]
+        return text_sha256("\n".join(chunk_hashes))
+
+    def _lookup_answer(self, question: str, filters: Optional[Dict[str, Any]] = None):
+        """Recupera o contexto e consulta o cache semântico.
+        
+        Returns:
+            Tupla (embedding da pergunta, documentos, chave do contexto, resposta em cache ou None)
+        """
+        vector, documents = self._retrieve(question, filters)
+        context_key = self._context_key(documents)
+        return vector, documents, context_key, self.answer_cache.lookup(vector, context_key)
+
+    def _lookup_answers(self, questions: List[str], filters: Optional[Dict[str, Any]] = None):
+        """Versão em lote de _lookup_answer."""
+        lookups = []
+        for vector, documents in self._retrieve_many(questions, filters):
+            context_key = self._context_key(documents)
+            lookups.append((vector, documents, context_key, self.answer_cache.lookup(vector, context_key)))
+        return lookups
+
+    def answer(self, question: str, filters: Optional[Dict[str, Any]] = None) -> str:
+        """Recebe uma pergunta e retorna uma resposta.
+        
+        Perguntas semanticamente equivalentes a uma já respondida, com o mesmo contexto
+        recuperado, são respondidas pelo cache sem chamar o LLM.
+        
+        Args:
+            question: Pergunta
+            filters: Restringe a busca por metadados, ex.: {"source": [...], "type": "csv", "sheet": "Vendas"}
+        """
         if not question:
             return "Por favor, insira uma pergunta."
         
         try:
             logger.info(f"Processando pergunta: {question}")
-            return self.rag_chain.invoke(question)
+            vector, documents, context_key, cached_answer = self._lookup_answer(question, filters)
+            if cached_answer is not None:
+                logger.info("Resposta obtida do cache semântico.")
+                return cached_answer
+            
+            context = self._pack_context(documents)
+            with timer("generation"):
+                response = self.rag_chain.invoke({"context": context.text, "question": question})
+            _count_llm_tokens(question, context, response)
+            self.answer_cache.store(vector, context_key, response)
+            return response
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua pergunta."
\ No newline at end of file
+            return "Desculpe, ocorreu um erro ao processar sua pergunta."
+
+    def answer_stream(self, question: str, filters: Optional[Dict[str, Any]] = None) -> AnswerStream:
+        """Recebe uma pergunta e retorna a resposta em streaming.
+        
+        A recuperação acontece nesta chamada, então `sources` já está disponível antes
+        da geração; os tokens do LLM são produzidos ao iterar o AnswerStream.
+        """
+        started_at = time.perf_counter()
+        if not question:
+            return AnswerStream(question, [], iter(["Por favor, insira uma pergunta."]), started_at)
+        
+        try:
+            logger.info(f"Processando pergunta (streaming): {question}")
+            vector, documents, context_key, cached_answer = self._lookup_answer(question, filters)
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta: {e}")
+            return AnswerStream(question, [], iter(["Desculpe, ocorreu um erro ao processar sua pergunta."]), started_at)
+        
+        if cached_answer is not None:
+            logger.info("Resposta obtida do cache semântico.")
+            return AnswerStream(question, documents, iter([cached_answer]), started_at)
+        
+        def _generate() -> Iterator[str]:
+            parts = []
+            generation_started_at = time.perf_counter()
+            try:
+                context = self._pack_context(documents)
+                for token in self.rag_chain.stream({"context": context.text, "question": question}):
+                    parts.append(token)
+                    yield token
+            except Exception as e:
+                logger.error(f"Erro ao gerar resposta: {e}")
+                count("rag_errors_total", stage="generation")
+                yield "Desculpe, ocorreu um erro ao processar sua pergunta."
+                return
+            record_stage("generation", time.perf_counter() - generation_started_at)
+            _count_llm_tokens(question, context, "".join(parts))
+            self.answer_cache.store(vector, context_key, "".join(parts))
+        
+        return AnswerStream(question, documents, _generate(), started_at)
+
+    async def aanswer(self, question: str, filters: Optional[Dict[str, Any]] = None) -> str:
+        """Versão assíncrona de answer()."""
+        answers = await self.aanswer_many([question], concurrency=1, filters=filters)
+        return answers[0]
+
+    async def aanswer_many(self, questions: List[str], concurrency: Optional[int] = None,
+                           filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Responde várias perguntas, com as chamadas ao LLM em paralelo.
+        
+        Os embeddings das perguntas são calculados numa única chamada e a recuperação
+        usa a busca em lote do Qdrant. As chamadas ao LLM são limitadas por um semáforo,
+        espaçadas por config.LLM_REQUESTS_PER_MINUTE e repetidas com backoff em caso de 429.
+        
+        Args:
+            questions: Perguntas a responder
+            concurrency: Máximo de chamadas simultâneas ao LLM (padrão: config.LLM_MAX_CONCURRENCY)
+            filters: Filtros de metadados aplicados a todas as perguntas (ver answer())
+        
+        Returns:
+            As respostas, na mesma ordem das perguntas.
+        """
+        answers = ["Por favor, insira uma pergunta."] * len(questions)
+        indexes = [i for i, question in enumerate(questions) if question]
+        if not indexes:
+            return answers
+        
+        try:
+            logger.info(f"Processando {len(indexes)} perguntas em lote...")
+            lookups = await asyncio.to_thread(self._lookup_answers, [questions[i] for i in indexes], filters)
+        except Exception as e:
+            logger.error(f"Erro ao gerar resposta: {e}")
+            for i in indexes:
+                answers[i] = "Desculpe, ocorreu um erro ao processar sua pergunta."
+            return answers
+        
+        semaphore = asyncio.Semaphore(concurrency or config.LLM_MAX_CONCURRENCY)
+        
+        async def _answer_one(question: str, vector, documents, context_key, cached_answer) -> str:
+            if cached_answer is not None:
+                return cached_answer
+            
+            async with semaphore:
+                try:
+                    # A contagem de tokens do empacotamento é CPU; fora do event loop
+                    context = await asyncio.to_thread(self._pack_context, documents)
+                    await self.llm_rate_limiter.acquire()
+                    with timer("generation"):
+                        response = await call_with_rate_limit_retry(
+                            lambda: self.rag_chain.ainvoke({"context": context.text, "question": question}),
+                            max_retries=config.LLM_MAX_RETRIES,
+                        )
+                except Exception as e:
+                    logger.error(f"Erro ao gerar resposta: {e}")
+                    return "Desculpe, ocorreu um erro ao processar sua pergunta."
+            
+            _count_llm_tokens(question, context, response)
+            self.answer_cache.store(vector, context_key, response)
+            return response
+        
+        responses = await asyncio.gather(*(
+            _answer_one(questions[i], *lookup) for i, lookup in zip(indexes, lookups)
+        ))
+        for i, response in zip(indexes, responses):
+            answers[i] = response
+        return answers
+
+    def answer_many(self, questions: List[str], concurrency: Optional[int] = None,
+                    filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Versão síncrona de aanswer_many()."""
+        return asyncio.run(self.aanswer_many(questions, concurrency, filters))
@@ -0,0 +1,65 @@
+"""
+Controle de taxa e novas tentativas para chamadas assíncronas ao LLM.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRateLimiter:
+    """Espaça o início das requisições para respeitar um limite por minuto.
+
+    O agendamento usa um lock de thread, então a mesma instância pode ser
+    compartilhada por vários event loops (ex.: chamadas sucessivas a asyncio.run).
+    """
+
+    def __init__(self, requests_per_minute: int = 0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        """Aguarda até o próximo horário livre (imediato se não houver limite)."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Indica se o erro é uma resposta HTTP 429 do provedor."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Lê o cabeçalho Retry-After da resposta, quando disponível."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def call_with_rate_limit_retry(call: Callable[[], Awaitable[Any]], max_retries: int,
+                                     base_delay: float = 1.0) -> Any:
+    """Executa `call`, repetindo com backoff exponencial quando o provedor retorna 429."""
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            delay = _retry_after_seconds(e) or base_delay * 2 ** attempt + random.uniform(0, base_delay)
+            logger.warning(f"Limite de requisições do LLM atingido; nova tentativa em {delay:.1f}s.")
+            await asyncio.sleep(delay)
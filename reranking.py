@@ -0,0 +1,143 @@
+"""
+Reordenação dos candidatos recuperados com um cross-encoder local.
+A busca traz config.RERANK_CANDIDATES candidatos, o cross-encoder (FastEmbed/ONNX,
+em CPU) pontua todos os pares (pergunta, chunk) numa única chamada em lote e só os
+config.RETRIEVAL_K melhores seguem para o contexto. Se o modelo não responder dentro
+de config.RERANK_TIMEOUT_MS, a ordem da busca vetorial é mantida.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from config import config
+from hashing import text_sha256
+from metrics import count
+
+logger = logging.getLogger(__name__)
+
+# Função de pontuação: (pergunta, textos) -> um score por texto, maior = mais relevante
+Scorer = Callable[[str, List[str]], List[float]]
+
+
+class CrossEncoderScorer:
+    """Cross-encoder do FastEmbed, carregado no primeiro uso."""
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: Optional[int] = None):
+        self.model_name = model_name or config.RERANK_MODEL
+        self.batch_size = batch_size or config.RERANK_BATCH_SIZE
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from fastembed.rerank.cross_encoder import TextCrossEncoder
+                    logger.info(f"Carregando o modelo de reranking {self.model_name}...")
+                    self._model = TextCrossEncoder(model_name=self.model_name)
+        return self._model
+
+    def __call__(self, question: str, texts: List[str]) -> List[float]:
+        return [float(score) for score in self.model.rerank(question, texts, batch_size=self.batch_size)]
+
+
+class Reranker:
+    """Reordena documentos por relevância, com orçamento de latência e cache de scores.
+
+    Args:
+        scorer: Função de pontuação (padrão: CrossEncoderScorer)
+        timeout: Segundos de espera pelo modelo antes de manter a ordem original
+            (padrão: config.RERANK_TIMEOUT_MS; 0 = sem limite)
+        max_entries: Scores (pergunta, chunk) mantidos no cache LRU
+            (padrão: config.RERANK_CACHE_MAX_ENTRIES; 0 desativa)
+    """
+
+    def __init__(self, scorer: Optional[Scorer] = None, timeout: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.scorer = scorer or CrossEncoderScorer()
+        self.timeout = timeout if timeout is not None else config.RERANK_TIMEOUT_MS / 1000
+        self.max_entries = max_entries if max_entries is not None else config.RERANK_CACHE_MAX_ENTRIES
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Um único worker: o modelo ONNX já usa vários núcleos em cada chamada
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        # Vaga do worker: ocupada do envio até o fim da pontuação, para a fila nunca crescer
+        self._slot = threading.Semaphore(1)
+
+    def warm_up(self):
+        """Carrega o modelo e executa uma pontuação de teste."""
+        self.scorer("warm-up", ["warm-up"])
+
+    @staticmethod
+    def _chunk_key(doc: Document) -> str:
+        return doc.metadata.get("chunk_hash") or text_sha256(doc.page_content)
+
+    def _score_and_cache(self, question: str, question_key: str, docs: List[Document]) -> Dict[str, float]:
+        try:
+            scores = self.scorer(question, [doc.page_content for doc in docs])
+        finally:
+            self._slot.release()
+        computed = {self._chunk_key(doc): score for doc, score in zip(docs, scores)}
+        if self.max_entries > 0:
+            with self._lock:
+                for chunk_key, score in computed.items():
+                    self._scores[(question_key, chunk_key)] = score
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        return computed
+
+    def rerank(self, question: str, documents: List[Document], top_k: Optional[int] = None) -> List[Document]:
+        """Retorna os `top_k` documentos mais relevantes, do mais ao menos relevante.
+
+        Em caso de timeout ou erro do modelo, retorna os `top_k` primeiros na ordem
+        recebida; a pontuação em andamento ainda preenche o cache para as próximas consultas.
+        Com orçamento de latência, se outra pontuação ainda ocupa o worker a consulta
+        também mantém a ordem da busca em vez de entrar na fila.
+        """
+        top_k = top_k or config.RETRIEVAL_K
+        if len(documents) <= 1:
+            return documents[:top_k]
+
+        question_key = text_sha256(question)
+        scores: Dict[str, float] = {}
+        with self._lock:
+            for doc in documents:
+                key = (question_key, self._chunk_key(doc))
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key[1]] = self._scores[key]
+
+        missing = list({self._chunk_key(doc): doc for doc in documents if self._chunk_key(doc) not in scores}.values())
+        if missing:
+            # Sem timeout a consulta espera a vaga; com timeout, não enfileira atrás de outra
+            if not self._slot.acquire(blocking=not self.timeout):
+                logger.warning("Reranking ocupado; mantendo a ordem da busca vetorial.")
+                count("rag_rerank_fallbacks_total", reason="busy")
+                return documents[:top_k]
+            try:
+                future = self._executor.submit(self._score_and_cache, question, question_key, missing)
+            except BaseException:
+                self._slot.release()
+                raise
+            try:
+                scores.update(future.result(timeout=self.timeout or None))
+            except FutureTimeoutError:
+                logger.warning(f"Reranking excedeu {self.timeout * 1000:.0f}ms; mantendo a ordem da busca vetorial.")
+                count("rag_rerank_fallbacks_total", reason="timeout")
+                return documents[:top_k]
+            except Exception as e:
+                logger.warning(f"Falha no reranking ({e}); mantendo a ordem da busca vetorial.")
+                count("rag_rerank_fallbacks_total", reason="error")
+                return documents[:top_k]
+
+        # sorted é estável: empates mantêm a ordem da busca
+        ranked = sorted(documents, key=lambda doc: scores[self._chunk_key(doc)], reverse=True)
+        return ranked[:top_k]
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
@@ -0,0 +1,361 @@
+"""
+Servidor HTTP do pipeline RAG, sem interface, para integração com outros serviços
+e testes de carga. Cada worker mantém um único RAGPipeline aquecido, compartilhado
+por todas as requisições; as chamadas bloqueantes rodam em threads.
+
+Endpoints:
+    GET    /health              Estado do worker (pronto após o aquecimento dos modelos)
+    GET    /metrics             Métricas no formato Prometheus (?format=json para JSON)
+    POST   /ingest              Upload multipart (campo "files") ou JSON {"paths": [...]}; retorna o job
+    GET    /ingest/{job_id}     Progresso do job de ingestão
+    DELETE /ingest/{job_id}     Cancela o job
+    POST   /query               {"question": ..., "filters": {...}} ou {"questions": [...]}
+    POST   /query/stream        Resposta em Server-Sent Events: sources, token..., done
+
+Uso:
+    python server.py --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+from config import config
+from ingestion_jobs import IngestionJob, IngestionJobQueue
+from metrics import count, metrics, record_stage
+from snapshots import restore_if_empty
+from upload_store import UploadStore
+from vector_index import build_filter, create_client
+
+logger = logging.getLogger(__name__)
+
+PIPELINE = web.AppKey("pipeline", object)
+JOBS = web.AppKey("jobs", IngestionJobQueue)
+UPLOADS = web.AppKey("uploads", UploadStore)
+WARM_UP = web.AppKey("warm_up", object)
+
+_SENTINEL = object()
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": message}, status=status)
+
+
+def _bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(text=json.dumps({"error": message}, ensure_ascii=False), content_type="application/json")
+
+
+async def _read_json(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise _bad_request("Corpo JSON inválido.")
+    if not isinstance(body, dict):
+        raise _bad_request("O corpo deve ser um objeto JSON.")
+    return body
+
+
+def _filters(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Valida os filtros de metadados antes de chegar ao pipeline."""
+    filters = body.get("filters") or None
+    try:
+        build_filter(filters)
+    except (ValueError, AttributeError) as e:
+        raise _bad_request(f"Filtros inválidos: {e}")
+    return filters
+
+
+def _job_payload(job: IngestionJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "progress": job.progress,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "files": [
+            {"file_path": progress.file_path, "status": progress.status, "chunks": progress.chunks}
+            for progress in job.file_progress()
+        ],
+    }
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    """Conta as requisições por rota e status e mede a duração de cada uma."""
+    started_at = time.perf_counter()
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        record_stage("http_request", time.perf_counter() - started_at, route=route)
+        count("rag_http_requests_total", route=route, method=request.method, status=status)
+
+
+async def health(request: web.Request) -> web.Response:
+    warm_up = request.app[WARM_UP]
+    ready = warm_up is None or not warm_up.is_alive()
+    pipeline = request.app[PIPELINE]
+    return web.json_response({
+        "status": "ok" if ready else "warming_up",
+        "collection": pipeline.collection_name,
+        "retrieval_mode": "hybrid" if pipeline.hybrid else "dense",
+        "pid": os.getpid(),
+    })
+
+
+async def metrics_endpoint(request: web.Request) -> web.Response:
+    if request.query.get("format") == "json":
+        return web.json_response(metrics.snapshot())
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def _save_uploads(request: web.Request) -> List[str]:
+    """Grava os arquivos do upload multipart no armazenamento endereçado por conteúdo.
+
+    O `client_max_size` não vale para a leitura em fluxo, então o limite de
+    config.MAX_FILE_SIZE_MB por arquivo é aplicado aqui; o arquivo em gravação é descartado.
+    """
+    max_bytes = config.MAX_FILE_SIZE_MB * 1024 * 1024
+    file_paths = []
+    reader = await request.multipart()
+    async for part in reader:
+        if part.name != "files" or not part.filename:
+            continue
+        received = 0
+        with request.app[UPLOADS].writer(part.filename) as upload:
+            while chunk := await part.read_chunk():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise web.HTTPRequestEntityTooLarge(
+                        max_size=max_bytes,
+                        actual_size=received,
+                        text=json.dumps(
+                            {"error": f"Arquivo {part.filename} excede o limite de {config.MAX_FILE_SIZE_MB}MB."},
+                            ensure_ascii=False,
+                        ),
+                        content_type="application/json",
+                    )
+                upload.write(chunk)
+        file_paths.append(upload.path)
+    return file_paths
+
+
+def _validate_paths(paths: Any) -> List[str]:
+    """Aceita apenas arquivos existentes dentro de config.DATA_DIR."""
+    if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+        raise _bad_request("'paths' deve ser uma lista de caminhos.")
+    data_dir = os.path.realpath(config.DATA_DIR)
+    for path in paths:
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([data_dir, real_path]) != data_dir or not os.path.isfile(real_path):
+            raise _bad_request(f"Arquivo inexistente ou fora de {config.DATA_DIR}: {path}")
+    return paths
+
+
+async def ingest(request: web.Request) -> web.Response:
+    options = {}
+    if request.content_type.startswith("multipart/"):
+        file_paths = await _save_uploads(request)
+        options["remove_missing"] = request.query.get("remove_missing") == "true"
+    else:
+        body = await _read_json(request)
+        file_paths = _validate_paths(body.get("paths"))
+        options["clear_existing"] = bool(body.get("clear_existing", False))
+        options["remove_missing"] = bool(body.get("remove_missing", False))
+    if not file_paths:
+        return _error(400, "Nenhum arquivo enviado.")
+
+    jobs = request.app[JOBS]
+    # Mesma limpeza da interface: uploads antigos ou acima da cota saem, exceto os em uso
+    in_use = [path for job in jobs.jobs() if not job.finished for path in job.file_paths]
+    await asyncio.to_thread(request.app[UPLOADS].cleanup, keep=file_paths + in_use)
+    job = jobs.submit(file_paths, **options)
+    return web.json_response(_job_payload(job), status=202)
+
+
+async def ingest_status(request: web.Request) -> web.Response:
+    job = request.app[JOBS].get(request.match_info["job_id"])
+    if job is None:
+        return _error(404, "Job não encontrado.")
+    return web.json_response(_job_payload(job))
+
+
+async def ingest_cancel(request: web.Request) -> web.Response:
+    jobs = request.app[JOBS]
+    job = jobs.get(request.match_info["job_id"])
+    if job is None:
+        return _error(404, "Job não encontrado.")
+    jobs.cancel(job.id)
+    return web.json_response(_job_payload(job), status=202)
+
+
+async def ingest_unavailable(request: web.Request) -> web.Response:
+    return _error(409, "Ingestão via HTTP indisponível com SERVER_WORKERS > 1: cada processo tem sua "
+                       "própria fila de jobs. Ingira com um servidor de 1 worker ou pela interface.")
+
+
+async def query(request: web.Request) -> web.Response:
+    body = await _read_json(request)
+    filters = _filters(body)
+    pipeline = request.app[PIPELINE]
+
+    if "questions" in body:
+        questions = body["questions"]
+        if not isinstance(questions, list) or not all(isinstance(question, str) for question in questions):
+            return _error(400, "'questions' deve ser uma lista de textos.")
+        answers = await pipeline.aanswer_many(questions, filters=filters)
+        return web.json_response({"answers": answers})
+
+    question = body.get("question")
+    if not isinstance(question, str) or not question.strip():
+        return _error(400, "Informe 'question'.")
+    return web.json_response({"answer": await pipeline.aanswer(question, filters=filters)})
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+async def query_stream(request: web.Request) -> web.StreamResponse:
+    body = await _read_json(request)
+    filters = _filters(body)
+    question = body.get("question")
+    if not isinstance(question, str) or not question.strip():
+        return _error(400, "Informe 'question'.")
+
+    pipeline = request.app[PIPELINE]
+    # A recuperação e cada token do LLM são bloqueantes: rodam fora do event loop
+    stream = await asyncio.to_thread(pipeline.answer_stream, question, filters)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    await response.write(_sse("sources", [
+        {"page_content": doc.page_content, "metadata": doc.metadata} for doc in stream.sources
+    ]))
+
+    tokens = iter(stream)
+    while (token := await asyncio.to_thread(next, tokens, _SENTINEL)) is not _SENTINEL:
+        await response.write(_sse("token", token))
+
+    await response.write(_sse("done", {"answer": stream.answer, "time_to_first_token": stream.time_to_first_token}))
+    await response.write_eof()
+    return response
+
+
+def create_app(pipeline=None, ingest_enabled: bool = True) -> web.Application:
+    """Cria a aplicação HTTP.
+
+    Args:
+        pipeline: RAGPipeline a servir; se omitido, é criado na inicialização do worker
+            e os modelos são aquecidos em segundo plano.
+        ingest_enabled: Se False, /ingest responde 409. Com vários processos a fila de
+            jobs seria de cada processo, e a consulta ou o cancelamento de um job cairia
+            em outro processo (ver run).
+    """
+    app = web.Application(
+        middlewares=[metrics_middleware],
+        client_max_size=config.MAX_FILE_SIZE_MB * 1024 * 1024,
+    )
+
+    async def _pipeline_context(app: web.Application):
+        warm_up = None
+        current = pipeline
+        if current is None:
+            from rag_pipeline import RAGPipeline
+            current = await asyncio.to_thread(RAGPipeline)
+            warm_up = current.start_warm_up()
+        app[PIPELINE] = current
+        app[WARM_UP] = warm_up
+        if ingest_enabled:
+            app[JOBS] = IngestionJobQueue(current)
+            app[UPLOADS] = UploadStore()
+        yield
+        if ingest_enabled:
+            app[JOBS].shutdown(wait=False)
+
+    app.cleanup_ctx.append(_pipeline_context)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics_endpoint)
+    if ingest_enabled:
+        app.router.add_post("/ingest", ingest)
+        app.router.add_get("/ingest/{job_id}", ingest_status)
+        app.router.add_delete("/ingest/{job_id}", ingest_cancel)
+    else:
+        app.router.add_post("/ingest", ingest_unavailable)
+        app.router.add_get("/ingest/{job_id}", ingest_unavailable)
+        app.router.add_delete("/ingest/{job_id}", ingest_unavailable)
+    app.router.add_post("/query", query)
+    app.router.add_post("/query/stream", query_stream)
+    return app
+
+
+def _serve(host: str, port: int, reuse_port: bool, ingest_enabled: bool = True):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    web.run_app(create_app(ingest_enabled=ingest_enabled), host=host, port=port, reuse_port=reuse_port, print=None)
+
+
+def run(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None):
+    """Inicia o servidor com `workers` processos escutando na mesma porta (SO_REUSEPORT).
+
+    Cada processo carrega seu próprio pipeline e modelos. O Qdrant local em disco só
+    pode ser aberto por um processo, então vários workers exigem QDRANT_URL. Com vários
+    workers, /ingest fica desativado: o SO_REUSEPORT distribui as conexões entre os
+    processos e a consulta de um job cairia num processo que não o conhece.
+    """
+    host = host or config.SERVER_HOST
+    port = port or config.SERVER_PORT
+    workers = max(1, workers or config.SERVER_WORKERS)
+    if workers > 1 and not config.QDRANT_URL:
+        logger.warning("O Qdrant local não aceita vários processos; iniciando com 1 worker. Configure QDRANT_URL para escalar.")
+        workers = 1
+
+    if config.SNAPSHOT_RESTORE_PATH:
+        # Uma única vez, antes dos workers, para que não importem o snapshot em paralelo
+        client = create_client()
+        try:
+            restore_if_empty(client)
+        finally:
+            client.close()
+    
+    logger.info(f"Servidor RAG em http://{host}:{port} com {workers} worker(s).")
+    if workers > 1:
+        logger.warning("Com vários workers, /ingest está desativado; ingira com um servidor de 1 worker ou pela interface.")
+    if workers == 1:
+        _serve(host, port, reuse_port=False)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_serve, args=(host, port, True, False), name=f"rag-server-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP do pipeline RAG.")
+    parser.add_argument("--host", help="Endereço de escuta (padrão: SERVER_HOST)")
+    parser.add_argument("--port", type=int, help="Porta (padrão: SERVER_PORT)")
+    parser.add_argument("--workers", type=int, help="Processos (padrão: SERVER_WORKERS)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    run(args.host, args.port, args.workers)
@@ -0,0 +1,337 @@
+"""
+Snapshots da coleção para inicialização rápida de réplicas e ambientes.
+O arquivo é um tar com `manifest.json` (versão do formato, modelo de embeddings,
+dimensão e configuração da coleção) seguido dos pontos em lotes: vetores densos
+em `.npy` (float32) e IDs, payloads e vetores esparsos em `.jsonl`. A importação
+carrega os vetores em lote, sem recalcular embeddings nem transcrever mídia, e
+recusa snapshots gerados com outro modelo de embeddings.
+
+Uso:
+    python snapshots.py export snapshots/rag.tar
+    python snapshots.py import snapshots/rag.tar
+    python snapshots.py info snapshots/rag.tar
+"""
+
+import io
+import os
+import json
+import time
+import logging
+import uuid
+import tarfile
+import argparse
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import config
+from sparse_encoder import BM25SparseEncoder
+from vector_index import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, alias_target, create_collection, optimizers_config
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Pontos por lote no arquivo e por requisição ao Qdrant
+_BATCH = 1024
+
+
+class IncompatibleSnapshotError(ValueError):
+    """O snapshot não pode ser importado nesta configuração (ex.: outro modelo de embeddings)."""
+
+
+def _library_version() -> Optional[str]:
+    try:
+        return metadata.version("fastembed")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _add_file(archive: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
+
+def _dense_vector(vector):
+    return vector[DENSE_VECTOR_NAME] if isinstance(vector, dict) else vector
+
+
+def _sparse_vector(vector) -> Optional[Dict[str, List]]:
+    sparse = vector.get(SPARSE_VECTOR_NAME) if isinstance(vector, dict) else None
+    if sparse is None:
+        return None
+    return {"indices": list(sparse.indices), "values": list(sparse.values)}
+
+
+def _iter_batches(client, collection_name: str) -> Iterator[List[Any]]:
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=_BATCH,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if records:
+            yield records
+        if offset is None:
+            return
+
+
+def export_snapshot(client, collection_name: str, path: str, embedding_model: Optional[str] = None) -> Dict[str, Any]:
+    """Exporta todos os pontos da coleção para um arquivo de snapshot.
+
+    O arquivo é gravado num temporário e só substitui `path` ao final.
+
+    Args:
+        client: Cliente Qdrant
+        collection_name: Coleção a exportar
+        path: Caminho do arquivo .tar
+        embedding_model: Modelo que gerou os vetores (padrão: config.EMBEDDING_MODEL)
+
+    Returns:
+        O manifesto gravado no snapshot.
+    """
+    import numpy as np
+
+    info = client.get_collection(collection_name)
+    params = info.config.params
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "collection": collection_name,
+        "points": client.count(collection_name, exact=True).count,
+        "embedding": {
+            "model": embedding_model or config.EMBEDDING_MODEL,
+            "dimension": _dense_vector(params.vectors).size,
+            "fastembed_version": _library_version(),
+        },
+        "hybrid": isinstance(params.sparse_vectors, dict) and SPARSE_VECTOR_NAME in params.sparse_vectors,
+        "collection_config": info.config.model_dump(mode="json"),
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    exported = 0
+    started_at = time.perf_counter()
+    try:
+        with tarfile.open(temporary_path, "w") as archive:
+            _add_file(archive, MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+            for index, records in enumerate(_iter_batches(client, collection_name)):
+                vectors = io.BytesIO()
+                np.save(vectors, np.asarray([_dense_vector(r.vector) for r in records], dtype=np.float32))
+                lines = [
+                    json.dumps({"id": r.id, "payload": r.payload, "sparse": _sparse_vector(r.vector)}, ensure_ascii=False)
+                    for r in records
+                ]
+                _add_file(archive, f"points/{index:06d}.npy", vectors.getvalue())
+                _add_file(archive, f"points/{index:06d}.jsonl", "\n".join(lines).encode("utf-8"))
+                exported += len(records)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    manifest["points"] = exported
+    logger.info(f"Snapshot da coleção '{collection_name}' exportado para {path}: "
+                f"{exported} pontos em {time.perf_counter() - started_at:.1f}s.")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Lê apenas o manifesto de um snapshot."""
+    with tarfile.open(path, "r|*") as archive:
+        return _read_manifest(archive)
+
+
+def _read_manifest(archive: tarfile.TarFile) -> Dict[str, Any]:
+    member = archive.next()
+    if member is None or member.name != MANIFEST_NAME:
+        raise IncompatibleSnapshotError(f"Arquivo de snapshot inválido: '{MANIFEST_NAME}' não encontrado.")
+    return json.loads(archive.extractfile(member).read().decode("utf-8"))
+
+
+def check_compatibility(manifest: Dict[str, Any], embedding_model: Optional[str] = None,
+                        dimension: Optional[int] = None):
+    """Recusa snapshots de outra versão do formato ou de outro modelo de embeddings.
+
+    Raises:
+        IncompatibleSnapshotError: Se o snapshot não puder ser importado
+    """
+    embedding_model = embedding_model or config.EMBEDDING_MODEL
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise IncompatibleSnapshotError(
+            f"Versão do snapshot não suportada: {manifest.get('format_version')} (esperada: {FORMAT_VERSION})."
+        )
+    embedding = manifest.get("embedding", {})
+    if embedding.get("model") != embedding_model:
+        raise IncompatibleSnapshotError(
+            f"Snapshot gerado com o modelo '{embedding.get('model')}', mas o pipeline usa '{embedding_model}'."
+        )
+    if dimension is not None and embedding.get("dimension") != dimension:
+        raise IncompatibleSnapshotError(
+            f"Snapshot com vetores de dimensão {embedding.get('dimension')}, mas o pipeline usa {dimension}."
+        )
+    if embedding.get("fastembed_version") != _library_version():
+        logger.warning(
+            f"Snapshot gerado com fastembed {embedding.get('fastembed_version')}; "
+            f"versão instalada: {_library_version()}."
+        )
+
+
+def _iter_points(archive: tarfile.TarFile) -> Iterator[Tuple[Any, Any]]:
+    """Gera pares (vetores densos, linhas) de cada lote, na ordem do arquivo."""
+    import numpy as np
+
+    vectors = None
+    for member in archive:
+        # No modo de leitura em fluxo o manifesto, já lido, volta na iteração
+        if not member.name.startswith("points/"):
+            continue
+        data = archive.extractfile(member).read()
+        if member.name.endswith(".npy"):
+            vectors = np.load(io.BytesIO(data))
+        elif member.name.endswith(".jsonl"):
+            yield vectors, [json.loads(line) for line in data.decode("utf-8").splitlines()]
+            vectors = None
+
+
+def _to_point(dense, record: Dict[str, Any], hybrid: bool, sparse_encoder: BM25SparseEncoder):
+    """Monta o ponto no esquema da coleção de destino, gerando o vetor esparso se faltar."""
+    from qdrant_client import models
+
+    if not hybrid:
+        return models.PointStruct(id=record["id"], vector=dense, payload=record["payload"])
+    sparse = record.get("sparse")
+    if sparse is None:
+        indices, values = sparse_encoder.encode_document((record["payload"] or {}).get("page_content", ""))
+        sparse = {"indices": indices, "values": values}
+    vector = {DENSE_VECTOR_NAME: dense, SPARSE_VECTOR_NAME: models.SparseVector(**sparse)}
+    return models.PointStruct(id=record["id"], vector=vector, payload=record["payload"])
+
+
+def _swap_alias(client, collection_name: str, loaded_name: str):
+    """Aponta o nome da coleção para `loaded_name` e exclui a coleção anterior.
+
+    Se o nome já for um alias (snapshot importado antes), a troca é atômica. Na
+    primeira importação o nome ainda é uma coleção comum e precisa ser excluído
+    antes de virar alias, o que deixa um intervalo curto sem coleção.
+    """
+    from qdrant_client import models
+
+    previous = alias_target(client, collection_name)
+    operations = []
+    if previous is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=collection_name)))
+    elif client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=loaded_name, alias_name=collection_name),
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    if previous is not None:
+        client.delete_collection(previous)
+
+
+def import_snapshot(client, collection_name: str, path: str, embedding_model: Optional[str] = None,
+                    dimension: Optional[int] = None, hybrid: Optional[bool] = None) -> int:
+    """Substitui a coleção pelos pontos do snapshot, sem recalcular embeddings.
+
+    A compatibilidade é verificada antes de qualquer alteração. Os pontos são
+    carregados numa coleção nova, criada com os parâmetros de índice atuais do Config
+    e com a indexação do HNSW suspensa durante a carga; só depois de carregada ela
+    passa a responder pelo nome da coleção, através de um alias. Se a carga falhar
+    (ex.: arquivo truncado), a coleção atual fica intacta.
+
+    Args:
+        client: Cliente Qdrant
+        collection_name: Nome da coleção de destino
+        path: Caminho do arquivo .tar
+        embedding_model: Modelo do pipeline (padrão: config.EMBEDDING_MODEL)
+        dimension: Dimensão esperada dos vetores, se conhecida
+        hybrid: Esquema de destino; por padrão segue config.RETRIEVAL_MODE
+
+    Returns:
+        Número de pontos importados.
+
+    Raises:
+        IncompatibleSnapshotError: Se o snapshot for de outro formato ou modelo
+    """
+    from qdrant_client import models
+
+    if hybrid is None:
+        hybrid = config.RETRIEVAL_MODE == "hybrid"
+    sparse_encoder = BM25SparseEncoder()
+    started_at = time.perf_counter()
+    loaded_name = f"{collection_name}__snapshot_{uuid.uuid4().hex[:12]}"
+    imported = 0
+
+    with tarfile.open(path, "r|*") as archive:
+        manifest = _read_manifest(archive)
+        check_compatibility(manifest, embedding_model, dimension)
+
+        logger.info(f"Importando snapshot {path} ({manifest.get('points')} pontos) na coleção '{collection_name}'...")
+        create_collection(client, loaded_name, manifest["embedding"]["dimension"], hybrid)
+        try:
+            client.update_collection(loaded_name, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0))
+            try:
+                for vectors, records in _iter_points(archive):
+                    points = [
+                        _to_point(dense, record, hybrid, sparse_encoder)
+                        for dense, record in zip(vectors.tolist(), records)
+                    ]
+                    client.upload_points(loaded_name, points=points, batch_size=_BATCH, wait=True)
+                    imported += len(points)
+            finally:
+                client.update_collection(loaded_name, optimizers_config=optimizers_config())
+            if manifest.get("points") is not None and imported != manifest["points"]:
+                raise IncompatibleSnapshotError(
+                    f"Snapshot incompleto: {imported} de {manifest['points']} pontos."
+                )
+        except BaseException:
+            client.delete_collection(loaded_name)
+            raise
+
+    _swap_alias(client, collection_name, loaded_name)
+    logger.info(f"Snapshot importado: {imported} pontos em {time.perf_counter() - started_at:.1f}s.")
+    return imported
+
+
+def restore_if_empty(client, collection_name: Optional[str] = None, path: Optional[str] = None, **options) -> int:
+    """Importa o snapshot config.SNAPSHOT_RESTORE_PATH se a coleção não existir ou estiver vazia.
+
+    Deve rodar uma única vez por implantação, antes de iniciar os workers (ver server.run).
+
+    Returns:
+        Número de pontos importados (0 se nada foi feito).
+    """
+    collection_name = collection_name or config.COLLECTION_NAME
+    path = path or config.SNAPSHOT_RESTORE_PATH
+    if not path:
+        return 0
+    if client.collection_exists(collection_name) and client.count(collection_name, exact=True).count > 0:
+        logger.info(f"Coleção '{collection_name}' já possui pontos; snapshot {path} não importado.")
+        return 0
+    return import_snapshot(client, collection_name, path, **options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta, importa ou descreve snapshots da coleção.")
+    parser.add_argument("action", choices=["export", "import", "info"])
+    parser.add_argument("path", help="Arquivo .tar do snapshot")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.action == "info":
+        print(json.dumps(read_manifest(args.path), indent=2, ensure_ascii=False))
+        raise SystemExit(0)
+
+    from vector_index import create_client
+    if args.action == "export":
+        export_snapshot(create_client(), config.COLLECTION_NAME, args.path)
+    else:
+        import_snapshot(create_client(), config.COLLECTION_NAME, args.path)
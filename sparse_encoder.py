@@ -0,0 +1,65 @@
+"""
+Vetores esparsos léxicos no estilo BM25 para a busca híbrida.
+Os documentos recebem o peso de frequência de termo do BM25 (com saturação e
+normalização por tamanho); o IDF é aplicado pelo próprio Qdrant através do
+modificador `Modifier.IDF` do vetor esparso.
+"""
+
+import re
+import zlib
+import unicodedata
+from collections import Counter
+from typing import List, Tuple
+
+# Palavras muito frequentes que não ajudam na busca lexical
+_STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por para com sem e ou que se
+ao aos à às é ser são foi como mais mas não sua seu suas seus ele ela eles elas isso este esta
+the an and or of to in on for with is are was be by at it this that from as
+""".split())
+
+# Identificadores compostos (ex.: ABC-123, v1.2, 2024/05) são indexados inteiros e por partes
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas e sem acentos, para que "não" e "nao" coincidam."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide o texto em termos para o índice lexical."""
+    tokens = []
+    for match in _TOKEN_PATTERN.findall(_normalize(text)):
+        parts = re.split(r"[-./]", match)
+        if len(parts) > 1:
+            tokens.append(match)
+        tokens.extend(part for part in parts if part and part not in _STOPWORDS)
+    return tokens
+
+
+def _term_index(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class BM25SparseEncoder:
+    """Codifica textos em vetores esparsos (índices, valores) para o Qdrant."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 256.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        """Pesos de frequência de termo do BM25 para um documento."""
+        counts = Counter(_term_index(term) for term in tokenize(text))
+        length_norm = 1 - self.b + self.b * sum(counts.values()) / self.avg_doc_length
+        indices = list(counts)
+        values = [tf * (self.k1 + 1) / (tf + self.k1 * length_norm) for tf in counts.values()]
+        return indices, values
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        """Peso 1 para cada termo distinto da consulta (o IDF vem do Qdrant)."""
+        indices = list(dict.fromkeys(_term_index(term) for term in tokenize(text)))
+        return indices, [1.0] * len(indices)
@@ -1,5 +1,21 @@
 import sys
 import os
+import pytest
 
 # Adiciona o diretório raiz ao path para permitir imports dos módulos
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class WordTokenizer:
+    """Tokenizador de teste: um token por palavra."""
+
+    def count(self, text):
+        return len(text.split())
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+@pytest.fixture
+def word_tokenizer():
+    return WordTokenizer()
@@ -0,0 +1,44 @@
+from benchmarks.corpus import generate_corpus, generate_questions, parse_mix
+from benchmarks.harness import compare, percentile, run_benchmark
+
+
+def test_percentile_interpolates():
+    """Testa o cálculo de percentis com interpolação linear."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([], 95) == 0.0
+
+
+def test_corpus_is_deterministic(tmp_path):
+    """Testa se a mesma semente gera o mesmo corpus e a mistura de formatos pedida."""
+    first = generate_corpus(str(tmp_path / "a"), 4, parse_mix("txt=1,csv=1"), seed=7, paragraphs=2, rows=5)
+    second = generate_corpus(str(tmp_path / "b"), 4, parse_mix("txt=1,csv=1"), seed=7, paragraphs=2, rows=5)
+
+    assert [path.rsplit(".", 1)[1] for path in first] == ["txt", "csv", "txt", "csv"]
+    assert [open(path, "rb").read() for path in first] == [open(path, "rb").read() for path in second]
+    assert generate_questions(3, seed=7) == generate_questions(3, seed=7)
+
+
+def test_compare_flags_regressions_by_direction():
+    """Testa se throughput menor e latência maior além da tolerância são regressões."""
+    baseline = {"stages": {"query": {"queries_per_s": 100.0, "latency_p95_ms": 10.0, "queries": 50}}}
+    results = {"stages": {"query": {"queries_per_s": 80.0, "latency_p95_ms": 10.5, "queries": 50}}}
+
+    comparisons = {c.metric: c for c in compare(results, baseline, tolerance=0.10)}
+
+    assert comparisons["queries_per_s"].regression
+    assert not comparisons["latency_p95_ms"].regression
+    assert "queries" not in comparisons
+
+
+def test_run_benchmark_reports_all_stages():
+    """Executa um benchmark mínimo com Qdrant em memória e LLM falso."""
+    results = run_benchmark(documents=2, mix={"csv": 1}, queries=3, rows=5)
+
+    stages = results["stages"]
+    assert set(stages) == {"ingest", "reingest", "query", "query_stream", "query_batch"}
+    assert stages["ingest"]["chunks"] == 2  # as 5 linhas de cada CSV viram um único chunk
+    assert stages["ingest"]["failed_files"] == 0
+    assert stages["query"]["latency_p99_ms"] >= stages["query"]["latency_p50_ms"] > 0
+    assert stages["query_batch"]["peak_rss_mb"] > 0
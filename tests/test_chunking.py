@@ -0,0 +1,62 @@
+from langchain_core.documents import Document
+from chunking import DocumentChunker
+from context_packing import source_label
+
+
+def _rows(count, sheet="Q1", start=0):
+    for row in range(start, start + count):
+        yield Document(
+            page_content=f"produto: item{row}\nvalor: {row}",
+            metadata={"source": "/data/vendas.xlsx", "sheet": sheet, "row": row, "type": "excel"},
+        )
+
+
+def test_table_rows_are_packed_with_header_per_sheet(word_tokenizer):
+    """Linhas consecutivas da mesma planilha viram poucos chunks, cada um com cabeçalho."""
+    chunker = DocumentChunker(table_chunk_tokens=20, tokenizer=word_tokenizer)
+    documents = list(_rows(7)) + list(_rows(2, sheet="Q2"))
+
+    chunks = chunker.split_documents(iter(documents))
+
+    # Cada linha ocupa 5 tokens com o separador: 4 linhas por chunk
+    assert [(c.metadata["sheet"], c.metadata["row"], c.metadata["row_end"]) for c in chunks] == [
+        ("Q1", 0, 3), ("Q1", 4, 6), ("Q2", 0, 1)
+    ]
+    assert chunks[1].page_content == (
+        "vendas.xlsx | planilha Q1 | linhas 4 a 6\n\n"
+        "produto: item4\nvalor: 4\n\nproduto: item5\nvalor: 5\n\nproduto: item6\nvalor: 6"
+    )
+    assert source_label(chunks[1].metadata) == "vendas.xlsx Q1 l.4-6"
+
+
+def test_transcript_segments_are_joined_and_long_segments_split_on_sentences(word_tokenizer):
+    """Segmentos curtos são unidos; um segmento longo é dividido entre frases com tempos proporcionais."""
+    chunker = DocumentChunker(chunk_tokens=8, tokenizer=word_tokenizer)
+
+    def _segment(index, text, start, end):
+        metadata = {"source": "reuniao.mp3", "type": "audio", "segment": index, "start": start, "end": end}
+        return Document(page_content=text, metadata=metadata)
+
+    chunks = chunker.split_documents([
+        _segment(0, "bom dia a todos", 0.0, 30.0),
+        _segment(1, "vamos começar", 30.0, 60.0),
+        _segment(2, "Primeiro item da pauta aprovado. Segundo item da pauta adiado.", 60.0, 90.0),
+    ])
+
+    assert [c.page_content for c in chunks] == [
+        "bom dia a todos vamos começar", "Primeiro item da pauta aprovado.", "Segundo item da pauta adiado."
+    ]
+    assert (chunks[0].metadata["start"], chunks[0].metadata["end"]) == (0.0, 60.0)
+    assert chunks[1].metadata["start"] == 60.0 and chunks[2].metadata["end"] == 90.0
+    assert chunks[1].metadata["end"] == chunks[2].metadata["start"]
+
+
+def test_prose_is_split_by_tokens_with_start_index(word_tokenizer):
+    """Textos sem tipo tabular ou de mídia são divididos pelo número de tokens."""
+    chunker = DocumentChunker(chunk_tokens=10, chunk_overlap_tokens=0, tokenizer=word_tokenizer)
+    text = " ".join(f"palavra{i}" for i in range(25))
+
+    chunks = chunker.split_documents([Document(page_content=text, metadata={"source": "a.pdf", "type": "pdf"})])
+
+    assert [len(c.page_content.split()) for c in chunks] == [10, 10, 5]
+    assert [text[c.metadata["start_index"]:].startswith(c.page_content) for c in chunks] == [True] * 3
@@ -0,0 +1,79 @@
+from langchain_core.documents import Document
+from context_packing import merge_passages, pack_context, source_label
+
+
+TEXT = " ".join(f"palavra{i}" for i in range(60))
+
+
+def _chunk(start, end, **metadata):
+    metadata = {"source": "/data/contrato.pdf", **metadata}
+    return Document(page_content=TEXT[start:end], metadata=metadata)
+
+
+def test_merges_overlapping_chunks_by_start_index_and_by_text():
+    """Chunks sobrepostos da mesma fonte viram um único trecho, com ou sem start_index."""
+    with_index = [_chunk(200, 400, start_index=200), _chunk(0, 250, start_index=0)]
+    without_index = [_chunk(150, 400), _chunk(0, 200)]
+
+    for documents in (with_index, without_index):
+        passages = merge_passages(documents)
+        assert len(passages) == 1
+        assert passages[0].text == TEXT[0:400]
+        assert passages[0].chunks == 2
+
+
+def test_does_not_merge_distant_chunks_or_other_sources():
+    documents = [
+        _chunk(0, 100, start_index=0),
+        _chunk(300, 400, start_index=300),
+        _chunk(50, 200, start_index=50, page_number=2),
+    ]
+    assert len(merge_passages(documents)) == 3
+
+
+def test_does_not_merge_chunks_whose_offsets_disagree_with_the_text():
+    """Offsets de uma versão anterior do arquivo não cortam o texto de um chunk novo."""
+    stale = _chunk(0, 100, start_index=0)
+    new = Document(page_content="Parágrafo inserido no início do arquivo.",
+                   metadata={"source": "/data/contrato.pdf", "start_index": 0})
+
+    passages = merge_passages([new, stale])
+
+    assert [p.text for p in passages] == [new.page_content, TEXT[0:100]]
+
+
+def test_pack_context_drops_near_duplicates_and_labels_sources(word_tokenizer):
+    """Trechos quase idênticos de arquivos diferentes são enviados uma única vez, com rótulo curto."""
+    documents = [
+        Document(page_content="o prazo de entrega do contrato é de dez dias úteis", metadata={"source": "/data/a.pdf", "page_number": 3}),
+        Document(page_content="o prazo de entrega do contrato é de dez dias úteis", metadata={"source": "/data/b.pdf"}),
+        Document(page_content="valor total", metadata={"source": "/data/vendas.xlsx", "sheet": "Q1", "row": 7}),
+    ]
+
+    packed = pack_context(documents, max_tokens=0, tokenizer=word_tokenizer)
+
+    assert packed.text.split("\n\n") == [
+        "[1] a.pdf p.3\no prazo de entrega do contrato é de dez dias úteis",
+        "[2] vendas.xlsx Q1 l.7\nvalor total",
+    ]
+    assert packed.dropped == 1
+
+
+def test_pack_context_fits_token_budget(word_tokenizer):
+    """O contexto respeita o orçamento, truncando o último trecho que ainda cabe em parte."""
+    documents = [
+        Document(page_content=" ".join(f"a{i}" for i in range(40)), metadata={"source": "a.txt"}),
+        Document(page_content=" ".join(f"b{i}" for i in range(100)), metadata={"source": "b.txt"}),
+        Document(page_content=" ".join(f"c{i}" for i in range(40)), metadata={"source": "c.txt"}),
+    ]
+
+    packed = pack_context(documents, max_tokens=100, tokenizer=word_tokenizer)
+
+    assert packed.tokens <= 100
+    assert [doc.metadata["source"] for doc in packed.passages] == ["a.txt", "b.txt"]
+    assert packed.passages[1].page_content.startswith("b0 b1")
+    assert packed.dropped == 1
+
+
+def test_source_label_formats_media_time():
+    assert source_label({"source": "/data/reuniao.mp3", "start": 125.4}) == "reuniao.mp3 02:05"
@@ -0,0 +1,203 @@
+import pytest
+from document_loaders import DocumentLoaderFactory, iter_load_documents
+
+
+def test_factory_rejects_unsupported_extension():
+    """Testa se a factory recusa extensões desconhecidas."""
+    assert not DocumentLoaderFactory.is_supported("arquivo.xyz")
+    with pytest.raises(ValueError, match="Formato de arquivo não suportado"):
+        DocumentLoaderFactory.get_loader("arquivo.xyz")
+
+
+def test_iter_load_documents_keeps_order_and_isolates_errors(tmp_path):
+    """Testa se o carregamento preserva a ordem e isola falhas por arquivo."""
+    paths = []
+    for name in ["b", "a", "c"]:
+        path = tmp_path / f"{name}.csv"
+        path.write_text(f"coluna\n{name}\n")
+        paths.append(str(path))
+    paths.insert(1, str(tmp_path / "inexistente.csv"))
+
+    results = list(iter_load_documents(paths, max_workers=2, timeout=60))
+
+    assert [result.file_path for result in results] == paths
+    # CSV é lido sob demanda: a falha aparece ao consumir os documentos do arquivo
+    with pytest.raises(FileNotFoundError):
+        list(results[1].documents)
+    assert [next(iter(result.documents)).page_content for i, result in enumerate(results) if i != 1] == [
+        "coluna: b", "coluna: a", "coluna: c"
+    ]
+
+
+def test_csv_loader_matches_row_format_across_chunks(tmp_path):
+    """Testa se o CSV lido em blocos gera o mesmo texto e índice de linha do formato original."""
+    from document_loaders import CSVLoader
+
+    path = tmp_path / "dados.csv"
+    path.write_text("nome,cidade\nAna,Recife\nBruno,\nCarla,Natal\n")
+
+    documents = CSVLoader(str(path), chunksize=2).load()
+
+    assert [d.page_content for d in documents] == [
+        "nome: Ana\ncidade: Recife",
+        "nome: Bruno\ncidade: nan",
+        "nome: Carla\ncidade: Natal",
+    ]
+    assert [d.metadata["row"] for d in documents] == [0, 1, 2]
+
+
+def test_excel_loader_lazy_load_reads_all_sheets(tmp_path):
+    """Testa se o Excel gera documentos de todas as planilhas com seus metadados."""
+    import pandas as pd
+    from document_loaders import ExcelLoader
+
+    path = tmp_path / "dados.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"a": [1, 2]}).to_excel(writer, sheet_name="um", index=False)
+        pd.DataFrame({"b": ["x"]}).to_excel(writer, sheet_name="dois", index=False)
+
+    documents = list(ExcelLoader(str(path)).lazy_load())
+
+    assert [(d.metadata["sheet"], d.metadata["row"], d.page_content) for d in documents] == [
+        ("um", 0, "a: 1"), ("um", 1, "a: 2"), ("dois", 0, "b: x")
+    ]
+
+
+def test_text_loader_reads_plain_text_without_unstructured(tmp_path, monkeypatch):
+    """Testa se TXT/MD são lidos diretamente, com o parser e o tipo nos metadados."""
+    from config import Config
+    from document_loaders import TextDocumentLoader
+
+    monkeypatch.setattr(Config, "PARSING_STRATEGY", "auto")
+    path = tmp_path / "notas.md"
+    path.write_text("# Título\n\nConteúdo do documento.", encoding="utf-8")
+
+    documents = DocumentLoaderFactory.get_loader(str(path)).load()
+
+    assert DocumentLoaderFactory.get_loader_class(str(path)) is TextDocumentLoader
+    assert documents[0].page_content == "# Título\n\nConteúdo do documento."
+    assert documents[0].metadata == {"source": str(path), "type": "md", "parser": "text"}
+
+
+def test_text_loader_pdf_fast_path_yields_one_document_per_page(monkeypatch):
+    """Testa se o PDF com camada de texto gera um documento por página, sem o Unstructured."""
+    import document_loaders
+    from config import Config
+
+    monkeypatch.setattr(Config, "PARSING_STRATEGY", "auto")
+    monkeypatch.setattr(document_loaders, "_pdf_page_count", lambda path: 3)
+    monkeypatch.setattr(document_loaders, "_extract_pdf_pages", lambda path, start, end: [
+        "primeira página com texto", "", "terceira página com texto"
+    ][start:end])
+    monkeypatch.setattr(Config, "PDF_MIN_CHARS_PER_PAGE", 5)
+    monkeypatch.setattr(Config, "PDF_PAGE_WORKERS", 1)
+
+    # Na estratégia fast a página em branco é apenas ignorada, sem recorrer ao Unstructured
+    documents = document_loaders.TextDocumentLoader("relatorio.pdf", strategy="fast").load()
+
+    assert [(d.metadata["page_number"], d.metadata["parser"]) for d in documents] == [(1, "pypdf"), (3, "pypdf")]
+
+
+def test_text_loader_auto_falls_back_to_unstructured_for_scanned_pdf(monkeypatch):
+    """Testa se o PDF sem camada de texto vai para o Unstructured apenas na estratégia auto."""
+    import document_loaders
+    from unittest.mock import MagicMock
+    from langchain_core.documents import Document
+    from config import Config
+
+    monkeypatch.setattr(Config, "PARSING_STRATEGY", "auto")
+    monkeypatch.setattr(Config, "PDF_PAGE_WORKERS", 1)
+    monkeypatch.setattr(document_loaders, "_pdf_page_count", lambda path: 2)
+    monkeypatch.setattr(document_loaders, "_extract_pdf_pages", lambda path, start, end: ["", " "][start:end])
+    unstructured = MagicMock()
+    unstructured.return_value.load.return_value = [Document(page_content="texto do OCR", metadata={"source": "scan.pdf"})]
+    monkeypatch.setattr(document_loaders, "UnstructuredFileLoader", unstructured)
+
+    documents = document_loaders.TextDocumentLoader("scan.pdf").load()
+
+    assert documents[0].page_content == "texto do OCR"
+    assert documents[0].metadata == {"source": "scan.pdf", "type": "pdf", "parser": "unstructured"}
+    assert document_loaders.TextDocumentLoader("scan.pdf", strategy="fast").load() == []
+
+
+def test_text_loader_strategy_overrides_per_extension(monkeypatch):
+    """Testa se PARSING_STRATEGY_OVERRIDES define a estratégia por extensão."""
+    import document_loaders
+    from unittest.mock import MagicMock
+    from config import Config
+
+    monkeypatch.setattr(Config, "PARSING_STRATEGY", "fast")
+    monkeypatch.setattr(Config, "PARSING_STRATEGY_OVERRIDES", "pdf=unstructured, .html=auto")
+    markitdown = MagicMock(return_value="| a | b |\n|---|---|")
+    monkeypatch.setattr(document_loaders, "_markitdown_convert", markitdown)
+
+    assert document_loaders.TextDocumentLoader("a.pdf").strategy == "unstructured"
+    assert document_loaders.TextDocumentLoader("a.html").strategy == "auto"
+    documents = document_loaders.TextDocumentLoader("a.docx").load()
+
+    markitdown.assert_called_once_with("a.docx")
+    assert documents[0].metadata["parser"] == "markitdown"
+    with pytest.raises(ValueError, match="Estratégia de parsing inválida"):
+        document_loaders.TextDocumentLoader("a.txt", strategy="ocr")
+
+
+def test_text_loader_splits_large_pdf_pages_across_workers(monkeypatch):
+    """Testa se as páginas de um PDF grande são divididas entre workers e voltam em ordem."""
+    import document_loaders
+    from concurrent.futures import ThreadPoolExecutor
+    from config import Config
+
+    monkeypatch.setattr(Config, "PDF_PAGE_WORKERS", 3)
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 5)
+    monkeypatch.setattr(Config, "PDF_MIN_CHARS_PER_PAGE", 1)
+    monkeypatch.setattr(document_loaders, "_pdf_page_count", lambda path: 7)
+    ranges = []
+
+    def _extract(path, start, end):
+        ranges.append((start, end))
+        return [f"página {i + 1}" for i in range(start, end)]
+
+    monkeypatch.setattr(document_loaders, "_extract_pdf_pages", _extract)
+    monkeypatch.setattr(document_loaders, "_create_executor", lambda workers: ThreadPoolExecutor(workers))
+
+    documents = document_loaders.TextDocumentLoader("grande.pdf", strategy="auto").load()
+
+    assert sorted(ranges) == [(0, 3), (3, 6), (6, 7)]
+    assert [d.page_content for d in documents] == [f"página {i}" for i in range(1, 8)]
+    assert [d.metadata["page_number"] for d in documents] == list(range(1, 8))
+
+
+def test_iter_load_documents_applies_timeout_without_pool_outside_main_thread(tmp_path):
+    """Testa se o tempo limite vale para um único arquivo carregado fora da thread principal."""
+    import threading
+    import time
+    from unittest.mock import patch
+
+    release = threading.Event()
+
+    class SlowLoader:
+        def __init__(self, file_path):
+            self.file_path = file_path
+
+        def load(self):
+            release.wait(5)
+            return []
+
+    path = tmp_path / "lento.txt"
+    path.write_text("conteúdo")
+    results = []
+
+    def _consume():
+        started_at = time.perf_counter()
+        results.extend(iter_load_documents([str(path)], max_workers=1, timeout=0.2))
+        results.append(time.perf_counter() - started_at)
+
+    with patch.dict(DocumentLoaderFactory.SUPPORTED_EXTENSIONS, {".txt": SlowLoader}):
+        consumer = threading.Thread(target=_consume)
+        consumer.start()
+        consumer.join(5)
+    release.set()
+
+    result, elapsed = results
+    assert result.error == "Tempo limite excedido"
+    assert elapsed < 2
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock
+from embedding_cache import CachedEmbeddings
+
+
+def _fake_model():
+    model = MagicMock()
+    model.embed_documents.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+    return model
+
+
+def test_cache_reuses_vectors_across_instances(tmp_path):
+    """Testa se vetores calculados uma vez são lidos do disco em execuções seguintes."""
+    path = str(tmp_path / "cache.sqlite3")
+    first = CachedEmbeddings(_fake_model(), model_name="modelo", path=path)
+    assert first.embed_documents(["abc", "de"]) == [[3.0, 1.0], [2.0, 1.0]]
+    first.close()
+
+    model = _fake_model()
+    second = CachedEmbeddings(model, model_name="modelo", path=path)
+    assert second.embed_documents(["de", "novo", "abc"]) == [[2.0, 1.0], [4.0, 1.0], [3.0, 1.0]]
+
+    model.embed_documents.assert_called_once_with(["novo"])
+    assert second.stats["hits"] == 2
+    assert second.stats["misses"] == 1
+
+
+def test_cache_is_keyed_by_model_name(tmp_path):
+    """Testa se modelos diferentes não compartilham vetores."""
+    path = str(tmp_path / "cache.sqlite3")
+    CachedEmbeddings(_fake_model(), model_name="a", path=path).embed_documents(["texto"])
+
+    model = _fake_model()
+    CachedEmbeddings(model, model_name="b", path=path).embed_documents(["texto"])
+
+    model.embed_documents.assert_called_once_with(["texto"])
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Testa se as entradas mais antigas são removidas ao exceder o limite de tamanho."""
+    cache = CachedEmbeddings(_fake_model(), model_name="m", path=str(tmp_path / "c.sqlite3"), max_size_mb=0)
+    cache.embed_documents(["a", "b"])
+
+    assert cache.stats["size_mb"] == 0
+
+
+def test_cache_size_is_not_double_counted_when_a_key_is_replaced(tmp_path):
+    """Testa se regravar chaves já presentes (ex.: por outro processo) não infla o tamanho do cache."""
+    from hashing import text_sha256
+
+    path = str(tmp_path / "c.sqlite3")
+    cache = CachedEmbeddings(_fake_model(), model_name="m", path=path)
+    cache.embed_documents(["a"])
+    other = CachedEmbeddings(_fake_model(), model_name="m", path=path)
+    other.embed_documents(["b"])
+    before = cache._size_bytes
+
+    # Gravação concorrente: as duas chaves já existem quando esta instância as grava
+    cache._store({text_sha256("a"): [9.0, 1.0], text_sha256("b"): [9.0, 1.0]})
+
+    assert cache._size_bytes == before
+    cache._store({text_sha256("c"): [1.0, 1.0, 1.0]})
+    assert cache._size_bytes == before + 12
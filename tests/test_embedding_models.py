@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+from config import Config
+from embedding_models import LazyEmbeddings, embedding_dimension
+
+
+def test_embedding_dimension_uses_table_and_override(monkeypatch):
+    """Testa se a dimensão vem da tabela, do Config ou é desconhecida."""
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSION", 0)
+    assert embedding_dimension("BAAI/bge-small-en-v1.5") == 384
+    assert embedding_dimension("modelo/desconhecido") is None
+
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSION", 512)
+    assert embedding_dimension("modelo/desconhecido") == 512
+
+
+def test_lazy_embeddings_creates_model_once_on_first_use():
+    """Testa se o modelo só é criado na primeira chamada e reaproveitado depois."""
+    model = MagicMock()
+    model.embed_query.return_value = [0.1]
+    factory = MagicMock(return_value=model)
+    embeddings = LazyEmbeddings(factory)
+
+    assert not embeddings.loaded
+    factory.assert_not_called()
+
+    embeddings.embed_query("a")
+    embeddings.embed_documents(["b"])
+
+    factory.assert_called_once()
+    assert embeddings.loaded
@@ -0,0 +1,93 @@
+import threading
+import pytest
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from document_loaders import LoadResult
+from ingestion import ChunkBatch, FileCompleted, FileFailed, IngestionCancelled, iter_chunk_batches, prefetch
+
+
+def _documents(texts):
+    for text in texts:
+        yield Document(page_content=text, metadata={"source": "dados.csv"})
+
+
+def test_iter_chunk_batches_emits_batches_per_file():
+    """Testa se os chunks são agrupados em lotes e cada arquivo termina com um evento."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+    results = [
+        LoadResult("dados.csv", documents=_documents(["a", "b", "c"])),
+        LoadResult("erro.pdf", error="falhou"),
+    ]
+
+    events = list(iter_chunk_batches(results, {"dados.csv": "h1"}, splitter, batch_size=2))
+
+    assert [type(e) for e in events] == [ChunkBatch, ChunkBatch, FileCompleted, FileFailed]
+    assert [len(e.chunks) for e in events[:2]] == [2, 1]
+    assert events[0].chunks[0].metadata["file_hash"] == "h1"
+    assert len(set(events[0].ids + events[1].ids)) == 3
+
+
+def test_iter_chunk_batches_reports_lazy_load_failure():
+    """Testa se um erro no meio do lazy_load vira FileFailed sem interromper os demais arquivos."""
+    def _broken():
+        yield Document(page_content="a")
+        raise ValueError("arquivo corrompido")
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
+    results = [LoadResult("a.csv", documents=_broken()), LoadResult("b.csv", documents=_documents(["b"]))]
+
+    events = list(iter_chunk_batches(results, {"a.csv": "h1", "b.csv": "h2"}, splitter, batch_size=10))
+
+    assert [type(e) for e in events] == [FileFailed, ChunkBatch, FileCompleted]
+    assert events[0].error == "arquivo corrompido"
+
+
+def test_prefetch_applies_backpressure():
+    """Testa se o produtor fica no máximo `maxsize` itens à frente do consumidor."""
+    produced = []
+    reached_limit = threading.Event()
+
+    def _producer():
+        for i in range(10):
+            produced.append(i)
+            if len(produced) == 3:
+                reached_limit.set()
+            yield i
+
+    stream = prefetch(_producer(), maxsize=2)
+    assert next(stream) == 0
+    reached_limit.wait(timeout=2)
+    # 1 consumido + 2 na fila + 1 aguardando espaço
+    assert len(produced) <= 4
+    assert list(stream) == list(range(1, 10))
+
+
+def test_prefetch_propagates_producer_errors():
+    """Testa se exceções do produtor são relançadas no consumidor."""
+    def _producer():
+        yield 1
+        raise RuntimeError("falha no carregamento")
+
+    stream = prefetch(_producer())
+    assert next(stream) == 1
+    with pytest.raises(RuntimeError, match="falha no carregamento"):
+        next(stream)
+
+
+def test_prefetch_raises_cancelled_while_waiting_for_producer():
+    """Testa se o cancelamento interrompe a espera sem aguardar o próximo item do produtor."""
+    release = threading.Event()
+    cancel_event = threading.Event()
+
+    def _producer():
+        yield 1
+        release.wait(timeout=5)
+        yield 2
+
+    stream = prefetch(_producer(), cancel_event=cancel_event)
+    assert next(stream) == 1
+    cancel_event.set()
+    with pytest.raises(IngestionCancelled):
+        next(stream)
+    assert not release.is_set()
+    release.set()
@@ -0,0 +1,103 @@
+import threading
+from ingestion import IngestionCancelled
+from ingestion_jobs import CANCELLED, DONE, EMBEDDING, FAILED, QUEUED, IngestionJobQueue
+
+
+class FakePipeline:
+    """Pipeline que reporta progresso e, opcionalmente, espera até ser liberado ou cancelado."""
+
+    def __init__(self, block: bool = False, error: Exception = None):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.block = block
+        self.error = error
+        self.calls = []
+
+    def add_documents(self, file_paths, clear_existing=False, remove_missing=False, progress=None, cancel_event=None):
+        self.calls.append((list(file_paths), remove_missing))
+        self.started.set()
+        for file_path in file_paths:
+            progress(file_path, EMBEDDING, 3)
+            if self.block:
+                while not self.release.wait(0.01):
+                    if cancel_event.is_set():
+                        raise IngestionCancelled("cancelado")
+            if self.error:
+                raise self.error
+            progress(file_path, DONE, 5)
+
+
+def _wait(job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.finished:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"Job não terminou: {job.status}")
+
+
+def test_job_reports_per_file_progress():
+    """Testa se o job conclui e guarda o status e os chunks de cada arquivo."""
+    pipeline = FakePipeline()
+    jobs = IngestionJobQueue(pipeline, max_workers=1)
+
+    job = jobs.submit(["a.txt", "b.txt"], remove_missing=True)
+    _wait(job)
+
+    assert job.status == DONE
+    assert job.progress == 1.0
+    assert [(f.file_path, f.status, f.chunks) for f in job.file_progress()] == [("a.txt", DONE, 5), ("b.txt", DONE, 5)]
+    assert pipeline.calls == [(["a.txt", "b.txt"], True)]
+    assert jobs.get(job.id) is job
+    jobs.shutdown()
+
+
+def test_failed_job_keeps_error_and_marks_unfinished_files():
+    """Testa se uma falha no pipeline fica no job e os arquivos pendentes ficam como falhos."""
+    jobs = IngestionJobQueue(FakePipeline(error=RuntimeError("qdrant indisponível")), max_workers=1)
+
+    job = jobs.submit(["a.txt", "b.txt"])
+    _wait(job)
+
+    assert job.status == FAILED
+    assert job.error == "qdrant indisponível"
+    assert [f.status for f in job.file_progress()] == [FAILED, FAILED]
+    jobs.shutdown()
+
+
+def test_cancel_running_and_queued_jobs():
+    """Testa o cancelamento de um job em execução e de outro ainda na fila."""
+    pipeline = FakePipeline(block=True)
+    jobs = IngestionJobQueue(pipeline, max_workers=1)
+
+    running = jobs.submit(["a.txt"])
+    queued = jobs.submit(["b.txt"])
+    assert pipeline.started.wait(5)
+    assert queued.status == QUEUED
+
+    assert jobs.cancel(queued.id)
+    assert jobs.cancel(running.id)
+    _wait(running)
+    _wait(queued)
+
+    assert running.status == CANCELLED
+    assert queued.status == CANCELLED
+    assert [f.status for f in queued.file_progress()] == [CANCELLED]
+    assert pipeline.calls == [(["a.txt"], False)]
+    assert not jobs.cancel(running.id)
+    jobs.shutdown()
+
+
+def test_finished_jobs_are_pruned_to_history():
+    """Testa se apenas os `history` jobs concluídos mais recentes são mantidos."""
+    jobs = IngestionJobQueue(FakePipeline(), max_workers=1, history=1)
+
+    first = jobs.submit(["a.txt"])
+    _wait(first)
+    second = jobs.submit(["b.txt"])
+    _wait(second)
+    third = jobs.submit(["c.txt"])
+    _wait(third)
+
+    assert jobs.get(first.id) is None
+    assert [job.id for job in jobs.jobs()] == [second.id, third.id]
+    jobs.shutdown()
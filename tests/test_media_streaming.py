@@ -0,0 +1,86 @@
+import io
+import threading
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+from media_streaming import SAMPLE_RATE, AudioSegment, iter_audio_segments, transcribe_segments
+from document_loaders import VideoLoader
+from ingestion import IngestionCancelled
+
+
+def _fake_ffmpeg(seconds: float):
+    """Processo falso do ffmpeg que devolve `seconds` de PCM s16le."""
+    process = MagicMock()
+    process.stdout = io.BytesIO(b"\x00\x01" * int(seconds * SAMPLE_RATE))
+    process.poll.return_value = 0
+    process.wait.return_value = 0
+    return process
+
+
+def test_iter_audio_segments_splits_in_fixed_windows():
+    """Testa se o áudio é dividido em segmentos de duração fixa com timestamps."""
+    with patch("media_streaming.subprocess.Popen", return_value=_fake_ffmpeg(25)):
+        segments = list(iter_audio_segments("video.mp4", segment_seconds=10))
+
+    assert [(s.start, s.end) for s in segments] == [(0, 10.0), (10, 20.0), (20, 25.0)]
+    assert segments[0].samples.dtype == np.float32
+
+
+def test_transcribe_segments_preserves_order_with_workers():
+    """Testa se a transcrição paralela devolve os segmentos na ordem original."""
+    segments = [AudioSegment(index=i, start=i * 10, end=(i + 1) * 10, samples=i) for i in range(7)]
+
+    with patch("media_streaming.whisper_registry") as registry:
+        registry.transcribe.side_effect = lambda samples, **kwargs: {"text": f"trecho {samples}"}
+        registry.max_replicas.return_value = 3
+        results = list(transcribe_segments(segments, workers=3))
+
+    assert [result["text"] for _, result in results] == [f"trecho {i}" for i in range(7)]
+    replicas = {call.kwargs["replica"] for call in registry.transcribe.call_args_list}
+    assert replicas <= {0, 1, 2}
+
+
+def test_video_loader_emits_one_document_per_segment():
+    """Testa se o VideoLoader gera um Document por segmento com fala."""
+    segments = [AudioSegment(index=i, start=i * 30, end=(i + 1) * 30, samples=None) for i in range(3)]
+    transcriptions = [{"text": " olá ", "language": "pt"}, {"text": "  "}, {"text": "tchau", "language": "pt"}]
+
+    with patch("document_loaders.iter_audio_segments", return_value=iter(segments)), \
+         patch("document_loaders.transcribe_segments", return_value=zip(segments, transcriptions)):
+        documents = VideoLoader("video.mp4", model_size="tiny").load()
+
+    assert [d.page_content for d in documents] == ["olá", "tchau"]
+    assert [(d.metadata["start"], d.metadata["end"]) for d in documents] == [(0, 30), (60, 90)]
+    assert documents[0].metadata["type"] == "video"
+
+
+def test_iter_audio_segments_reports_ffmpeg_errors_from_stderr():
+    """Testa se a mensagem de erro do ffmpeg, gravada fora de um pipe, chega à exceção."""
+    process = _fake_ffmpeg(0)
+    process.wait.return_value = 1
+
+    def _popen(command, stdout, stderr):
+        stderr.write(b"arquivo corrompido\n")
+        return process
+
+    with patch("media_streaming.subprocess.Popen", side_effect=_popen):
+        with pytest.raises(ValueError, match="arquivo corrompido"):
+            list(iter_audio_segments("video.mp4"))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_transcribe_segments_stops_between_segments_when_cancelled(workers):
+    """Testa se nenhum segmento novo é transcrito depois do cancelamento."""
+    segments = [AudioSegment(index=i, start=i * 10, end=(i + 1) * 10, samples=i) for i in range(20)]
+    cancel_event = threading.Event()
+
+    with patch("media_streaming.whisper_registry") as registry:
+        registry.transcribe.side_effect = lambda samples, **kwargs: {"text": f"trecho {samples}"}
+        registry.max_replicas.return_value = 3
+        results = transcribe_segments(segments, workers=workers, cancel_event=cancel_event)
+        next(results)
+        cancel_event.set()
+        with pytest.raises(IngestionCancelled):
+            list(results)
+
+    assert registry.transcribe.call_count < len(segments)
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+import pytest
+from config import Config
+from metrics import MetricsRegistry, STAGE_DURATION, metrics, profile, record_stage, timed_iter, timer
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_ENABLED", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_prometheus_export_has_counters_and_histograms():
+    """Testa o formato texto do Prometheus, com buckets cumulativos e rótulos escapados."""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.inc("rag_chunks_total", 3, stage="embedding")
+    registry.observe(STAGE_DURATION, 0.05, stage="retrieval")
+    registry.observe(STAGE_DURATION, 0.5, stage="retrieval")
+    registry.inc("rag_documents_total", loader='a"b')
+
+    text = registry.to_prometheus()
+
+    assert "# TYPE rag_chunks_total counter" in text
+    assert 'rag_chunks_total{stage="embedding"} 3' in text
+    assert 'rag_documents_total{loader="a\\"b"} 1' in text
+    assert "# TYPE rag_stage_duration_seconds histogram" in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieval",le="0.1"} 1' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieval",le="1"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieval",le="+Inf"} 2' in text
+    assert 'rag_stage_duration_seconds_count{stage="retrieval"} 2' in text
+
+    snapshot = json.loads(registry.to_json())
+    assert snapshot["histograms"][STAGE_DURATION][0]["count"] == 2
+
+
+def test_timer_records_duration_and_errors():
+    """Testa se o timer registra a duração mesmo quando o bloco falha e conta o erro."""
+    with timer("upsert"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timer("upsert"):
+            raise RuntimeError("falha")
+
+    snapshot = metrics.snapshot()
+    histogram = snapshot["histograms"][STAGE_DURATION][0]
+    assert histogram["labels"] == {"stage": "upsert"}
+    assert histogram["count"] == 2
+    assert snapshot["counters"]["rag_errors_total"] == [{"labels": {"stage": "upsert"}, "value": 1.0}]
+
+
+def test_metrics_disabled_records_nothing(monkeypatch):
+    """Testa se METRICS_ENABLED=false desativa o registro."""
+    monkeypatch.setattr(Config, "METRICS_ENABLED", False)
+    with timer("embedding"):
+        pass
+    assert metrics.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_timed_iter_records_once_after_consumption():
+    """Testa se timed_iter repassa os itens e registra o estágio ao fim da iteração."""
+    items = list(timed_iter(iter([1, 2, 3]), "load", loader="TextLoader"))
+
+    assert items == [1, 2, 3]
+    histogram = metrics.snapshot()["histograms"][STAGE_DURATION][0]
+    assert histogram["labels"] == {"stage": "load", "loader": "TextLoader"}
+    assert histogram["count"] == 1
+
+
+def test_profile_trace_collects_stage_spans():
+    """Testa se o modo trace coleta os estágios medidos dentro do bloco, em ordem."""
+    with profile("trace") as result:
+        with timer("retrieval"):
+            time.sleep(0.01)
+        with timer("generation"):
+            time.sleep(0.01)
+    record_stage("generation", 0.03)
+
+    assert [span["stage"] for span in result.spans] == ["retrieval", "generation"]
+    assert all("start_ms" in span and "duration_ms" in span for span in result.spans)
+
+
+def test_profile_cprofile_writes_stats_file(tmp_path, monkeypatch):
+    """Testa se o modo cprofile salva o arquivo .prof e o resumo das funções."""
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path))
+
+    with profile("cprofile", name="pergunta") as result:
+        sum(i * i for i in range(1000))
+
+    assert os.path.dirname(result.path) == str(tmp_path)
+    assert os.path.basename(result.path).startswith("pergunta-")
+    assert os.path.exists(result.path)
+    assert "function calls" in result.summary
+
+
+def test_profile_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        with profile("perf"):
+            pass
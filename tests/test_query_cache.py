@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+from query_cache import QueryEmbeddingCache, SemanticAnswerCache
+
+
+def test_query_embedding_cache_is_lru():
+    """Testa se o cache de embeddings de consulta reaproveita e descarta o menos usado."""
+    compute_many = MagicMock(side_effect=lambda questions: [[float(len(q))] for q in questions])
+    cache = QueryEmbeddingCache(max_entries=2)
+
+    for question in ["a", "bb", "a", "ccc", "bb"]:
+        cache.get_many_or_compute([question], compute_many)
+
+    assert [call.args[0] for call in compute_many.call_args_list] == [["a"], ["bb"], ["ccc"], ["bb"]]
+
+
+def test_query_embedding_cache_computes_only_missing_questions_in_one_call():
+    """Testa se o lote calcula numa única chamada apenas as perguntas ausentes, sem repetir."""
+    compute_many = MagicMock(side_effect=lambda questions: [[float(len(q))] for q in questions])
+    cache = QueryEmbeddingCache(max_entries=10)
+    cache.get_many_or_compute(["a"], compute_many)
+
+    vectors = cache.get_many_or_compute(["a", "bb", "bb", "ccc"], compute_many)
+
+    assert vectors == [[1.0], [2.0], [2.0], [3.0]]
+    assert compute_many.call_args_list[-1].args[0] == ["bb", "ccc"]
+
+
+def test_semantic_cache_requires_similarity_and_same_context():
+    """Testa se a resposta só é reaproveitada com pergunta similar e mesmo contexto."""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60, max_entries=10)
+    cache.store([1.0, 0.0], "ctx", "resposta")
+
+    assert cache.lookup([0.99, 0.05], "ctx") == "resposta"
+    assert cache.lookup([0.99, 0.05], "outro-ctx") is None
+    assert cache.lookup([0.0, 1.0], "ctx") is None
+
+
+def test_semantic_cache_expires_entries(monkeypatch):
+    """Testa se respostas expiram após o TTL."""
+    now = [1000.0]
+    monkeypatch.setattr("query_cache.time.time", lambda: now[0])
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=10, max_entries=10)
+    cache.store([1.0, 0.0], "ctx", "resposta")
+
+    now[0] += 11
+    assert cache.lookup([1.0, 0.0], "ctx") is None
+    assert len(cache) == 0
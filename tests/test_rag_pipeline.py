@@ -3,48 +3,358 @@ from unittest.mock import MagicMock, patch
 from rag_pipeline import RAGPipeline
 
 @pytest.fixture
-def mock_config(monkeypatch):
+def mock_config(monkeypatch, tmp_path):
     monkeypatch.setenv("GROQ_API_KEY", "fake_key")
     import config
     # Patch the class attribute because validate is a classmethod
     config.Config.GROQ_API_KEY = "fake_key"
+    monkeypatch.setattr(config.Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite3"))
     return config
 
 @patch("rag_pipeline.qdrant_client.QdrantClient")
-@patch("rag_pipeline.Qdrant")
 @patch("rag_pipeline.FastEmbedEmbeddings")
 @patch("rag_pipeline.ChatGroq")
-def test_pipeline_initialization(mock_chat, mock_embed, mock_qdrant, mock_client, mock_config):
+def test_pipeline_initialization(mock_chat, mock_embed, mock_client, mock_config):
     """Testa se o pipeline inicializa corretamente com mocks."""
     pipeline = RAGPipeline()
     assert pipeline.client is not None
-    assert pipeline.vector_store is not None
     assert pipeline.rag_chain is not None
 
-@patch("rag_pipeline.UnstructuredFileLoader")
-@patch("rag_pipeline.RecursiveCharacterTextSplitter")
-def test_add_documents(mock_splitter, mock_loader, mock_config):
+def test_add_documents(mock_config, tmp_path):
     """Testa o fluxo de adição de documentos."""
+    from langchain_core.documents import Document
+    from document_loaders import DocumentLoaderFactory
+
+    file_path = str(tmp_path / "dummy_path.txt")
+    with open(file_path, "w") as f:
+        f.write("conteúdo")
+
     # Mock das dependências
+    mock_loader = MagicMock()
     mock_loader_instance = MagicMock()
-    mock_loader_instance.load.return_value = ["doc1", "doc2"]
+    mock_loader_instance.load.return_value = [Document(page_content="doc1"), Document(page_content="doc2")]
     mock_loader.return_value = mock_loader_instance
 
-    mock_splitter_instance = MagicMock()
-    mock_splitter_instance.split_documents.return_value = ["chunk1", "chunk2"]
-    mock_splitter.return_value = mock_splitter_instance
-
     # Mock do pipeline (parcial)
     with patch("rag_pipeline.qdrant_client.QdrantClient"), \
-         patch("rag_pipeline.Qdrant") as mock_qdrant_cls, \
-         patch("rag_pipeline.FastEmbedEmbeddings"), \
-         patch("rag_pipeline.ChatGroq"):
+         patch("rag_pipeline.FastEmbedEmbeddings") as mock_embed, \
+         patch("rag_pipeline.ChatGroq"), \
+         patch.dict(DocumentLoaderFactory.SUPPORTED_EXTENSIONS, {".txt": mock_loader}):
+        mock_embed.return_value.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
         
         pipeline = RAGPipeline()
-        pipeline.vector_store = MagicMock() # Mock do vector store da instância
+        pipeline.client.count.return_value.count = 0
+        pipeline.client.scroll.return_value = ([], None)
 
-        pipeline.add_documents(["dummy_path.txt"])
+        pipeline.add_documents([file_path])
 
         # Verificações
-        mock_loader.assert_called_with("dummy_path.txt")
-        pipeline.vector_store.add_documents.assert_called()
+        mock_loader.assert_called_with(file_path)
+        pipeline.client.upsert.assert_called()
+
+
+@pytest.fixture
+def memory_pipeline(mock_config, monkeypatch):
+    """Pipeline real sobre um Qdrant em memória e embeddings determinísticos."""
+    # Carrega no próprio processo para que os patches do teste se apliquem
+    monkeypatch.setattr(mock_config.Config, "LOADER_WORKERS", 1)
+    monkeypatch.setattr(mock_config.Config, "EMBEDDING_DIMENSION", 8)
+    from langchain_community.document_loaders import TextLoader
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from qdrant_client import QdrantClient
+    from document_loaders import DocumentLoaderFactory
+
+    embeddings = DeterministicFakeEmbedding(size=8)
+    with patch("rag_pipeline.qdrant_client.QdrantClient", side_effect=lambda path: QdrantClient(":memory:")), \
+         patch("rag_pipeline.FastEmbedEmbeddings", return_value=embeddings), \
+         patch("rag_pipeline.ChatGroq"), \
+         patch.dict(DocumentLoaderFactory.SUPPORTED_EXTENSIONS, {".txt": TextLoader}):
+        yield RAGPipeline()
+
+
+def test_add_documents_incremental(memory_pipeline, tmp_path):
+    """Arquivos inalterados são ignorados e arquivos removidos saem da coleção."""
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("primeiro arquivo")
+    second.write_text("segundo arquivo")
+
+    memory_pipeline.add_documents([str(first), str(second)])
+    assert memory_pipeline.client.count(memory_pipeline.collection_name).count == 2
+
+    with patch("document_loaders.DocumentLoaderFactory.get_loader") as mock_get_loader:
+        memory_pipeline.add_documents([str(first), str(second)])
+        mock_get_loader.assert_not_called()
+
+    second.write_text("segundo arquivo alterado")
+    memory_pipeline.add_documents([str(second)], remove_missing=True)
+
+    records, _ = memory_pipeline.client.scroll(memory_pipeline.collection_name, with_payload=True)
+    assert [r.payload["page_content"] for r in records] == ["segundo arquivo alterado"]
+
+
+def test_failed_upsert_discards_partial_file_and_retry_reindexes(memory_pipeline, mock_config, tmp_path, monkeypatch):
+    """Uma falha no meio do arquivo desfaz os pontos já gravados e o arquivo é refeito na próxima execução."""
+    monkeypatch.setattr(mock_config.Config, "CHUNK_TOKENS", 4)
+    monkeypatch.setattr(mock_config.Config, "CHUNK_OVERLAP_TOKENS", 0)
+    monkeypatch.setattr(mock_config.Config, "INGEST_BATCH_SIZE", 2)
+    path = tmp_path / "longo.txt"
+    path.write_text(" ".join(f"palavra{i}" for i in range(40)))
+    client = memory_pipeline.client
+    upsert = client.upsert
+    calls = []
+
+    def _flaky_upsert(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("Qdrant indisponível")
+        return upsert(*args, **kwargs)
+
+    with patch.object(client, "upsert", side_effect=_flaky_upsert):
+        with pytest.raises(RuntimeError):
+            memory_pipeline.add_documents([str(path)])
+    assert client.count(memory_pipeline.collection_name).count == 0
+
+    memory_pipeline.add_documents([str(path)])
+    total = client.count(memory_pipeline.collection_name).count
+    assert total > 2
+    records, _ = client.scroll(memory_pipeline.collection_name, limit=100, with_payload=True)
+    assert all(r.payload["metadata"]["file_hash"] for r in records)
+
+
+def test_edited_file_refreshes_offsets_of_kept_chunks(memory_pipeline, mock_config, tmp_path, monkeypatch):
+    """Chunks mantidos após uma edição recebem os start_index atuais e o trecho novo chega ao contexto."""
+    monkeypatch.setattr(mock_config.Config, "CHUNK_TOKENS", 4)
+    monkeypatch.setattr(mock_config.Config, "CHUNK_OVERLAP_TOKENS", 0)
+    path = tmp_path / "longo.txt"
+    body = " ".join(f"palavra{i}" for i in range(40))
+    path.write_text(body)
+    memory_pipeline.add_documents([str(path)])
+
+    path.write_text("cláusula nova no topo\n\n" + body)
+    with patch.object(memory_pipeline.client, "batch_update_points",
+                      wraps=memory_pipeline.client.batch_update_points) as refresh:
+        memory_pipeline.add_documents([str(path)])
+    refresh.assert_called()
+
+    text = path.read_text()
+    records, _ = memory_pipeline.client.scroll(memory_pipeline.collection_name, limit=100, with_payload=True)
+    documents = [memory_pipeline._to_document(record) for record in records]
+    for document in documents:
+        start = document.metadata["start_index"]
+        assert text[start:start + len(document.page_content)] == document.page_content
+        assert document.metadata["file_hash"]
+    # O trecho novo começa onde o primeiro chunk antigo começava antes da edição
+    top = [document for document in documents if document.metadata["start_index"] < 40]
+    packed = memory_pipeline._pack_context(top).text
+    assert "cláusula" in packed and "palavra0" in packed
+
+
+def test_partially_indexed_file_is_not_skipped(memory_pipeline, tmp_path):
+    """Pontos sem o hash de conclusão (ingestão interrompida) não contam como arquivo indexado."""
+    path = tmp_path / "a.txt"
+    path.write_text("primeiro arquivo")
+    memory_pipeline.add_documents([str(path)])
+    client = memory_pipeline.client
+    records, _ = client.scroll(memory_pipeline.collection_name, with_payload=True)
+    file_hash = records[0].payload["metadata"]["file_hash"]
+    assert memory_pipeline._is_indexed(str(path), file_hash)
+
+    client.delete_payload(memory_pipeline.collection_name, keys=["metadata.file_hash"], points=[records[0].id])
+    assert not memory_pipeline._is_indexed(str(path), file_hash)
+
+
+def test_add_documents_reports_progress_and_cancels(memory_pipeline, tmp_path):
+    """O progresso é reportado por arquivo e o cancelamento desfaz o arquivo em andamento."""
+    import threading
+    from ingestion import IngestionCancelled
+
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("primeiro arquivo")
+    second.write_text("segundo arquivo")
+
+    updates = []
+    memory_pipeline.add_documents([str(first)], progress=lambda *update: updates.append(update))
+    memory_pipeline.add_documents([str(first), str(tmp_path / "c.xyz")], progress=lambda *update: updates.append(update))
+    assert updates == [
+        (str(first), "parsing", 0), (str(first), "embedding", 1), (str(first), "done", 1),
+        (str(first), "done", 0), (str(tmp_path / "c.xyz"), "failed", 0),
+    ]
+
+    cancel_event = threading.Event()
+
+    def _cancel_after_first_batch(file_path, status, chunks):
+        if status == "embedding":
+            cancel_event.set()
+
+    with pytest.raises(IngestionCancelled):
+        memory_pipeline.add_documents([str(second)], progress=_cancel_after_first_batch, cancel_event=cancel_event)
+    records, _ = memory_pipeline.client.scroll(memory_pipeline.collection_name, with_payload=True)
+    assert {record.payload["metadata"]["source"] for record in records} == {str(first)}
+
+
+def test_retrieve_overfetches_and_reranks(memory_pipeline, mock_config, tmp_path, monkeypatch):
+    """Com reranking, a busca traz RERANK_CANDIDATES chunks e só os RETRIEVAL_K melhores seguem."""
+    from reranking import Reranker
+
+    for name in ("a", "b", "c", "d", "e", "f"):
+        (tmp_path / f"{name}.txt").write_text(f"documento {name} " * (ord(name) - 96))
+    memory_pipeline.add_documents([str(path) for path in sorted(tmp_path.glob("*.txt"))])
+
+    monkeypatch.setattr(mock_config.Config, "RETRIEVAL_K", 2)
+    monkeypatch.setattr(mock_config.Config, "RERANK_CANDIDATES", 6)
+    scorer = MagicMock(side_effect=lambda question, texts: [float(len(text)) for text in texts])
+    memory_pipeline.reranker = Reranker(scorer=scorer, timeout=0, max_entries=100)
+
+    _, documents = memory_pipeline._retrieve("documento")
+
+    assert len(scorer.call_args[0][1]) == 6
+    assert [doc.metadata["source"] for doc in documents] == [str(tmp_path / "f.txt"), str(tmp_path / "e.txt")]
+
+
+def test_answer_uses_semantic_cache_until_collection_changes(memory_pipeline, tmp_path):
+    """Perguntas repetidas não chamam o LLM até que a coleção seja alterada."""
+    document = tmp_path / "a.txt"
+    document.write_text("o prazo de entrega é de dez dias")
+    memory_pipeline.add_documents([str(document)])
+    memory_pipeline.rag_chain = MagicMock()
+    memory_pipeline.rag_chain.invoke.return_value = "Dez dias."
+
+    assert memory_pipeline.answer("Qual o prazo?") == "Dez dias."
+    assert memory_pipeline.answer("Qual o prazo?") == "Dez dias."
+    assert memory_pipeline.rag_chain.invoke.call_count == 1
+    # O LLM recebe o contexto empacotado, com o rótulo da fonte
+    assert memory_pipeline.rag_chain.invoke.call_args[0][0]["context"] == "[1] a.txt\no prazo de entrega é de dez dias"
+
+    other = tmp_path / "b.txt"
+    other.write_text("outro documento")
+    memory_pipeline.add_documents([str(document), str(other)])
+    memory_pipeline.answer("Qual o prazo?")
+    assert memory_pipeline.rag_chain.invoke.call_count == 2
+
+
+def test_answer_stream_exposes_sources_and_time_to_first_token(memory_pipeline, tmp_path):
+    """As fontes ficam disponíveis antes da geração e os tokens chegam em sequência."""
+    document = tmp_path / "a.txt"
+    document.write_text("o prazo de entrega é de dez dias")
+    memory_pipeline.add_documents([str(document)])
+    memory_pipeline.rag_chain = MagicMock()
+    memory_pipeline.rag_chain.stream.return_value = iter(["Dez", " dias", "."])
+
+    stream = memory_pipeline.answer_stream("Qual o prazo?")
+
+    assert [doc.page_content for doc in stream.sources] == ["o prazo de entrega é de dez dias"]
+    assert stream.time_to_first_token is None
+    assert list(stream) == ["Dez", " dias", "."]
+    assert stream.answer == "Dez dias."
+    assert stream.time_to_first_token > 0
+    assert memory_pipeline.answer("Qual o prazo?") == "Dez dias."
+
+
+def test_answer_many_batches_retrieval_and_keeps_order(memory_pipeline, tmp_path):
+    """Perguntas em lote usam uma única busca no Qdrant e respostas na ordem de entrada."""
+    from unittest.mock import AsyncMock
+
+    document = tmp_path / "a.txt"
+    document.write_text("o prazo de entrega é de dez dias")
+    memory_pipeline.add_documents([str(document)])
+    memory_pipeline.rag_chain = MagicMock()
+    memory_pipeline.rag_chain.ainvoke = AsyncMock(side_effect=lambda inputs: f"R: {inputs['question']}")
+
+    with patch.object(memory_pipeline.client, "query_batch_points", wraps=memory_pipeline.client.query_batch_points) as batch:
+        answers = memory_pipeline.answer_many(["Primeira?", "", "Segunda?"], concurrency=2)
+
+    assert answers == ["R: Primeira?", "Por favor, insira uma pergunta.", "R: Segunda?"]
+    batch.assert_called_once()
+
+
+def test_answer_many_isolates_context_packing_errors(memory_pipeline, tmp_path):
+    """Uma falha ao empacotar o contexto de uma pergunta não derruba as demais respostas."""
+    from unittest.mock import AsyncMock
+
+    document = tmp_path / "a.txt"
+    document.write_text("o prazo de entrega é de dez dias")
+    memory_pipeline.add_documents([str(document)])
+    memory_pipeline.rag_chain = MagicMock()
+    memory_pipeline.rag_chain.ainvoke = AsyncMock(side_effect=lambda inputs: "Dez dias.")
+    pack_context = memory_pipeline._pack_context
+    calls = []
+
+    def _failing_once(documents):
+        calls.append(documents)
+        if len(calls) == 1:
+            raise RuntimeError("tokenizer indisponível")
+        return pack_context(documents)
+
+    with patch.object(memory_pipeline, "_pack_context", side_effect=_failing_once):
+        answers = memory_pipeline.answer_many(["Primeira?", "Segunda?"], concurrency=1)
+
+    assert answers == ["Desculpe, ocorreu um erro ao processar sua pergunta.", "Dez dias."]
+
+
+def test_hybrid_retrieval_finds_exact_identifier(memory_pipeline, tmp_path):
+    """A busca híbrida recupera o chunk com o identificador exato citado na pergunta."""
+    assert memory_pipeline.hybrid
+    paths = []
+    for index in range(8):
+        path = tmp_path / f"doc{index}.txt"
+        path.write_text(f"relatório de vendas do trimestre {index}")
+        paths.append(str(path))
+    target = tmp_path / "pedido.txt"
+    target.write_text("pedido PED-1004 aguardando aprovação")
+    memory_pipeline.add_documents([*paths, str(target)])
+
+    _, docs = memory_pipeline._retrieve("Qual a situação do PED-1004?")
+
+    assert docs[0].page_content == "pedido PED-1004 aguardando aprovação"
+
+
+def test_retrieval_respects_metadata_filters(memory_pipeline, tmp_path):
+    """Filtros de metadados restringem a busca e listam os valores disponíveis."""
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("prazo de entrega do fornecedor A")
+    second.write_text("prazo de entrega do fornecedor B")
+    memory_pipeline.add_documents([str(first), str(second)])
+
+    _, docs = memory_pipeline._retrieve("Qual o prazo de entrega?", filters={"source": [str(second)]})
+
+    assert [doc.metadata["source"] for doc in docs] == [str(second)]
+    assert memory_pipeline.get_filter_values("source") == sorted([str(first), str(second)])
+
+
+@patch("rag_pipeline.qdrant_client.QdrantClient")
+@patch("rag_pipeline.FastEmbedEmbeddings")
+@patch("rag_pipeline.ChatGroq")
+def test_initialization_defers_model_loading(mock_chat, mock_embed, mock_client, mock_config):
+    """O modelo de embeddings e o LLM só são criados no primeiro uso ou no aquecimento."""
+    mock_client.return_value.collection_exists.return_value = False
+
+    pipeline = RAGPipeline()
+
+    mock_embed.assert_not_called()
+    mock_chat.assert_not_called()
+    vectors_config = mock_client.return_value.create_collection.call_args.kwargs["vectors_config"]
+    assert vectors_config["dense"].size == 384
+
+    pipeline.start_warm_up().join()
+    mock_embed.assert_called_once()
+    mock_chat.assert_called_once()
+
+
+def test_injected_embeddings_are_cached_under_their_own_model_name(mock_config, tmp_path):
+    """Embeddings injetados não usam a chave de config.EMBEDDING_MODEL no cache em disco."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from qdrant_client import QdrantClient
+    from embedding_cache import CachedEmbeddings
+
+    class NamedEmbeddings(DeterministicFakeEmbedding):
+        model_name: str = "outro/modelo"
+
+    anonymous = RAGPipeline(client=QdrantClient(":memory:"), embeddings=DeterministicFakeEmbedding(size=8), llm=MagicMock())
+    named = RAGPipeline(client=QdrantClient(":memory:"), embeddings=NamedEmbeddings(size=8), llm=MagicMock())
+
+    assert not isinstance(anonymous.embeddings, CachedEmbeddings)
+    assert isinstance(named.embeddings, CachedEmbeddings)
+    assert named.embeddings.model_name == "outro/modelo"
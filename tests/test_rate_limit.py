@@ -0,0 +1,26 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from rate_limit import call_with_rate_limit_retry
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_retries_rate_limited_calls(monkeypatch):
+    """Testa se respostas 429 são repetidas até o sucesso."""
+    monkeypatch.setattr("rate_limit.asyncio.sleep", AsyncMock())
+    call = AsyncMock(side_effect=[RateLimitError(), RateLimitError(), "ok"])
+
+    assert asyncio.run(call_with_rate_limit_retry(call, max_retries=3)) == "ok"
+    assert call.await_count == 3
+
+
+def test_does_not_retry_other_errors():
+    """Testa se erros que não são de limite de taxa são propagados imediatamente."""
+    call = AsyncMock(side_effect=ValueError("erro"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(call_with_rate_limit_retry(call, max_retries=3))
+    assert call.await_count == 1
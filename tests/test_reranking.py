@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from reranking import Reranker
+
+
+def _docs(*texts):
+    return [Document(page_content=text, metadata={"chunk_hash": text}) for text in texts]
+
+
+def _length_scorer():
+    """Scorer de teste: textos mais longos são mais relevantes."""
+    return MagicMock(side_effect=lambda question, texts: [float(len(text)) for text in texts])
+
+
+def test_rerank_orders_by_score_and_keeps_top_k():
+    scorer = _length_scorer()
+    reranker = Reranker(scorer=scorer, timeout=0, max_entries=100)
+
+    ranked = reranker.rerank("pergunta", _docs("a", "ccc", "bb", "dddd"), top_k=2)
+
+    assert [doc.page_content for doc in ranked] == ["dddd", "ccc"]
+    scorer.assert_called_once_with("pergunta", ["a", "ccc", "bb", "dddd"])
+
+
+def test_rerank_scores_only_pairs_missing_from_cache():
+    """Pares (pergunta, chunk) já pontuados não voltam ao modelo."""
+    scorer = _length_scorer()
+    reranker = Reranker(scorer=scorer, timeout=0, max_entries=100)
+
+    reranker.rerank("pergunta", _docs("a", "bb"), top_k=2)
+    reranker.rerank("pergunta", _docs("a", "bb", "ccc"), top_k=2)
+    reranker.rerank("pergunta", _docs("a", "bb", "ccc"), top_k=2)
+
+    assert [call.args[1] for call in scorer.call_args_list] == [["a", "bb"], ["ccc"]]
+
+
+def test_rerank_falls_back_to_vector_order_on_timeout_or_error():
+    release = threading.Event()
+
+    def slow_scorer(question, texts):
+        release.wait(5)
+        return [float(len(text)) for text in texts]
+
+    reranker = Reranker(scorer=slow_scorer, timeout=0.05, max_entries=100)
+    assert [doc.page_content for doc in reranker.rerank("p", _docs("a", "ccc", "bb"), top_k=2)] == ["a", "ccc"]
+    release.set()
+
+    failing = Reranker(scorer=MagicMock(side_effect=RuntimeError("modelo indisponível")), timeout=0)
+    assert [doc.page_content for doc in failing.rerank("p", _docs("a", "ccc"), top_k=1)] == ["a"]
+
+
+def test_rerank_skips_scoring_while_another_job_is_in_flight():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_scorer(question, texts):
+        started.set()
+        release.wait(5)
+        return [float(len(text)) for text in texts]
+
+    scorer = MagicMock(side_effect=slow_scorer)
+    reranker = Reranker(scorer=scorer, timeout=0.05, max_entries=100)
+    assert [doc.page_content for doc in reranker.rerank("p", _docs("a", "ccc"), top_k=2)] == ["a", "ccc"]
+    assert started.wait(5)
+
+    # O worker ainda está ocupado: a segunda consulta não entra na fila
+    assert [doc.page_content for doc in reranker.rerank("q", _docs("bb", "dddd"), top_k=2)] == ["bb", "dddd"]
+    assert scorer.call_count == 1
+
+    release.set()
+    reranker._executor.shutdown(wait=True)
+    assert reranker._slot.acquire(blocking=False)
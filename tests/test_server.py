@@ -0,0 +1,209 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from aiohttp import FormData
+from aiohttp.test_utils import TestClient, TestServer
+from config import Config
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    """Pipeline real sobre Qdrant em memória, embeddings determinísticos e LLM falso."""
+    monkeypatch.setattr(Config, "LOADER_WORKERS", 1)
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSION", 8)
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "DATA_DIR", str(tmp_path / "data"))
+    from langchain_community.document_loaders import TextLoader
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from qdrant_client import QdrantClient
+    from benchmarks.fakes import FakeChatModel
+    from document_loaders import DocumentLoaderFactory
+    from rag_pipeline import RAGPipeline
+
+    with patch.dict(DocumentLoaderFactory.SUPPORTED_EXTENSIONS, {".txt": TextLoader}):
+        yield RAGPipeline(
+            client=QdrantClient(":memory:"),
+            embeddings=DeterministicFakeEmbedding(size=8),
+            llm=FakeChatModel(answer_words=3),
+        )
+
+
+def _run(pipeline, scenario):
+    """Executa `scenario(client)` contra o servidor num event loop próprio."""
+    from server import create_app
+
+    async def _main():
+        async with TestClient(TestServer(create_app(pipeline))) as client:
+            return await scenario(client)
+
+    return asyncio.run(_main())
+
+
+async def _wait_job(client, job_id):
+    for _ in range(500):
+        job = await (await client.get(f"/ingest/{job_id}")).json()
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("Job não terminou")
+
+
+def test_health_and_metrics(pipeline):
+    async def scenario(client):
+        health = await client.get("/health")
+        assert health.status == 200
+        assert (await health.json())["status"] == "ok"
+
+        response = await client.get("/metrics")
+        assert response.status == 200
+        assert "rag_http_requests_total" in await response.text()
+        snapshot = await (await client.get("/metrics?format=json")).json()
+        assert "counters" in snapshot
+
+    _run(pipeline, scenario)
+
+
+def test_ingest_upload_then_query_and_stream(pipeline):
+    """Upload multipart cria um job; depois as consultas usam os documentos indexados."""
+    async def scenario(client):
+        form = FormData()
+        form.add_field("files", "o prazo de entrega do contrato é de dez dias".encode(), filename="contrato.txt")
+        response = await client.post("/ingest", data=form)
+        assert response.status == 202
+        job = await _wait_job(client, (await response.json())["id"])
+        assert job["status"] == "done"
+        assert job["files"][0]["status"] == "done"
+        assert job["files"][0]["chunks"] == 1
+
+        answer = await (await client.post("/query", json={"question": "Qual o prazo do contrato?"})).json()
+        assert answer["answer"].startswith("resposta-")
+
+        answers = await (await client.post("/query", json={"questions": ["a?", "b?"]})).json()
+        assert len(answers["answers"]) == 2
+
+        response = await client.post("/query/stream", json={"question": "Qual o prazo?"})
+        assert response.headers["Content-Type"].startswith("text/event-stream")
+        events = [
+            block.split("\n") for block in (await response.text()).strip().split("\n\n")
+        ]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        assert names[0] == "sources" and names[-1] == "done"
+        assert names.count("token") == 3
+        sources = json.loads(events[0][1].removeprefix("data: "))
+        assert sources[0]["metadata"]["source"].endswith("contrato.txt")
+
+    _run(pipeline, scenario)
+
+
+def test_invalid_requests_return_400(pipeline, tmp_path):
+    async def scenario(client):
+        assert (await client.post("/query", data="não é json")).status == 400
+        assert (await client.post("/query", json={})).status == 400
+        response = await client.post("/query", json={"question": "a?", "filters": {"desconhecido": "x"}})
+        assert response.status == 400
+        assert "Filtros inválidos" in (await response.json())["error"]
+
+        outside = tmp_path / "fora.txt"
+        outside.write_text("fora do diretório de dados")
+        assert (await client.post("/ingest", json={"paths": [str(outside)]})).status == 400
+        assert (await client.get("/ingest/inexistente")).status == 404
+
+    _run(pipeline, scenario)
+
+
+def test_run_restores_snapshot_once_before_serving(monkeypatch):
+    """O snapshot de SNAPSHOT_RESTORE_PATH é importado uma vez, antes de iniciar os workers."""
+    import server
+
+    calls = []
+    monkeypatch.setattr(Config, "SNAPSHOT_RESTORE_PATH", "snapshots/rag.tar")
+    monkeypatch.setattr(server, "create_client", lambda: type("Client", (), {"close": lambda self: calls.append("close")})())
+    monkeypatch.setattr(server, "restore_if_empty", lambda client: calls.append("restore"))
+    monkeypatch.setattr(server, "_serve", lambda host, port, reuse_port: calls.append("serve"))
+
+    server.run(workers=1)
+
+    assert calls == ["restore", "close", "serve"]
+
+
+def test_upload_over_size_limit_returns_413(pipeline, monkeypatch):
+    """O limite de MAX_FILE_SIZE_MB vale para o upload multipart lido em fluxo."""
+    import os
+
+    monkeypatch.setattr(Config, "MAX_FILE_SIZE_MB", 1)
+
+    async def scenario(client):
+        form = FormData()
+        form.add_field("files", b"x" * (2 * 1024 * 1024), filename="grande.txt")
+        response = await client.post("/ingest", data=form)
+        assert response.status == 413
+        assert "excede o limite" in (await response.json())["error"]
+
+    _run(pipeline, scenario)
+    staging = os.path.join(Config.DATA_DIR, ".staging")
+    assert os.listdir(staging) == []
+    assert [name for name in os.listdir(Config.DATA_DIR) if name != ".staging"] == []
+
+
+def test_ingest_cleans_up_old_uploads_but_keeps_current(pipeline, monkeypatch):
+    """Antes de enfileirar, uploads expirados são removidos e os do job atual mantidos."""
+    import io
+    import os
+    import time
+    from upload_store import UploadStore
+
+    old_path = UploadStore().save("antigo.txt", io.BytesIO(b"conteudo antigo"))
+    os.utime(old_path, (time.time() - 10 * 3600, time.time() - 10 * 3600))
+    monkeypatch.setattr(Config, "UPLOAD_MAX_AGE_HOURS", 1)
+
+    async def scenario(client):
+        form = FormData()
+        form.add_field("files", "contrato novo".encode(), filename="novo.txt")
+        response = await client.post("/ingest", data=form)
+        assert response.status == 202
+        return (await _wait_job(client, (await response.json())["id"]))["files"][0]["file_path"]
+
+    new_path = _run(pipeline, scenario)
+    assert not os.path.exists(old_path)
+    assert os.path.exists(new_path)
+
+
+def test_multi_worker_app_rejects_ingest_but_answers_queries(pipeline):
+    """Com vários workers a fila de jobs não é compartilhada, então /ingest responde 409."""
+    from server import create_app
+
+    async def _main():
+        async with TestClient(TestServer(create_app(pipeline, ingest_enabled=False))) as client:
+            ingest = await client.post("/ingest", json={"paths": []})
+            assert ingest.status == 409
+            assert "SERVER_WORKERS" in (await ingest.json())["error"]
+            assert (await client.get("/ingest/abc")).status == 409
+            assert (await client.delete("/ingest/abc")).status == 409
+            assert (await client.post("/query", json={"question": "Qual o prazo?"})).status == 200
+
+    asyncio.run(_main())
+
+
+def test_run_disables_ingest_in_every_worker_process(monkeypatch):
+    import server
+
+    started = []
+
+    class _Process:
+        def __init__(self, target, args, name):
+            started.append(args)
+
+        def start(self):
+            pass
+
+        def join(self):
+            pass
+
+    monkeypatch.setattr(Config, "QDRANT_URL", "http://qdrant:6333")
+    monkeypatch.setattr(Config, "SNAPSHOT_RESTORE_PATH", None)
+    monkeypatch.setattr(server.multiprocessing, "Process", _Process)
+
+    server.run(host="127.0.0.1", port=8000, workers=2)
+
+    assert started == [("127.0.0.1", 8000, True, False)] * 2
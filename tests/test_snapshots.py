@@ -0,0 +1,142 @@
+import tarfile
+import pytest
+from config import Config
+
+
+def _pipeline(client=None):
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from qdrant_client import QdrantClient
+    from benchmarks.fakes import FakeChatModel
+    from rag_pipeline import RAGPipeline
+
+    return RAGPipeline(
+        client=client or QdrantClient(":memory:"),
+        embeddings=DeterministicFakeEmbedding(size=8),
+        llm=FakeChatModel(answer_words=3),
+    )
+
+
+@pytest.fixture
+def indexed(monkeypatch, tmp_path):
+    """Pipeline com dois arquivos de texto indexados e o snapshot exportado."""
+    monkeypatch.setattr(Config, "LOADER_WORKERS", 1)
+    monkeypatch.setattr(Config, "EMBEDDING_DIMENSION", 8)
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RETRIEVAL_MODE", "hybrid")
+    paths = []
+    for name, text in [("contrato.txt", "o prazo de entrega é de dez dias"), ("manual.txt", "ligue o aparelho")]:
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        paths.append(str(path))
+
+    pipeline = _pipeline()
+    pipeline.add_documents(paths)
+    snapshot = str(tmp_path / "snapshots" / "rag.tar")
+    manifest = pipeline.export_snapshot(snapshot)
+    return pipeline, snapshot, manifest
+
+
+def _points(pipeline):
+    records, _ = pipeline.client.scroll(pipeline.collection_name, limit=100, with_payload=True, with_vectors=True)
+    return {record.id: (record.payload, record.vector) for record in records}
+
+
+def test_export_then_import_restores_points_without_embedding(indexed):
+    """O snapshot restaura vetores densos, esparsos e payloads idênticos numa coleção nova."""
+    from unittest.mock import patch
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    pipeline, snapshot, manifest = indexed
+    assert manifest["points"] == 2
+    assert manifest["embedding"] == {"model": Config.EMBEDDING_MODEL, "dimension": 8, "fastembed_version": None}
+    with tarfile.open(snapshot) as archive:
+        assert archive.getnames() == ["manifest.json", "points/000000.npy", "points/000000.jsonl"]
+
+    replica = _pipeline()
+    with patch.object(DeterministicFakeEmbedding, "embed_documents") as embed_documents:
+        assert replica.import_snapshot(snapshot) == 2
+    embed_documents.assert_not_called()
+
+    original, restored = _points(pipeline), _points(replica)
+    assert original.keys() == restored.keys()
+    for point_id, (payload, vector) in original.items():
+        assert restored[point_id][0] == payload
+        assert restored[point_id][1]["dense"] == pytest.approx(vector["dense"], rel=1e-6)
+        assert restored[point_id][1]["sparse"] == vector["sparse"]
+    assert replica.hybrid
+    # A ingestão incremental reconhece os arquivos restaurados como já indexados
+    metadata = next(iter(original.values()))[0]["metadata"]
+    assert replica._is_indexed(metadata["source"], metadata["file_hash"])
+
+
+def test_import_refuses_other_embedding_model_and_keeps_collection(indexed, monkeypatch):
+    """Um snapshot de outro modelo de embeddings é recusado antes de alterar a coleção."""
+    from snapshots import IncompatibleSnapshotError
+
+    pipeline, snapshot, _ = indexed
+    monkeypatch.setattr(Config, "EMBEDDING_MODEL", "outro/modelo")
+
+    with pytest.raises(IncompatibleSnapshotError, match="outro/modelo"):
+        pipeline.import_snapshot(snapshot)
+    assert pipeline.client.count(pipeline.collection_name, exact=True).count == 2
+
+
+def test_export_records_the_pipeline_embedding_model(indexed, tmp_path):
+    """O manifesto registra o modelo dos embeddings do pipeline, não o de config.EMBEDDING_MODEL."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from qdrant_client import QdrantClient
+    from benchmarks.fakes import FakeChatModel
+    from rag_pipeline import RAGPipeline
+    from snapshots import IncompatibleSnapshotError, read_manifest
+
+    class NamedEmbeddings(DeterministicFakeEmbedding):
+        model_name: str = "outro/modelo"
+
+    source, snapshot, _ = indexed
+    named = RAGPipeline(client=QdrantClient(":memory:"), embeddings=NamedEmbeddings(size=8),
+                        llm=FakeChatModel(answer_words=3))
+    exported = str(tmp_path / "named.tar")
+    named.export_snapshot(exported)
+
+    assert read_manifest(exported)["embedding"]["model"] == "outro/modelo"
+    with pytest.raises(IncompatibleSnapshotError, match="outro/modelo"):
+        source.import_snapshot(exported)
+
+
+def test_new_replica_restores_snapshot_when_empty(indexed, monkeypatch):
+    """Com SNAPSHOT_RESTORE_PATH, uma coleção vazia é preenchida; uma já preenchida não é tocada."""
+    _, snapshot, _ = indexed
+    monkeypatch.setattr(Config, "SNAPSHOT_RESTORE_PATH", snapshot)
+
+    replica = _pipeline()
+    assert replica.client.count(replica.collection_name, exact=True).count == 0
+
+    assert replica.restore_snapshot_if_empty() == 2
+    assert replica.client.count(replica.collection_name, exact=True).count == 2
+    assert replica.answer("Qual o prazo de entrega?").startswith("resposta-")
+    assert replica.restore_snapshot_if_empty() == 0
+
+
+def test_truncated_snapshot_keeps_current_collection(indexed, tmp_path):
+    """Uma carga que falha no meio descarta a coleção temporária e preserva a atual."""
+    pipeline, snapshot, _ = indexed
+    with open(snapshot, "rb") as f:
+        data = f.read()
+    truncated = tmp_path / "truncado.tar"
+    truncated.write_bytes(data[:data.index(b'"payload"')])  # corta no meio do primeiro lote de pontos
+
+    replica = _pipeline()
+    replica.import_snapshot(snapshot)
+    before = _points(replica)
+
+    with pytest.raises(Exception):
+        replica.import_snapshot(str(truncated))
+
+    assert _points(replica).keys() == before.keys()
+    names = [c.name for c in replica.client.get_collections().collections]
+    assert len(names) == 1 and names[0].startswith(f"{replica.collection_name}__snapshot_")
+
+    # Uma nova importação troca o alias e exclui a coleção anterior
+    assert replica.import_snapshot(snapshot) == 2
+    assert [c.name for c in replica.client.get_collections().collections] != names
+    assert len(replica.client.get_collections().collections) == 1
@@ -0,0 +1,30 @@
+from sparse_encoder import BM25SparseEncoder, tokenize
+
+
+def test_tokenize_normalizes_and_keeps_identifiers():
+    """Testa se acentos e stopwords são removidos e identificadores compostos preservados."""
+    tokens = tokenize("A Ação do pedido ABC-123")
+
+    assert "acao" in tokens
+    assert "a" not in tokens and "do" not in tokens
+    assert "abc-123" in tokens
+    assert "abc" in tokens and "123" in tokens
+
+
+def test_encode_document_saturates_term_frequency():
+    """Testa se termos repetidos ganham peso, mas com saturação do BM25."""
+    encoder = BM25SparseEncoder()
+    indices, values = encoder.encode_document("prazo prazo prazo entrega")
+    weights = dict(zip(indices, values))
+    prazo, entrega = encoder.encode_query("prazo entrega")[0]
+
+    assert weights[prazo] > weights[entrega]
+    assert weights[prazo] < 3 * weights[entrega]
+
+
+def test_encode_query_uses_unit_weights_without_duplicates():
+    """Testa se a consulta tem peso 1 por termo distinto."""
+    indices, values = BM25SparseEncoder().encode_query("prazo prazo de entrega")
+
+    assert len(indices) == 2
+    assert values == [1.0, 1.0]
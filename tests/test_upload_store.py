@@ -0,0 +1,82 @@
+import io
+import os
+import time
+from upload_store import UploadStore
+
+
+class FakeUploadedFile(io.BytesIO):
+    """Imita o UploadedFile do Streamlit (BytesIO com nome, tamanho e ID do upload)."""
+
+    def __init__(self, name, data, file_id):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.file_id = file_id
+        self.reads = 0
+
+    def read(self, *args):
+        self.reads += 1
+        return super().read(*args)
+
+
+def test_same_content_is_stored_once_with_stable_path(tmp_path):
+    store = UploadStore(str(tmp_path))
+
+    first = store.save("relatorio.pdf", io.BytesIO(b"conteudo"))
+    inode = os.stat(first).st_ino
+    second = store.save("relatorio.pdf", io.BytesIO(b"conteudo"))
+    other = store.save("relatorio.pdf", io.BytesIO(b"outro conteudo"))
+
+    assert first == second
+    assert os.stat(second).st_ino == inode  # não foi regravado
+    assert os.path.basename(first) == "relatorio.pdf"
+    assert other != first
+    assert len(store.entries()) == 2
+
+
+def test_save_upload_skips_reruns_by_upload_id(tmp_path):
+    """Reruns do Streamlit com o mesmo upload não releem nem regravam o arquivo."""
+    store = UploadStore(str(tmp_path))
+    uploaded = FakeUploadedFile("../../video.mp4", b"x" * 1000, file_id="upload-1")
+
+    path = store.save_upload(uploaded)
+    reads = uploaded.reads
+    assert store.save_upload(uploaded) == path
+    assert uploaded.reads == reads
+    assert os.path.dirname(os.path.dirname(path)) == str(tmp_path)
+    assert os.path.basename(path) == "video.mp4"
+
+
+def test_writer_streams_parts_and_dedupes(tmp_path):
+    store = UploadStore(str(tmp_path))
+
+    with store.writer("audio.mp3") as upload:
+        for part in (b"parte1", b"parte2"):
+            upload.write(part)
+    with store.writer("copia.mp3") as duplicate:
+        duplicate.write(b"parte1parte2")
+
+    assert duplicate.path == upload.path
+    with open(upload.path, "rb") as f:
+        assert f.read() == b"parte1parte2"
+    assert os.listdir(store.staging_dir) == []
+
+
+def test_cleanup_by_age_and_quota_respects_keep(tmp_path):
+    store = UploadStore(str(tmp_path))
+    old = store.save("antigo.txt", io.BytesIO(b"a" * 100))
+    kept = store.save("em_uso.txt", io.BytesIO(b"b" * 100))
+    newer = store.save("recente.txt", io.BytesIO(b"c" * 100))
+    newest = store.save("novo.txt", io.BytesIO(b"d" * 100))
+    past = time.time() - 10 * 3600
+    for path in (old, kept):
+        os.utime(path, (past, past))
+    os.utime(newer, (time.time() - 60, time.time() - 60))
+
+    assert store.cleanup(max_age_seconds=3600, max_bytes=0, keep=[kept]) == 1
+    assert not os.path.exists(old) and os.path.exists(kept)
+
+    # Acima da cota, os menos usados saem primeiro
+    assert store.cleanup(max_age_seconds=0, max_bytes=200, keep=[kept]) == 1
+    assert not os.path.exists(newer)
+    assert os.path.exists(newest) and os.path.exists(kept)
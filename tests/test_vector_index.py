@@ -0,0 +1,91 @@
+import pytest
+from qdrant_client import QdrantClient, models
+import vector_index
+from config import Config
+from vector_index import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, create_collection, rebuild_collection
+
+
+@pytest.fixture
+def client():
+    return QdrantClient(":memory:")
+
+
+def _add_points(client, name, count):
+    client.upsert(name, [
+        models.PointStruct(id=i, vector=[1.0, float(i), 0.0, 0.5], payload={"page_content": f"pedido {i}"})
+        for i in range(count)
+    ])
+
+
+def test_quantization_config_follows_config(monkeypatch):
+    """Testa se o modo de quantização do Config gera a configuração e os parâmetros de busca."""
+    monkeypatch.setattr(Config, "QDRANT_QUANTIZATION", "scalar")
+    assert isinstance(vector_index.quantization_config(), models.ScalarQuantization)
+    assert vector_index.search_params().quantization.rescore is True
+
+    monkeypatch.setattr(Config, "QDRANT_QUANTIZATION", "binary")
+    assert isinstance(vector_index.quantization_config(), models.BinaryQuantization)
+
+    monkeypatch.setattr(Config, "QDRANT_QUANTIZATION", "none")
+    assert vector_index.quantization_config() is None
+    assert vector_index.search_params().quantization is None
+
+
+def test_rebuild_migrates_dense_collection_to_hybrid(client, monkeypatch):
+    """Testa se a reconstrução aplica os novos parâmetros e mantém os pontos e embeddings."""
+    create_collection(client, "docs", vector_size=4, hybrid=False)
+    _add_points(client, "docs", 5)
+    monkeypatch.setattr(Config, "QDRANT_ON_DISK", True)
+
+    assert rebuild_collection(client, "docs", hybrid=True) == 5
+
+    params = client.get_collection("docs").config.params
+    assert params.vectors[DENSE_VECTOR_NAME].on_disk is True
+    assert SPARSE_VECTOR_NAME in params.sparse_vectors
+    assert not client.collection_exists("docs__rebuild")
+    record = client.retrieve("docs", [3], with_vectors=True, with_payload=True)[0]
+    assert record.payload == {"page_content": "pedido 3"}
+    assert record.vector[SPARSE_VECTOR_NAME].indices
+
+
+def test_rebuild_resumes_after_interrupted_copy_back(client):
+    """Testa se a reconstrução retoma da cópia temporária quando a original ficou incompleta."""
+    create_collection(client, "docs__rebuild", vector_size=4, hybrid=False)
+    _add_points(client, "docs__rebuild", 5)
+    create_collection(client, "docs", vector_size=4, hybrid=False)
+    _add_points(client, "docs", 2)
+
+    assert rebuild_collection(client, "docs", hybrid=False) == 5
+    assert client.count("docs", exact=True).count == 5
+    assert not client.collection_exists("docs__rebuild")
+
+
+def test_build_filter_matches_values_and_lists():
+    """Testa se valores únicos e listas viram condições sobre os metadados."""
+    query_filter = vector_index.build_filter({"source": ["a.csv", "b.csv"], "type": "csv", "sheet": []})
+
+    conditions = {condition.key: condition.match for condition in query_filter.must}
+    assert conditions["metadata.source"] == models.MatchAny(any=["a.csv", "b.csv"])
+    assert conditions["metadata.type"] == models.MatchValue(value="csv")
+    assert "metadata.sheet" not in conditions
+    assert vector_index.build_filter({}) is None
+
+
+def test_build_filter_rejects_unknown_fields():
+    """Testa se campos sem índice de payload são recusados."""
+    with pytest.raises(ValueError):
+        vector_index.build_filter({"autor": "x"})
+
+
+def test_ensure_payload_indexes_creates_missing_indexes(monkeypatch):
+    """Testa se apenas os índices ausentes são criados no servidor Qdrant."""
+    from unittest.mock import MagicMock
+
+    monkeypatch.setattr(Config, "QDRANT_URL", "http://qdrant:6333")
+    client = MagicMock()
+    client.get_collection.return_value.payload_schema = {"metadata.source": object()}
+
+    vector_index.ensure_payload_indexes(client, "docs")
+
+    created = {call.kwargs["field_name"] for call in client.create_payload_index.call_args_list}
+    assert created == {f"metadata.{field}" for field in vector_index.FILTERABLE_FIELDS} - {"metadata.source"}
@@ -0,0 +1,89 @@
+import sys
+import types
+import pytest
+from unittest.mock import MagicMock
+from whisper_registry import WhisperModelRegistry
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Substitui o pacote whisper por um módulo falso que conta os carregamentos."""
+    module = types.ModuleType("whisper")
+
+    def load_model(name, device=None):
+        model = MagicMock(name=f"whisper-{name}")
+        model.transcribe.side_effect = lambda audio, **options: {"text": f"{name}:{audio}", "language": "pt"}
+        return model
+
+    module.load_model = MagicMock(side_effect=load_model)
+    monkeypatch.setitem(sys.modules, "whisper", module)
+    return module
+
+
+def test_registry_loads_each_model_once(fake_whisper):
+    """Testa se o mesmo modelo é reutilizado entre transcrições."""
+    registry = WhisperModelRegistry(max_memory_mb=1024)
+
+    results = registry.transcribe_many(["a.mp3", "b.mp3"], model_size="base", device="cpu")
+    registry.transcribe("c.mp3", model_size="base", device="cpu")
+
+    assert [r["text"] for r in results] == ["base:a.mp3", "base:b.mp3"]
+    fake_whisper.load_model.assert_called_once_with("base", device="cpu")
+
+
+def test_registry_evicts_least_recently_used(fake_whisper, monkeypatch):
+    """Testa se o modelo menos usado é descartado ao exceder o limite de memória."""
+    monkeypatch.setattr("whisper_registry._model_size_bytes", lambda model: 600 * 1024 * 1024)
+    registry = WhisperModelRegistry(max_memory_mb=1024)
+
+    tiny = registry.get("tiny", device="cpu")
+    registry.get("base", device="cpu")
+
+    assert registry.memory_bytes == 600 * 1024 * 1024
+    assert registry.get("tiny", device="cpu") is not tiny
+    assert fake_whisper.load_model.call_count == 3
+
+
+def test_transcribe_many_returns_exceptions(fake_whisper):
+    """Testa se falhas individuais não interrompem o lote quando solicitado."""
+    registry = WhisperModelRegistry(max_memory_mb=1024)
+    model = registry.get("base", device="cpu")
+    model.transcribe.side_effect = [{"text": "ok"}, RuntimeError("falhou")]
+
+    results = registry.transcribe_many(["a.mp3", "b.mp3"], model_size="base", device="cpu", return_exceptions=True)
+
+    assert results[0] == {"text": "ok"}
+    assert isinstance(results[1], RuntimeError)
+
+
+def test_replicas_of_the_active_model_do_not_evict_each_other(fake_whisper, monkeypatch):
+    """Testa se réplicas acima do limite são mantidas e descartadas juntas, sem recarregar a cada uso."""
+    monkeypatch.setattr("whisper_registry._model_size_bytes", lambda model: 600 * 1024 * 1024)
+    registry = WhisperModelRegistry(max_memory_mb=1024)
+    registry.get("tiny", device="cpu")
+
+    for _ in range(5):
+        registry.get("medium", device="cpu", replica=0)
+        registry.get("medium", device="cpu", replica=1)
+
+    assert fake_whisper.load_model.call_count == 3
+    assert registry.max_replicas("medium", device="cpu") == 1
+
+    registry.get("tiny", device="cpu")
+    assert fake_whisper.load_model.call_count == 4
+    assert registry.memory_bytes == 600 * 1024 * 1024
+
+
+def test_transcribe_segments_limits_workers_to_replicas_that_fit(fake_whisper, monkeypatch):
+    """Testa se a transcrição paralela não usa mais réplicas do que cabem no limite de memória."""
+    from media_streaming import AudioSegment, transcribe_segments
+
+    monkeypatch.setattr("whisper_registry._model_size_bytes", lambda model: 600 * 1024 * 1024)
+    registry = WhisperModelRegistry(max_memory_mb=1024)
+    monkeypatch.setattr("media_streaming.whisper_registry", registry)
+    segments = [AudioSegment(index=i, start=i * 10, end=(i + 1) * 10, samples=i) for i in range(10)]
+
+    results = list(transcribe_segments(segments, model_size="medium", workers=2))
+
+    assert [result["text"] for _, result in results] == [f"medium:{i}" for i in range(10)]
+    assert fake_whisper.load_model.call_count == 1
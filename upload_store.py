@@ -0,0 +1,210 @@
+"""
+Armazenamento de uploads endereçado por conteúdo.
+Cada arquivo é gravado uma única vez em `<DATA_DIR>/<sha256>/<nome original>`:
+uploads com o mesmo conteúdo reaproveitam o arquivo existente e o caminho é
+estável entre execuções, o que mantém a ingestão incremental. A interface chama
+o armazenamento a cada rerun do Streamlit, então uploads já gravados são
+reconhecidos pelo ID do upload sem reler nem regravar o conteúdo.
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 8 * 1024 * 1024
+_HASH_DIR = re.compile(r"^[0-9a-f]{64}$")
+_STAGING_DIR = ".staging"
+
+
+def _safe_name(name: str) -> str:
+    """Nome do arquivo sem diretórios, para não escapar da pasta do upload."""
+    return os.path.basename(name.replace("\\", "/")) or "arquivo"
+
+
+class _StagedWrite:
+    """Grava um upload em fluxo num arquivo temporário enquanto calcula o hash."""
+
+    def __init__(self, store: "UploadStore", name: str):
+        self.store = store
+        self.name = _safe_name(name)
+        self.path: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(dir=store.staging_dir, delete=False)
+
+    def write(self, data: bytes):
+        self._digest.update(data)
+        self._file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self._file.name)
+            return False
+        self.path = self.store._commit(self._digest.hexdigest(), self.name, self._file.name)
+        return False
+
+
+class UploadStore:
+    """Uploads deduplicados por SHA-256, com limpeza por idade e por cota.
+
+    Args:
+        root: Diretório dos uploads (padrão: config.DATA_DIR)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or config.DATA_DIR
+        self.staging_dir = os.path.join(self.root, _STAGING_DIR)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._uploads: Dict[str, str] = {}  # ID do upload -> caminho gravado
+        self._lock = threading.Lock()
+
+    def _existing(self, digest: str) -> Optional[str]:
+        directory = os.path.join(self.root, digest)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return None
+        return os.path.join(directory, names[0]) if names else None
+
+    def _reuse(self, digest: str) -> Optional[str]:
+        existing = self._existing(digest)
+        if existing is not None:
+            os.utime(existing)  # mantém uploads em uso longe da limpeza por idade
+        return existing
+
+    def _commit(self, digest: str, name: str, staged_path: str) -> str:
+        """Move o arquivo temporário para o destino, se o conteúdo ainda não existir."""
+        with self._lock:
+            existing = self._reuse(digest)
+            if existing is not None:
+                os.remove(staged_path)
+                return existing
+
+            directory = os.path.join(self.root, digest)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, name)
+            os.replace(staged_path, path)
+            logger.info(f"Upload gravado: {path}")
+            return path
+
+    def writer(self, name: str) -> _StagedWrite:
+        """Grava um upload recebido em partes (ex.: requisição HTTP); o caminho fica em `.path`.
+
+        Uso:
+            with store.writer("video.mp4") as upload:
+                for chunk in partes:
+                    upload.write(chunk)
+            upload.path
+        """
+        return _StagedWrite(self, name)
+
+    def save(self, name: str, source: BinaryIO) -> str:
+        """Grava o conteúdo de `source` e retorna o caminho estável do arquivo.
+
+        Se `source` permite seek, o hash é calculado antes e nada é gravado quando o
+        conteúdo já existe; caso contrário o conteúdo passa por um arquivo temporário.
+        """
+        if not source.seekable():
+            with self.writer(name) as upload:
+                for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+                    upload.write(chunk)
+            return upload.path
+
+        source.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: source.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        existing = self._reuse(digest.hexdigest())
+        if existing is not None:
+            return existing
+
+        source.seek(0)
+        with tempfile.NamedTemporaryFile(dir=self.staging_dir, delete=False) as staged:
+            shutil.copyfileobj(source, staged, _CHUNK_SIZE)
+        return self._commit(digest.hexdigest(), _safe_name(name), staged.name)
+
+    def save_upload(self, uploaded_file) -> str:
+        """Grava um UploadedFile do Streamlit uma única vez por upload.
+
+        Nos reruns seguintes o caminho vem da memória, pelo `file_id` do upload.
+        """
+        upload_id = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+        with self._lock:
+            path = self._uploads.get(upload_id)
+        if path is not None and os.path.exists(path):
+            return path
+
+        path = self.save(uploaded_file.name, uploaded_file)
+        with self._lock:
+            self._uploads[upload_id] = path
+        return path
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """Arquivos armazenados: (caminho, tamanho em bytes, última modificação)."""
+        entries = []
+        for digest in os.listdir(self.root):
+            if not _HASH_DIR.match(digest):
+                continue
+            directory = os.path.join(self.root, digest)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remove(self, path: str):
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        with self._lock:
+            self._uploads = {upload_id: p for upload_id, p in self._uploads.items() if p != path}
+
+    def cleanup(self, max_age_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                keep: Iterable[str] = ()) -> int:
+        """Remove uploads antigos e, acima da cota, os menos usados primeiro.
+
+        Args:
+            max_age_seconds: Idade máxima (padrão: config.UPLOAD_MAX_AGE_HOURS; 0 = sem limite)
+            max_bytes: Cota total (padrão: config.UPLOAD_QUOTA_MB; 0 = sem limite)
+            keep: Caminhos que não podem ser removidos (ex.: arquivos de jobs em andamento)
+
+        Returns:
+            Número de arquivos removidos.
+        """
+        max_age_seconds = config.UPLOAD_MAX_AGE_HOURS * 3600 if max_age_seconds is None else max_age_seconds
+        max_bytes = config.UPLOAD_QUOTA_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        keep = {os.path.abspath(path) for path in keep}
+        now = time.time()
+
+        # Temporários de gravações interrompidas
+        for name in os.listdir(self.staging_dir):
+            path = os.path.join(self.staging_dir, name)
+            if now - os.path.getmtime(path) > 3600:
+                os.remove(path)
+
+        removed = 0
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, modified_at in entries:
+            if os.path.abspath(path) in keep:
+                continue
+            expired = max_age_seconds and now - modified_at > max_age_seconds
+            over_quota = max_bytes and total > max_bytes
+            if not (expired or over_quota):
+                continue
+            self._remove(path)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"{removed} upload(s) removido(s) do armazenamento.")
+        return removed
@@ -0,0 +1,297 @@
+"""
+Configuração do índice vetorial do Qdrant e reconstrução de coleções.
+Quantização, armazenamento em disco, parâmetros do HNSW e limites do otimizador
+vêm do Config. Os parâmetros só valem na criação da coleção; para aplicá-los a
+uma coleção existente use `rebuild_collection` (ou `python vector_index.py`).
+
+Observação: o modo local embutido (QDRANT_PATH) aceita estes parâmetros, mas faz
+busca exaustiva; quantização e HNSW têm efeito com um servidor Qdrant (QDRANT_URL).
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+from config import config
+from sparse_encoder import BM25SparseEncoder
+
+logger = logging.getLogger(__name__)
+
+# Nomes dos vetores nas coleções híbridas
+DENSE_VECTOR_NAME = "dense"
+SPARSE_VECTOR_NAME = "sparse"
+
+# Metadados filtráveis na busca e o tipo do índice de payload de cada um
+FILTERABLE_FIELDS = {
+    "source": "keyword",
+    "type": "keyword",
+    "sheet": "keyword",
+    "language": "keyword",
+    "row": "integer",
+}
+
+# Pontos copiados por requisição durante a reconstrução
+_REBUILD_BATCH = 256
+
+
+def create_client():
+    """Conecta ao servidor Qdrant em QDRANT_URL ou, se vazio, ao banco local em QDRANT_PATH."""
+    import qdrant_client
+
+    if config.QDRANT_URL:
+        return qdrant_client.QdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY)
+    # Garante que o diretório do banco de dados exista
+    os.makedirs(config.QDRANT_PATH, exist_ok=True)
+    return qdrant_client.QdrantClient(path=config.QDRANT_PATH)
+
+
+def dense_vector_params(size: int):
+    """Parâmetros do vetor denso; com QDRANT_ON_DISK os vetores originais ficam em memmap."""
+    from qdrant_client import models
+    return models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=config.QDRANT_ON_DISK)
+
+
+def hnsw_config():
+    from qdrant_client import models
+    return models.HnswConfigDiff(
+        m=config.QDRANT_HNSW_M,
+        ef_construct=config.QDRANT_HNSW_EF_CONSTRUCT,
+        on_disk=config.QDRANT_HNSW_ON_DISK,
+    )
+
+
+def optimizers_config():
+    from qdrant_client import models
+    return models.OptimizersConfigDiff(
+        indexing_threshold=config.QDRANT_INDEXING_THRESHOLD,
+        memmap_threshold=config.QDRANT_MEMMAP_THRESHOLD or None,
+    )
+
+
+def quantization_config():
+    """Quantização escalar (int8) ou binária, mantida em RAM; None se desativada."""
+    from qdrant_client import models
+
+    mode = config.QDRANT_QUANTIZATION
+    if mode == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=config.QDRANT_QUANTIZATION_QUANTILE,
+            always_ram=config.QDRANT_QUANTIZATION_ALWAYS_RAM,
+        ))
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=config.QDRANT_QUANTIZATION_ALWAYS_RAM,
+        ))
+    if mode not in ("", "none"):
+        logger.warning(f"QDRANT_QUANTIZATION desconhecida: '{mode}'. Usando vetores sem quantização.")
+    return None
+
+
+def search_params():
+    """Parâmetros de busca: `ef` do HNSW e, com quantização, reavaliação pelos vetores originais."""
+    from qdrant_client import models
+
+    quantization = None
+    if quantization_config() is not None:
+        quantization = models.QuantizationSearchParams(
+            rescore=config.QDRANT_RESCORE,
+            oversampling=config.QDRANT_OVERSAMPLING,
+        )
+    return models.SearchParams(hnsw_ef=config.QDRANT_HNSW_EF, quantization=quantization)
+
+
+def create_collection(client, collection_name: str, vector_size: int, hybrid: bool):
+    """Cria a coleção com os parâmetros de índice do Config.
+
+    Coleções híbridas têm um vetor denso e um esparso (BM25, IDF calculado pelo Qdrant)
+    nomeados; as demais, um único vetor denso sem nome.
+    """
+    from qdrant_client import models
+
+    dense_params = dense_vector_params(vector_size)
+    if hybrid:
+        vectors_config = {DENSE_VECTOR_NAME: dense_params}
+        sparse_vectors_config = {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+    else:
+        vectors_config = dense_params
+        sparse_vectors_config = None
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config,
+        sparse_vectors_config=sparse_vectors_config,
+        hnsw_config=hnsw_config(),
+        optimizers_config=optimizers_config(),
+        quantization_config=quantization_config(),
+    )
+    ensure_payload_indexes(client, collection_name)
+
+
+def alias_target(client, name: str) -> Optional[str]:
+    """Coleção apontada pelo alias `name` (ver snapshots.import_snapshot), ou None se não for um alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == name:
+            return alias.collection_name
+    return None
+
+
+def delete_collection(client, name: str):
+    """Exclui a coleção; se `name` for um alias, exclui a coleção apontada (e o alias com ela)."""
+    client.delete_collection(alias_target(client, name) or name)
+
+
+def ensure_payload_indexes(client, collection_name: str):
+    """Cria os índices de payload ausentes para os metadados filtráveis.
+
+    O modo local não usa índices de payload (filtra por varredura), então só há
+    índices a criar com um servidor Qdrant.
+    """
+    if not config.QDRANT_URL:
+        return
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in FILTERABLE_FIELDS.items():
+        key = f"metadata.{field}"
+        if key not in existing:
+            client.create_payload_index(collection_name, field_name=key, field_schema=schema)
+            logger.info(f"Índice de payload criado para '{key}'.")
+
+
+def build_filter(filters: Optional[Dict[str, Any]]):
+    """Converte filtros de metadados em um filtro do Qdrant.
+
+    Cada campo aceita um valor ou uma lista de valores (qualquer um deles serve);
+    campos vazios são ignorados. Ex.: {"source": ["a.csv", "b.csv"], "type": "csv"}.
+
+    Raises:
+        ValueError: Se um campo não estiver em FILTERABLE_FIELDS
+    """
+    from qdrant_client import models
+
+    conditions = []
+    for field, value in (filters or {}).items():
+        if field not in FILTERABLE_FIELDS:
+            raise ValueError(f"Filtro não suportado: '{field}'. Use um de: {', '.join(FILTERABLE_FIELDS)}")
+        if value is None or value == [] or value == "":
+            continue
+        key = f"metadata.{field}"
+        if isinstance(value, (list, tuple, set)):
+            match = models.MatchAny(any=list(value))
+        else:
+            match = models.MatchValue(value=value)
+        conditions.append(models.FieldCondition(key=key, match=match))
+    return models.Filter(must=conditions) if conditions else None
+
+
+def facet_values(client, collection_name: str, field: str, limit: int = 1000) -> List[Any]:
+    """Valores distintos de um metadado filtrável na coleção, para montar os filtros da interface."""
+    if field not in FILTERABLE_FIELDS:
+        raise ValueError(f"Filtro não suportado: '{field}'. Use um de: {', '.join(FILTERABLE_FIELDS)}")
+    response = client.facet(collection_name, key=f"metadata.{field}", limit=limit)
+    return sorted(hit.value for hit in response.hits)
+
+
+def _dense_vector(vector):
+    """Extrai o vetor denso de um ponto, com vetores nomeados ou não."""
+    return vector[DENSE_VECTOR_NAME] if isinstance(vector, dict) else vector
+
+
+def _convert_point(record, hybrid: bool, sparse_encoder: BM25SparseEncoder):
+    """Adapta um ponto ao esquema da coleção de destino, gerando o vetor esparso se faltar."""
+    from qdrant_client import models
+
+    dense = _dense_vector(record.vector)
+    if not hybrid:
+        return models.PointStruct(id=record.id, vector=dense, payload=record.payload)
+
+    vector = {DENSE_VECTOR_NAME: dense}
+    sparse = record.vector.get(SPARSE_VECTOR_NAME) if isinstance(record.vector, dict) else None
+    if sparse is None:
+        indices, values = sparse_encoder.encode_document((record.payload or {}).get("page_content", ""))
+        sparse = models.SparseVector(indices=indices, values=values)
+    vector[SPARSE_VECTOR_NAME] = sparse
+    return models.PointStruct(id=record.id, vector=vector, payload=record.payload)
+
+
+def _copy_points(client, source: str, target: str, hybrid: bool, sparse_encoder: BM25SparseEncoder) -> int:
+    """Copia todos os pontos de `source` para `target` em lotes, sem recalcular embeddings."""
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            limit=_REBUILD_BATCH,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if records:
+            points = [_convert_point(record, hybrid, sparse_encoder) for record in records]
+            client.upsert(collection_name=target, points=points)
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+def _has_complete_copy(client, collection_name: str, temporary_name: str) -> bool:
+    """Indica se a cópia temporária de uma reconstrução interrompida já contém todos os pontos.
+
+    A cópia só fica com tantos pontos quanto a original ao fim da primeira fase; se a
+    original tiver menos pontos (ou não existir), a interrupção ocorreu ao recriá-la.
+    """
+    if not client.collection_exists(temporary_name):
+        return False
+    if not client.collection_exists(collection_name):
+        return True
+    copied = client.count(temporary_name, exact=True).count
+    return copied >= client.count(collection_name, exact=True).count
+
+
+def rebuild_collection(client, collection_name: str, hybrid: Optional[bool] = None) -> int:
+    """Reconstrói uma coleção existente com os parâmetros de índice atuais do Config.
+
+    Os pontos são copiados para uma coleção temporária, a original é recriada com os
+    novos parâmetros e os pontos voltam para ela. Os embeddings armazenados são
+    reaproveitados; ao migrar para o modo híbrido os vetores esparsos são gerados a
+    partir do texto do payload.
+
+    Args:
+        client: Cliente Qdrant
+        collection_name: Nome da coleção a reconstruir
+        hybrid: Esquema de destino; por padrão segue config.RETRIEVAL_MODE
+
+    Returns:
+        Número de pontos migrados
+    """
+    if hybrid is None:
+        hybrid = config.RETRIEVAL_MODE == "hybrid"
+
+    temporary_name = f"{collection_name}__rebuild"
+    sparse_encoder = BM25SparseEncoder()
+
+    if _has_complete_copy(client, collection_name, temporary_name):
+        # Uma reconstrução anterior foi interrompida depois de copiar todos os pontos
+        logger.info(f"Retomando a reconstrução da coleção '{collection_name}'...")
+        vector_size = _dense_vector(client.get_collection(temporary_name).config.params.vectors).size
+        copied = client.count(temporary_name, exact=True).count
+    else:
+        # Uma cópia temporária incompleta é descartada: a coleção original está intacta
+        if client.collection_exists(temporary_name):
+            client.delete_collection(temporary_name)
+        vector_size = _dense_vector(client.get_collection(collection_name).config.params.vectors).size
+        logger.info(f"Reconstruindo a coleção '{collection_name}' (híbrida: {hybrid})...")
+        create_collection(client, temporary_name, vector_size, hybrid)
+        copied = _copy_points(client, collection_name, temporary_name, hybrid, sparse_encoder)
+
+    if client.collection_exists(collection_name):
+        delete_collection(client, collection_name)
+    create_collection(client, collection_name, vector_size, hybrid)
+    _copy_points(client, temporary_name, collection_name, hybrid, sparse_encoder)
+    client.delete_collection(temporary_name)
+
+    logger.info(f"Coleção '{collection_name}' reconstruída com {copied} pontos.")
+    return copied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rebuild_collection(create_client(), config.COLLECTION_NAME)
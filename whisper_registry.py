@@ -0,0 +1,155 @@
+"""
+Registro de modelos Whisper compartilhado pelo processo.
+Carrega cada modelo uma única vez (por tamanho e dispositivo) e descarta os
+menos usados quando o limite de memória configurado é ultrapassado.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ModelEntry:
+    """Modelo carregado e seu tamanho estimado em memória."""
+    model: Any
+    size_bytes: int
+    # O Whisper instala hooks no modelo durante a transcrição; uma chamada por vez
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _resolve_device(device: Optional[str]) -> str:
+    """Resolve o dispositivo: explícito, da configuração ou automático (cuda/cpu)."""
+    device = device or config.WHISPER_DEVICE
+    if device:
+        return device
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def _model_size_bytes(model: Any) -> int:
+    """Estima a memória ocupada pelos parâmetros e buffers do modelo."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+class WhisperModelRegistry:
+    """Cache LRU de modelos Whisper com limite de memória."""
+
+    def __init__(self, max_memory_mb: Optional[int] = None):
+        self.max_memory_mb = max_memory_mb if max_memory_mb is not None else config.WHISPER_CACHE_MAX_MB
+        self._entries: "OrderedDict[Tuple[str, str, int], _ModelEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Memória total estimada dos modelos carregados."""
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def _get_entry(self, model_size: Optional[str], device: Optional[str], replica: int = 0) -> _ModelEntry:
+        key = (model_size or config.WHISPER_MODEL, _resolve_device(device), replica)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+            import whisper
+
+            logger.info(f"Carregando modelo Whisper '{key[0]}' em '{key[1]}'...")
+            model = whisper.load_model(key[0], device=key[1])
+            entry = _ModelEntry(model=model, size_bytes=_model_size_bytes(model))
+            self._entries[key] = entry
+            self._evict(keep=key)
+            return entry
+
+    def _evict(self, keep: Tuple[str, str, int]):
+        """Descarta os modelos menos usados até respeitar o limite de memória.
+
+        As réplicas de um modelo formam um grupo: são descartadas juntas, e as do modelo
+        em uso (`keep`) nunca são descartadas, para que não se substituam a cada segmento.
+        """
+        max_bytes = self.max_memory_mb * 1024 * 1024
+        while self.memory_bytes > max_bytes:
+            group = next((key[:2] for key in self._entries if key[:2] != keep[:2]), None)
+            if group is None:
+                break
+            for key in [key for key in self._entries if key[:2] == group]:
+                del self._entries[key]
+            logger.info(f"Modelo Whisper '{group[0]}' ({group[1]}) descartado do cache.")
+
+        if self.memory_bytes > max_bytes:
+            logger.warning(
+                f"Modelo Whisper '{keep[0]}' excede o limite de {self.max_memory_mb}MB e foi mantido mesmo assim."
+            )
+
+    def max_replicas(self, model_size: Optional[str] = None, device: Optional[str] = None) -> int:
+        """Número de cópias do modelo que cabem no limite de memória (no mínimo 1).
+
+        Carrega a primeira cópia, se ainda não estiver carregada, para medir o tamanho.
+        """
+        size_bytes = self._get_entry(model_size, device).size_bytes
+        if not size_bytes:
+            return 1
+        return max(1, self.max_memory_mb * 1024 * 1024 // size_bytes)
+
+    def get(self, model_size: Optional[str] = None, device: Optional[str] = None, replica: int = 0) -> Any:
+        """Retorna o modelo carregado, carregando-o na primeira chamada.
+
+        Args:
+            model_size: tiny, base, small, medium ou large (padrão: config.WHISPER_MODEL)
+            device: cpu, cuda... (padrão: config.WHISPER_DEVICE ou detecção automática)
+            replica: Índice da cópia do modelo, para transcrições simultâneas
+        """
+        return self._get_entry(model_size, device, replica).model
+
+    def transcribe(self, audio: Any, model_size: Optional[str] = None, device: Optional[str] = None,
+                   replica: int = 0, **options) -> dict:
+        """Transcreve um áudio (caminho ou array) com o modelo compartilhado."""
+        entry = self._get_entry(model_size, device, replica)
+        with entry.lock:
+            return entry.model.transcribe(audio, **options)
+
+    def transcribe_many(self, audios: Sequence[Any], model_size: Optional[str] = None,
+                        device: Optional[str] = None, return_exceptions: bool = False, **options) -> List[Any]:
+        """Transcreve vários áudios em sequência com uma única instância do modelo.
+
+        Args:
+            audios: Caminhos ou arrays de áudio
+            return_exceptions: Se True, falhas são devolvidas na lista em vez de interromper o lote
+
+        Returns:
+            Os resultados de `model.transcribe`, na mesma ordem de `audios`.
+        """
+        entry = self._get_entry(model_size, device)
+        results = []
+        with entry.lock:
+            for audio in audios:
+                try:
+                    results.append(entry.model.transcribe(audio, **options))
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+        return results
+
+    def clear(self):
+        """Descarta todos os modelos carregados."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Instância global compartilhada pelos loaders
+whisper_registry = WhisperModelRegistry()